@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Announcement, CalendarEvent, Newsletter, Notification
+from .models import Announcement, CalendarEvent, Newsletter, NewsletterLink, NewsletterTemplate, Notification, Segment
 
 
 @admin.register(Announcement)
@@ -16,14 +16,38 @@ class CalendarEventAdmin(admin.ModelAdmin):
     search_fields = ('title', 'description')
 
 
+class NewsletterLinkInline(admin.TabularInline):
+    model = NewsletterLink
+    fields = ('url', 'clicks', 'unique_clicks')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
 @admin.register(Newsletter)
 class NewsletterAdmin(admin.ModelAdmin):
-    list_display = ('subject', 'sent_at', 'recipient_count')
+    list_display = ('subject', 'segment', 'status', 'sent_at', 'recipient_count')
+    list_filter = ('status', 'segment')
     search_fields = ('subject', 'content')
+    inlines = [NewsletterLinkInline]
+
+
+@admin.register(Segment)
+class SegmentAdmin(admin.ModelAdmin):
+    list_display = ('name', 'member_count', 'one_per_household', 'refreshed_at')
+    search_fields = ('name', 'description')
+    readonly_fields = ('member_count', 'refreshed_at')
+
+
+@admin.register(NewsletterTemplate)
+class NewsletterTemplateAdmin(admin.ModelAdmin):
+    list_display = ('name', 'key', 'updated_at')
+    search_fields = ('name', 'key')
+    prepopulated_fields = {'key': ('name',)}
 
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ('member', 'channel', 'subject', 'status', 'sent_at')
+    list_display = ('member', 'channel', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
     list_filter = ('channel', 'status', 'sent_at')
-    readonly_fields = ('sent_at',)
+    readonly_fields = ('sent_at', 'attempts', 'next_attempt_at')
@@ -0,0 +1,23 @@
+from django.apps import AppConfig
+
+
+class CommunicationsConfig(AppConfig):
+    name = 'apps.communications'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save, pre_delete
+        from apps.education.models import Student
+        from apps.events.models import EventRegistration
+        from apps.finance.models import Donation
+        from apps.members.models import Member
+        from . import segments
+
+        post_save.connect(segments.member_saved, sender=Member, dispatch_uid='communications.segments.member_save')
+        pre_delete.connect(segments.member_deleted, sender=Member,
+                           dispatch_uid='communications.segments.member_delete')
+        for model in (Student, EventRegistration, Donation):
+            label = model._meta.model_name
+            post_save.connect(segments.related_saved, sender=model,
+                              dispatch_uid=f'communications.segments.{label}_save')
+            post_delete.connect(segments.related_saved, sender=model,
+                                dispatch_uid=f'communications.segments.{label}_delete')
@@ -0,0 +1,238 @@
+"""
+Newsletter delivery.
+
+send() records one NewsletterDelivery per recipient (the members of the
+newsletter's segment, refreshed first, see segments), then fans the
+pending ones out to Celery subtasks of NEWSLETTER_CHUNK_SIZE recipients
+(tasks.deliver_newsletter_chunk). Each subtask:
+
+- claims its PENDING rows for a LEASE (SELECT ... FOR UPDATE SKIP LOCKED,
+  then `claimed_until`, committed at once), so a duplicate or redelivered
+  subtask never mails what another one is sending, and no transaction
+  stays open while sending;
+- renders each recipient's message from templates compiled once per
+  process (see rendering), with open and click tracking (see tracking);
+- opens one connection to the email provider and sends every message of
+  the chunk over it, within the provider's rate limit (EMAIL_RATE_LIMIT
+  messages per second across all workers, see core.ratelimit);
+- commits each recipient's outcome as soon as it is known. A refused
+  recipient is FAILED with the reason; a provider failure (connection
+  lost...) releases the rest of the claim for a retry with exponential
+  backoff, and any other error releases it too before propagating.
+
+Rows leave PENDING only with their outcome, so calling send() again
+resumes an interrupted send without mailing anyone twice: at most the
+message in flight when a worker dies can be repeated, once its lease
+runs out. resume_stalled() does so for sends without progress for a
+while. The last chunk to finish marks the newsletter SENT.
+"""
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.members.models import Member
+from core import ratelimit
+from core.cache import invalidate_model_cache
+from . import segments
+from .models import Newsletter, NewsletterDelivery
+from .rendering import NewsletterRenderer
+from .tracking import Tracker
+
+# Failures of one message; anything else the provider raises aborts the chunk.
+RECIPIENT_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, ValueError)
+PROVIDER_ERRORS = (smtplib.SMTPException, OSError)
+STALLED_AFTER = timedelta(minutes=15)
+# Longer than a chunk takes to send, rate limit included.
+LEASE = timedelta(minutes=30)
+BATCH_SIZE = 1000
+
+
+class ProviderError(Exception):
+    """The email provider failed as a whole; the chunk is retried later."""
+
+
+def provider_name() -> str:
+    return f'email:{settings.EMAIL_HOST}'
+
+
+def backoff(retries: int) -> int:
+    """Seconds before retrying a chunk for the `retries`-th time."""
+    return min(30 * 2 ** retries, 3600)
+
+
+def recipients(newsletter):
+    """The members of the newsletter's segment, or else every active member, with an email."""
+    if newsletter.segment_id:
+        members = segments.members(newsletter.segment_id)
+    else:
+        members = Member.objects.filter(status=Member.Status.ACTIVE, anonymized_at__isnull=True)
+    return members.filter(email__isnull=False).exclude(email='')
+
+
+def build_message(renderer, tracker, delivery):
+    """The newsletter for a delivery's member: merge fields rendered, text and tracked HTML parts."""
+    member = delivery.member
+    subject, text, html = renderer.render(member)
+    message = EmailMultiAlternatives(subject=subject, body=text, from_email=settings.DEFAULT_FROM_EMAIL, to=[member.email])
+    message.attach_alternative(tracker.apply(html, delivery.pk), 'text/html')
+    return message
+
+
+def send(newsletter, chunk_size=None):
+    """
+    Start sending `newsletter`, or resume it. The recipients are fixed
+    when it starts. Returns the number of chunks queued.
+    """
+    from .tasks import deliver_newsletter_chunk
+
+    chunk_size = chunk_size or settings.NEWSLETTER_CHUNK_SIZE
+    with transaction.atomic():
+        newsletter = Newsletter.objects.select_for_update().get(pk=newsletter.pk)
+        if newsletter.status == Newsletter.Status.SENT:
+            return 0
+        if newsletter.status == Newsletter.Status.DRAFT:
+            if newsletter.segment_id:
+                segments.refresh(newsletter.segment)
+            newsletter.recipient_count = _create_deliveries(newsletter)
+            newsletter.status = Newsletter.Status.SENDING
+            newsletter.sending_started_at = timezone.now()
+            newsletter.save(update_fields=['recipient_count', 'status', 'sending_started_at'])
+        chunks = _chunks(newsletter, chunk_size)
+        for first_id, last_id in chunks:
+            transaction.on_commit(
+                lambda first_id=first_id, last_id=last_id:
+                    deliver_newsletter_chunk.delay(str(newsletter.pk), first_id, last_id)
+            )
+    if not chunks:
+        _finish_if_done(newsletter)
+    return len(chunks)
+
+
+def _create_deliveries(newsletter):
+    pks = recipients(newsletter).order_by().values_list('pk', flat=True)
+    batch = []
+    for pk in pks.iterator(chunk_size=BATCH_SIZE):
+        batch.append(NewsletterDelivery(newsletter=newsletter, member_id=pk))
+        if len(batch) >= BATCH_SIZE:
+            NewsletterDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    NewsletterDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+    return NewsletterDelivery.objects.filter(newsletter=newsletter).count()
+
+
+def _chunks(newsletter, chunk_size):
+    """`(first_id, last_id)` ranges of `chunk_size` pending deliveries."""
+    ids = list(
+        NewsletterDelivery.objects.filter(newsletter=newsletter, status=NewsletterDelivery.Status.PENDING)
+        .order_by('id').values_list('id', flat=True)
+    )
+    return [(ids[start], ids[min(start + chunk_size, len(ids)) - 1]) for start in range(0, len(ids), chunk_size)]
+
+
+def send_chunk(newsletter_id, first_id, last_id):
+    """
+    Send the pending deliveries of a newsletter with ids between
+    `first_id` and `last_id`, over one connection. Returns the counts;
+    raises ProviderError once the outcomes so far are saved.
+    """
+    newsletter = Newsletter.objects.get(pk=newsletter_id)
+    counts = {NewsletterDelivery.Status.SENT: 0, NewsletterDelivery.Status.FAILED: 0}
+    deliveries = claim(newsletter, first_id, last_id)
+    if not deliveries:
+        return counts
+
+    remaining = {delivery.pk for delivery in deliveries}
+    connection = get_connection()
+    try:
+        # Templates come compiled from the process cache; merge data in a few queries.
+        renderer = NewsletterRenderer(newsletter)
+        renderer.prepare([delivery.member for delivery in deliveries])
+        tracker = Tracker(newsletter)
+        connection.open()
+        for delivery in deliveries:
+            _deliver(connection, renderer, tracker, delivery)
+            NewsletterDelivery.objects.filter(pk=delivery.pk).update(
+                status=delivery.status, attempted_at=delivery.attempted_at,
+                error_message=delivery.error_message, claimed_until=None,
+            )
+            remaining.discard(delivery.pk)
+            counts[delivery.status] += 1
+    except PROVIDER_ERRORS as exc:
+        raise ProviderError(str(exc)) from exc
+    finally:
+        connection.close()
+        # Hand what was not sent back right away instead of at the end of the lease.
+        NewsletterDelivery.objects.filter(pk__in=remaining).update(claimed_until=None)
+
+    _finish_if_done(newsletter)
+    return counts
+
+
+def claim(newsletter, first_id, last_id):
+    """Lease the claimable pending deliveries of a chunk to this worker."""
+    now = timezone.now()
+    with transaction.atomic():
+        deliveries = list(
+            NewsletterDelivery.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(newsletter=newsletter, status=NewsletterDelivery.Status.PENDING, id__range=(first_id, last_id))
+            .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+            .select_related('member')
+            .order_by('id')
+        )
+        NewsletterDelivery.objects.filter(pk__in=[d.pk for d in deliveries]).update(claimed_until=now + LEASE)
+    return deliveries
+
+
+def _deliver(connection, renderer, tracker, delivery):
+    delivery.attempted_at = timezone.now()
+    if not delivery.member.email:
+        delivery.status, delivery.error_message = NewsletterDelivery.Status.FAILED, 'Aucune adresse courriel.'
+        return
+    ratelimit.wait(provider_name(), settings.EMAIL_RATE_LIMIT)
+    try:
+        connection.send_messages([build_message(renderer, tracker, delivery)])
+    except RECIPIENT_ERRORS as exc:
+        delivery.status, delivery.error_message = NewsletterDelivery.Status.FAILED, str(exc)
+    else:
+        delivery.status, delivery.error_message = NewsletterDelivery.Status.SENT, ''
+
+
+def _finish_if_done(newsletter):
+    pending = NewsletterDelivery.objects.filter(newsletter=newsletter, status=NewsletterDelivery.Status.PENDING)
+    if pending.exists():
+        return
+    if Newsletter.objects.filter(pk=newsletter.pk, status=Newsletter.Status.SENDING).update(
+        status=Newsletter.Status.SENT, sent_at=timezone.now(),
+    ):
+        # update() sends no signals.
+        invalidate_model_cache(Newsletter)
+
+
+def progress(newsletter):
+    """Number of deliveries per status."""
+    counts = dict.fromkeys(NewsletterDelivery.Status.values, 0)
+    counts.update(
+        NewsletterDelivery.objects.filter(newsletter=newsletter)
+        .values_list('status').annotate(count=Count('id')).order_by()
+    )
+    return counts
+
+
+def resume_stalled(after=STALLED_AFTER):
+    """Resume the sends without any delivery attempted for `after`. Returns how many."""
+    stalled = (
+        Newsletter.objects.filter(status=Newsletter.Status.SENDING)
+        .annotate(last_activity=Coalesce(Max('deliveries__attempted_at'), 'sending_started_at'))
+        .filter(last_activity__lt=timezone.now() - after)
+    )
+    resumed = 0
+    for newsletter in stalled:
+        send(newsletter)
+        resumed += 1
+    return resumed
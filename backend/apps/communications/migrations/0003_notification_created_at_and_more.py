@@ -0,0 +1,26 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:39
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['member', 'created_at', 'id'], name='notificatio_member__57556c_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0003_notification_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_sent(apps, schema_editor):
+    Newsletter = apps.get_model('communications', 'Newsletter')
+    Newsletter.objects.filter(sent_at__isnull=False).update(status='SENT')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0004_notification_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsletter',
+            name='sending_started_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Envoi commencé le'),
+        ),
+        migrations.AddField(
+            model_name='newsletter',
+            name='status',
+            field=models.CharField(choices=[('DRAFT', 'Brouillon'), ('SENDING', "En cours d'envoi"), ('SENT', 'Envoyée')], default='DRAFT', editable=False, max_length=10, verbose_name='Statut'),
+        ),
+        migrations.CreateModel(
+            name='NewsletterDelivery',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('PENDING', 'En attente'), ('SENT', 'Envoyé'), ('FAILED', 'Échoué')], default='PENDING', max_length=10, verbose_name='Statut')),
+                ('attempted_at', models.DateTimeField(blank=True, null=True, verbose_name='Tenté le')),
+                ('error_message', models.TextField(blank=True, verbose_name="Message d'erreur")),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='newsletter_deliveries', to=settings.AUTH_USER_MODEL, verbose_name='Membre')),
+                ('newsletter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='communications.newsletter', verbose_name='Infolettre')),
+            ],
+            options={
+                'verbose_name': "Envoi d'infolettre",
+                'verbose_name_plural': "Envois d'infolettre",
+                'db_table': 'newsletter_deliveries',
+                'indexes': [models.Index(fields=['newsletter', 'status', 'id'], name='newsletter_deliveries_todo_idx')],
+                'unique_together': {('newsletter', 'member')},
+            },
+        ),
+        migrations.RunPython(mark_sent, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:34
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+DUE_INDEX = models.Index(
+    fields=['next_attempt_at', 'id'], condition=models.Q(status='PENDING'), name='notifications_due_idx',
+)
+
+
+def add_due_index(apps, schema_editor):
+    # CONCURRENTLY on PostgreSQL, so writes to notifications are not blocked meanwhile.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS notifications_due_idx '
+            "ON notifications (next_attempt_at, id) WHERE status = 'PENDING'"
+        )
+    else:
+        schema_editor.add_index(apps.get_model('communications', 'Notification'), DUE_INDEX)
+
+
+def remove_due_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('communications', 'Notification'), DUE_INDEX)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('communications', '0005_newsletter_delivery'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Tentatives'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Prochaine tentative'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[migrations.AddIndex(model_name='notification', index=DUE_INDEX)],
+            database_operations=[migrations.RunPython(add_due_index, remove_due_index)],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:39
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0006_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsletterTemplate',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('key', models.SlugField(max_length=100, unique=True, verbose_name='Identifiant')),
+                ('name', models.CharField(max_length=255, verbose_name='Nom')),
+                ('html_body', models.TextField(help_text="Le contenu de l'infolettre s'insère à {{ content }}.", verbose_name='Gabarit HTML')),
+                ('text_body', models.TextField(blank=True, help_text='Par défaut, le gabarit HTML sans balises.', verbose_name='Gabarit texte')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': "Gabarit d'infolettre",
+                'verbose_name_plural': "Gabarits d'infolettre",
+                'db_table': 'newsletter_templates',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:45
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_mailing_lists(apps, schema_editor):
+    # The men's and women's mailing lists; members are materialized by the
+    # nightly refresh (or the segment's refresh action).
+    Segment = apps.get_model('communications', 'Segment')
+    Segment.objects.create(name='Hommes', rules={'sex': 'M'})
+    Segment.objects.create(name='Femmes', rules={'sex': 'F'})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0007_newsletter_template'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Segment',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, verbose_name='Nom')),
+                ('description', models.TextField(blank=True, verbose_name='Description')),
+                ('rules', models.JSONField(blank=True, default=dict, verbose_name='Critères')),
+                ('one_per_household', models.BooleanField(default=False, verbose_name='Un membre par foyer')),
+                ('member_count', models.IntegerField(default=0, editable=False, verbose_name='Nombre de membres')),
+                ('refreshed_at', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Actualisé le')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Segment',
+                'verbose_name_plural': 'Segments',
+                'db_table': 'segments',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='newsletter',
+            name='segment',
+            field=models.ForeignKey(blank=True, help_text='Par défaut, tous les membres actifs.', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='newsletters', to='communications.segment', verbose_name='Segment'),
+        ),
+        migrations.CreateModel(
+            name='SegmentMember',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segment_memberships', to=settings.AUTH_USER_MODEL, verbose_name='Membre')),
+                ('segment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='communications.segment', verbose_name='Segment')),
+            ],
+            options={
+                'verbose_name': 'Membre de segment',
+                'verbose_name_plural': 'Membres de segment',
+                'db_table': 'segment_members',
+                'unique_together': {('segment', 'member')},
+            },
+        ),
+        migrations.RunPython(create_mailing_lists, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0008_segments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsletterStatistic',
+            fields=[
+                ('newsletter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistic', serialize=False, to='communications.newsletter', verbose_name='Infolettre')),
+                ('opens', models.PositiveIntegerField(default=0, verbose_name='Ouvertures')),
+                ('unique_opens', models.PositiveIntegerField(default=0, verbose_name='Destinataires ayant ouvert')),
+                ('clicks', models.PositiveIntegerField(default=0, verbose_name='Clics')),
+                ('unique_clicks', models.PositiveIntegerField(default=0, verbose_name='Destinataires ayant cliqué')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': "Statistique d'infolettre",
+                'verbose_name_plural': "Statistiques d'infolettre",
+                'db_table': 'newsletter_statistics',
+            },
+        ),
+        migrations.CreateModel(
+            name='NewsletterLink',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('url', models.URLField(max_length=2000, verbose_name='Adresse')),
+                ('clicks', models.PositiveIntegerField(default=0, verbose_name='Clics')),
+                ('unique_clicks', models.PositiveIntegerField(default=0, verbose_name='Destinataires ayant cliqué')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('newsletter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='links', to='communications.newsletter', verbose_name='Infolettre')),
+            ],
+            options={
+                'verbose_name': "Lien d'infolettre",
+                'verbose_name_plural': "Liens d'infolettre",
+                'db_table': 'newsletter_links',
+                'unique_together': {('newsletter', 'url')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0009_newsletter_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsletterdelivery',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name="Réservé jusqu'au"),
+        ),
+    ]
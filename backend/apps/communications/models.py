@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 from apps.members.models import Member
 
 
@@ -66,13 +67,92 @@ class CalendarEvent(models.Model):
         return self.title
 
 
+class NewsletterTemplate(models.Model):
+    """Gabarits d'infolettre, see apps.communications.rendering."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    key = models.SlugField(max_length=100, unique=True, verbose_name="Identifiant")
+    name = models.CharField(max_length=255, verbose_name="Nom")
+    html_body = models.TextField(verbose_name="Gabarit HTML", help_text="Le contenu de l'infolettre s'insère à {{ content }}.")
+    text_body = models.TextField(blank=True, verbose_name="Gabarit texte", help_text="Par défaut, le gabarit HTML sans balises.")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'newsletter_templates'
+        verbose_name = 'Gabarit d\'infolettre'
+        verbose_name_plural = 'Gabarits d\'infolettre'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        from .rendering import check_syntax
+
+        check_syntax(html_body=self.html_body, text_body=self.text_body)
+
+
+class Segment(models.Model):
+    """Audiences ciblées, see apps.communications.segments."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255, verbose_name="Nom")
+    description = models.TextField(blank=True, verbose_name="Description")
+    rules = models.JSONField(default=dict, blank=True, verbose_name="Critères")
+    one_per_household = models.BooleanField(default=False, verbose_name="Un membre par foyer")
+    # Materialized in SegmentMember, see apps.communications.segments.
+    member_count = models.IntegerField(default=0, editable=False, verbose_name="Nombre de membres")
+    refreshed_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Actualisé le")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'segments'
+        verbose_name = 'Segment'
+        verbose_name_plural = 'Segments'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        from .segments import compile_rules
+
+        compile_rules(self.rules)
+
+
+class SegmentMember(models.Model):
+    """Membre d'un segment, see apps.communications.segments."""
+
+    id = models.BigAutoField(primary_key=True)
+    segment = models.ForeignKey(Segment, on_delete=models.CASCADE, related_name='memberships', verbose_name="Segment")
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='segment_memberships', verbose_name="Membre")
+
+    class Meta:
+        db_table = 'segment_members'
+        verbose_name = 'Membre de segment'
+        verbose_name_plural = 'Membres de segment'
+        unique_together = ['segment', 'member']
+
+
 class Newsletter(models.Model):
     """Infolettres intégrées."""
+
+    class Status(models.TextChoices):
+        DRAFT = 'DRAFT', 'Brouillon'
+        SENDING = 'SENDING', 'En cours d\'envoi'
+        SENT = 'SENT', 'Envoyée'
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     subject = models.CharField(max_length=255, verbose_name="Sujet")
     content = models.TextField(verbose_name="Contenu (HTML/Texte)")
     template_id = models.CharField(max_length=100, blank=True, verbose_name="ID Modèle")
+    segment = models.ForeignKey(
+        Segment, on_delete=models.PROTECT, null=True, blank=True, related_name='newsletters',
+        verbose_name="Segment", help_text="Par défaut, tous les membres actifs.",
+    )
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.DRAFT, editable=False, verbose_name="Statut")
+    sending_started_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Envoi commencé le")
     sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Envoyé le")
     recipient_count = models.IntegerField(default=0, verbose_name="Nombre de destinataires")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -86,6 +166,71 @@ class Newsletter(models.Model):
         return self.subject
 
 
+class NewsletterDelivery(models.Model):
+    """Envoi d'une infolettre à un membre, see apps.communications.delivery."""
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'En attente'
+        SENT = 'SENT', 'Envoyé'
+        FAILED = 'FAILED', 'Échoué'
+
+    id = models.BigAutoField(primary_key=True)
+    newsletter = models.ForeignKey(Newsletter, on_delete=models.CASCADE, related_name='deliveries', verbose_name="Infolettre")
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='newsletter_deliveries', verbose_name="Membre")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING, verbose_name="Statut")
+    attempted_at = models.DateTimeField(null=True, blank=True, verbose_name="Tenté le")
+    error_message = models.TextField(blank=True, verbose_name="Message d'erreur")
+    # Lease of the worker sending it, see apps.communications.delivery.
+    claimed_until = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Réservé jusqu'au")
+
+    class Meta:
+        db_table = 'newsletter_deliveries'
+        verbose_name = 'Envoi d\'infolettre'
+        verbose_name_plural = 'Envois d\'infolettre'
+        unique_together = ['newsletter', 'member']
+        indexes = [
+            models.Index(fields=['newsletter', 'status', 'id'], name='newsletter_deliveries_todo_idx'),
+        ]
+
+
+class NewsletterStatistic(models.Model):
+    """Ouvertures et clics d'une infolettre, see apps.communications.tracking."""
+
+    newsletter = models.OneToOneField(
+        Newsletter, on_delete=models.CASCADE, primary_key=True, related_name='statistic', verbose_name="Infolettre",
+    )
+    opens = models.PositiveIntegerField(default=0, verbose_name="Ouvertures")
+    unique_opens = models.PositiveIntegerField(default=0, verbose_name="Destinataires ayant ouvert")
+    clicks = models.PositiveIntegerField(default=0, verbose_name="Clics")
+    unique_clicks = models.PositiveIntegerField(default=0, verbose_name="Destinataires ayant cliqué")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'newsletter_statistics'
+        verbose_name = 'Statistique d\'infolettre'
+        verbose_name_plural = 'Statistiques d\'infolettre'
+
+
+class NewsletterLink(models.Model):
+    """Lien suivi d'une infolettre et ses clics, see apps.communications.tracking."""
+
+    id = models.BigAutoField(primary_key=True)
+    newsletter = models.ForeignKey(Newsletter, on_delete=models.CASCADE, related_name='links', verbose_name="Infolettre")
+    url = models.URLField(max_length=2000, verbose_name="Adresse")
+    clicks = models.PositiveIntegerField(default=0, verbose_name="Clics")
+    unique_clicks = models.PositiveIntegerField(default=0, verbose_name="Destinataires ayant cliqué")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'newsletter_links'
+        verbose_name = 'Lien d\'infolettre'
+        verbose_name_plural = 'Liens d\'infolettre'
+        unique_together = ['newsletter', 'url']
+
+    def __str__(self):
+        return self.url
+
+
 class Notification(models.Model):
     """Notifications envoyées aux membres."""
     
@@ -107,9 +252,20 @@ class Notification(models.Model):
     status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING, verbose_name="Statut")
     sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Envoyé le")
     error_message = models.TextField(blank=True, verbose_name="Message d'erreur")
+    # Outbox state, see apps.communications.outbox.
+    attempts = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Tentatives")
+    next_attempt_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Prochaine tentative")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'notifications'
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
         ordering = ['-sent_at', '-id']
+        indexes = [
+            models.Index(fields=['member', 'created_at', 'id']),
+            models.Index(
+                fields=['next_attempt_at', 'id'], condition=models.Q(status='PENDING'), name='notifications_due_idx',
+            ),
+        ]
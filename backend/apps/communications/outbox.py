@@ -0,0 +1,192 @@
+"""
+Notification outbox.
+
+Producers write PENDING Notification rows in their own transaction,
+usually many at once through enqueue() (or enqueue_segment() for a whole
+audience segment), which wakes a dispatcher once they are committed;
+nothing is sent from the request or per message.
+
+Dispatchers (tasks.dispatch_notifications, any number at once) claim
+batches of due rows with SELECT ... FOR UPDATE SKIP LOCKED, push their
+`next_attempt_at` one LEASE ahead and commit, so the claim holds while
+they send without keeping a transaction open. Each batch is sent per
+channel over one provider connection (an SMTP connection for emails,
+the process-wide Twilio client for SMS, see core.sms), within the
+provider's rate limit. A failed notification is tried again after an
+exponential backoff, up to MAX_ATTEMPTS; one whose dispatcher died is
+claimed again once its lease runs out.
+"""
+import time
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core import ratelimit, sms
+from core.cache import invalidate_model_cache
+from . import delivery
+from .models import Notification
+
+LEASE = timedelta(minutes=5)
+MAX_ATTEMPTS = 6
+BATCH_SIZE = 100
+
+
+def backoff(attempts: int) -> timedelta:
+    """Delay before the next try of a notification that failed `attempts` times."""
+    return timedelta(seconds=min(60 * 2 ** (attempts - 1), 6 * 3600))
+
+
+def enqueue(notifications):
+    """Insert PENDING notifications and wake a dispatcher once committed."""
+    from .tasks import dispatch_notifications
+
+    created = Notification.objects.bulk_create(notifications, batch_size=1000)
+    if created:
+        transaction.on_commit(dispatch_notifications.delay)
+    return created
+
+
+def enqueue_segment(segment, channel, subject, content):
+    """Queue the same notification for every member of `segment`, refreshed first. Returns how many."""
+    from .segments import members, refresh
+
+    refresh(segment)
+
+    count = 0
+    batch = []
+    for pk in members(segment).order_by().values_list('pk', flat=True).iterator(chunk_size=BATCH_SIZE):
+        batch.append(Notification(member_id=pk, channel=channel, subject=subject, content=content))
+        if len(batch) >= BATCH_SIZE:
+            count += len(enqueue(batch))
+            batch = []
+    return count + len(enqueue(batch))
+
+
+def due():
+    """Pending notifications to send now, on the channels there is a sender for (PUSH has none yet)."""
+    return Notification.objects.filter(
+        status=Notification.Status.PENDING, next_attempt_at__lte=timezone.now(), channel__in=list(SENDERS),
+    )
+
+
+def claim(batch_size=BATCH_SIZE, ids=None):
+    """Lease up to `batch_size` due notifications (of `ids` if given) to this dispatcher."""
+    queryset = due() if ids is None else due().filter(pk__in=ids)
+    with transaction.atomic():
+        batch = list(
+            queryset.select_for_update(skip_locked=True, of=('self',))
+            .select_related('member')
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if batch:
+            now = timezone.now()
+            # updated_at too: update() skips auto_now, and the list ETag depends on it.
+            Notification.objects.filter(pk__in=[n.pk for n in batch]).update(
+                attempts=F('attempts') + 1, next_attempt_at=now + LEASE, updated_at=now,
+            )
+    for notification in batch:
+        notification.attempts += 1
+        notification.updated_at = now
+    return batch
+
+
+def dispatch(batch_size=BATCH_SIZE, time_budget=None):
+    """
+    Send due notifications until none is left, or for `time_budget`
+    seconds. Returns `(sent, done)`, `done` False if stopped by the budget.
+    """
+    deadline = time.monotonic() + time_budget if time_budget else None
+    sent = 0
+    while batch := claim(batch_size):
+        sent += send_batch(batch)
+        if deadline and time.monotonic() >= deadline:
+            return sent, False
+    return sent, True
+
+
+def send_batch(notifications):
+    """Send claimed notifications and record the outcomes. Returns the number sent."""
+    for channel, group in groupby(sorted(notifications, key=lambda n: n.channel), key=lambda n: n.channel):
+        SENDERS[channel](list(group))
+    now = timezone.now()
+    for notification in notifications:
+        notification.updated_at = now
+    Notification.objects.bulk_update(
+        notifications, ['status', 'sent_at', 'error_message', 'next_attempt_at', 'updated_at'],
+    )
+    # bulk_update() sends no signals.
+    invalidate_model_cache(Notification)
+    return sum(n.status == Notification.Status.SENT for n in notifications)
+
+
+def _sent(notification):
+    notification.status = Notification.Status.SENT
+    notification.sent_at = timezone.now()
+    notification.error_message = ''
+
+
+def _failed(notification, error, retry=True):
+    notification.error_message = str(error) or type(error).__name__
+    if retry and notification.attempts < MAX_ATTEMPTS:
+        notification.next_attempt_at = timezone.now() + backoff(notification.attempts)
+    else:
+        notification.status = Notification.Status.FAILED
+
+
+def _send_emails(notifications):
+    connection = get_connection()
+    try:
+        connection.open()
+    except delivery.PROVIDER_ERRORS as exc:
+        # No connection: the whole batch is tried again later.
+        for notification in notifications:
+            _failed(notification, exc)
+        return
+    try:
+        for notification in notifications:
+            if not notification.member.email:
+                _failed(notification, 'Aucune adresse courriel.', retry=False)
+                continue
+            ratelimit.wait(delivery.provider_name(), settings.EMAIL_RATE_LIMIT)
+            message = EmailMessage(
+                subject=notification.subject,
+                body=notification.content,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[notification.member.email],
+            )
+            try:
+                connection.send_messages([message])
+            except delivery.RECIPIENT_ERRORS as exc:
+                _failed(notification, exc, retry=False)
+            except delivery.PROVIDER_ERRORS as exc:
+                _failed(notification, exc)
+            else:
+                _sent(notification)
+    finally:
+        connection.close()
+
+
+def _send_sms(notifications):
+    backend = sms.get_backend()
+    for notification in notifications:
+        if not notification.member.phone:
+            _failed(notification, 'Aucun numéro de téléphone.', retry=False)
+            continue
+        ratelimit.wait(f'sms:{settings.SMS_BACKEND}', settings.SMS_RATE_LIMIT)
+        try:
+            backend.send(notification.member.phone, notification.content)
+        except Exception as exc:
+            _failed(notification, exc)
+        else:
+            _sent(notification)
+
+
+SENDERS = {
+    Notification.Channel.EMAIL: _send_emails,
+    Notification.Channel.SMS: _send_sms,
+}
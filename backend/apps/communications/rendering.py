@@ -0,0 +1,154 @@
+"""
+Newsletter rendering.
+
+A newsletter's subject and content, and the layout named by its
+`template_id` (a NewsletterTemplate key, the content going in at
+`{{ content }}`), are Django templates with per-recipient merge fields:
+
+    {{ first_name }}, {{ last_name }}, {{ language }} ('fr', 'en', 'ar'),
+    {{ household }}        first names of the other members of the household,
+    {{ my_events }}        upcoming events the member registered to,
+    {{ upcoming_events }}  the next open events (the same for everyone).
+
+Sources are parsed once per process and kept compiled (compile_source()
+is keyed on the source itself, so an edited newsletter or layout is
+simply a new entry), and a renderer pushes each recipient's fields onto
+one Context, so sending renders nodes already parsed instead of parsing
+a template per recipient. Every message gets an HTML part and a text
+part, the latter from the layout's text template or else the HTML with
+the tags stripped. prepare() fetches the merge data of a whole chunk of
+recipients up front, and only what the templates use.
+"""
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+from django.core.exceptions import ValidationError
+from django.template import Context, Engine, TemplateSyntaxError
+from django.utils import timezone
+from django.utils.html import strip_tags
+from django.utils.safestring import mark_safe
+
+from .models import NewsletterTemplate
+
+UPCOMING_EVENTS = 5
+LAYOUT_FALLBACK = '{{ content }}'
+HTML_TAG = re.compile(r'<[a-zA-Z][^>]*>')
+
+
+@lru_cache(maxsize=128)
+def compile_source(source):
+    """Parse a template source, once per process."""
+    return Engine.get_default().from_string(source)
+
+
+def _html_source(content):
+    # Plain-text content gets its paragraphs and line breaks in HTML.
+    if HTML_TAG.search(content):
+        return content
+    return '{% filter linebreaks %}' + content + '{% endfilter %}'
+
+
+def _text_source(html):
+    return strip_tags(html) if HTML_TAG.search(html) else html
+
+
+def check_syntax(**sources):
+    """Raise ValidationError, keyed by field, for the sources that do not compile."""
+    errors = {}
+    for field, source in sources.items():
+        try:
+            compile_source(source or '')
+        except TemplateSyntaxError as exc:
+            errors[field] = f'Gabarit invalide : {exc}'
+    if errors:
+        raise ValidationError(errors)
+
+
+class NewsletterRenderer:
+    """Renders one newsletter for many recipients, see the module docstring."""
+
+    def __init__(self, newsletter):
+        layout = NewsletterTemplate.objects.get(key=newsletter.template_id) if newsletter.template_id else None
+        layout_html = layout.html_body if layout else LAYOUT_FALLBACK
+        layout_text = (layout.text_body or _text_source(layout.html_body)) if layout else LAYOUT_FALLBACK
+        sources = {
+            'subject': newsletter.subject,
+            'html': _html_source(newsletter.content),
+            'text': _text_source(newsletter.content),
+            'layout_html': layout_html,
+            'layout_text': layout_text,
+        }
+        self.templates = {name: compile_source(source) for name, source in sources.items()}
+        used = ' '.join(sources.values())
+        self.uses = {field for field in ('household', 'my_events', 'upcoming_events') if field in used}
+        self.households = {}
+        self.events = {}
+        common = {}
+        if 'upcoming_events' in self.uses:
+            common['upcoming_events'] = upcoming_events()
+        self.html_context = Context(common)
+        self.text_context = Context(common, autoescape=False)
+
+    def prepare(self, members):
+        """Fetch the merge data of `members` in one query per field used."""
+        from apps.events.models import EventRegistration
+        from apps.members.models import Member
+
+        if 'household' in self.uses:
+            households = {m.household_id for m in members if m.household_id and m.household_id not in self.households}
+            names = defaultdict(list)
+            for household, pk, first_name in (
+                Member.objects.filter(household_id__in=households).order_by('first_name')
+                .values_list('household_id', 'pk', 'first_name')
+            ):
+                names[household].append((pk, first_name))
+            self.households.update({household: names[household] for household in households})
+        if 'my_events' in self.uses:
+            pks = [m.pk for m in members if m.pk not in self.events]
+            self.events.update({pk: [] for pk in pks})
+            for member_id, title, start, location in (
+                EventRegistration.objects.filter(
+                    member__in=pks, status=EventRegistration.Status.REGISTERED, event__start_date__gte=timezone.now(),
+                ).order_by('event__start_date').values_list('member_id', 'event__title', 'event__start_date', 'event__location')
+            ):
+                self.events[member_id].append({'title': title, 'start_date': start, 'location': location})
+
+    def merge_fields(self, member):
+        fields = {
+            'first_name': member.first_name,
+            'last_name': member.last_name,
+            'language': member.preferred_language,
+        }
+        if 'household' in self.uses:
+            if member.household_id not in self.households:
+                self.prepare([member])
+            fields['household'] = [
+                name for pk, name in self.households.get(member.household_id, ()) if pk != member.pk
+            ]
+        if 'my_events' in self.uses:
+            if member.pk not in self.events:
+                self.prepare([member])
+            fields['my_events'] = self.events[member.pk]
+        return fields
+
+    def render(self, member):
+        """`(subject, text, html)` of the newsletter for `member`."""
+        fields = self.merge_fields(member)
+        with self.text_context.push(fields):
+            subject = ' '.join(self.templates['subject'].render(self.text_context).split())
+            with self.text_context.push(content=self.templates['text'].render(self.text_context)):
+                text = self.templates['layout_text'].render(self.text_context)
+        with self.html_context.push(fields):
+            with self.html_context.push(content=mark_safe(self.templates['html'].render(self.html_context))):
+                html = self.templates['layout_html'].render(self.html_context)
+        return subject, text, html
+
+
+def upcoming_events(limit=UPCOMING_EVENTS):
+    from apps.events.models import Event
+
+    return list(
+        Event.objects.filter(status=Event.Status.OPEN, start_date__gte=timezone.now())
+        .order_by('start_date').values('title', 'start_date', 'location')[:limit]
+    )
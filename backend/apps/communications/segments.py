@@ -0,0 +1,281 @@
+"""
+Audience segments.
+
+A Segment's `rules` declare whom it targets, every criterion applying:
+
+    {"sex": "F"}                          Member.Sex value(s)
+    {"status": ["ACTIVE", "PENDING"]}     Member.Status value(s), ACTIVE if not given
+    {"language": "ar"}                    Member.Language value(s)
+    {"postal_code": ["H1A", "H2"]}        postal code prefix(es)
+    {"enrolled": {"course": "<id>"}}      parent of a student (of that course)
+    {"attended": {"event": "<id>", "since": 365}}
+                                          checked in at an event (that one,
+                                          started in the last 365 days or
+                                          since an ISO date)
+    {"donated": {"since": "2026-01-01", "min_total": "100", "campaign": "<id>"}}
+                                          completed donations (totalling at
+                                          least min_total)
+
+`enrolled`, `attended` and `donated` also take true (any) or false (none).
+compile_rules() turns them into one filter over Member, relations as
+EXISTS subqueries, so a segment is a single SQL query whatever it
+combines. Anonymized members are never part of a segment.
+
+The members of each segment are materialized in SegmentMember, with
+`member_count`, so sending to a segment or counting it reads an indexed
+set. refresh() writes only the rows that changed. Saving a member, a
+student, an event registration or a donation re-evaluates every segment
+for that member alone, on commit through a task (queue_refresh()); bulk
+updates send no signals and should call queue_refresh() themselves.
+Household changes and criteria relative to today drift without any save,
+so every segment is also fully refreshed nightly.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q, Sum, Value
+from django.db.models.functions import Replace, Upper
+from django.db.models.lookups import StartsWith
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.education.models import Student
+from apps.events.models import EventRegistration
+from apps.finance.models import Donation
+from apps.members.households import one_per_household
+from apps.members.models import Member
+from apps.members.skills import normalize_postal_code
+from core.cache import get_generation, invalidate_model_cache
+from .models import Segment, SegmentMember
+
+BATCH_SIZE = 1000
+# Member fields the rules can depend on; saves touching none of them are ignored.
+RULE_FIELDS = {'sex', 'status', 'preferred_language', 'postal_code', 'anonymized_at', 'household_id'}
+ANY_SEGMENT_KEY = 'segments:any:{generation}'
+
+
+def _choices(value, choices):
+    values = value if isinstance(value, list) else [value]
+    if not values or any(v not in choices for v in values):
+        raise ValueError(f'Valeurs possibles : {", ".join(choices)}.')
+    return values
+
+
+def _options(value, allowed):
+    """The options of a relation criterion; None for `false`."""
+    if value is True:
+        return {}
+    if value is False:
+        return None
+    if not isinstance(value, dict) or set(value) - set(allowed):
+        raise ValueError(f'true, false ou un objet avec : {", ".join(allowed)}.')
+    return value
+
+
+def _since(value):
+    """A number of days back, or an ISO date."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return timezone.now() - timedelta(days=value)
+    date = parse_date(value) if isinstance(value, str) else None
+    if date is None:
+        raise ValueError('"since" : un nombre de jours ou une date AAAA-MM-JJ.')
+    return date
+
+
+def _related(value, queryset):
+    exists = Exists(queryset)
+    return Q(exists) if value is not False else ~Q(exists)
+
+
+def sex(value):
+    return Q(sex__in=_choices(value, Member.Sex.values))
+
+
+def status(value):
+    return Q(status__in=_choices(value, Member.Status.values))
+
+
+def language(value):
+    return Q(preferred_language__in=_choices(value, Member.Language.values))
+
+
+def postal_code(value):
+    prefixes = [normalize_postal_code(prefix) for prefix in (value if isinstance(value, list) else [value])]
+    if not prefixes or not all(prefixes):
+        raise ValueError('Un ou plusieurs débuts de code postal.')
+    code = Upper(Replace('postal_code', Value(' '), Value('')))
+    q = Q()
+    for prefix in prefixes:
+        q |= Q(StartsWith(code, prefix))
+    return q
+
+
+def enrolled(value):
+    options = _options(value, ['course'])
+    students = Student.objects.filter(parent_member=OuterRef('pk'))
+    if options and 'course' in options:
+        students = students.filter(course_id=options['course'])
+    return _related(value, students)
+
+
+def attended(value):
+    options = _options(value, ['event', 'since'])
+    registrations = EventRegistration.objects.filter(
+        member=OuterRef('pk'), status=EventRegistration.Status.CHECKED_IN,
+    )
+    if options and 'event' in options:
+        registrations = registrations.filter(event_id=options['event'])
+    if options and 'since' in options:
+        registrations = registrations.filter(event__start_date__gte=_since(options['since']))
+    return _related(value, registrations)
+
+
+def donated(value):
+    options = _options(value, ['since', 'campaign', 'min_total'])
+    donations = Donation.objects.filter(member=OuterRef('pk'), status=Donation.Status.COMPLETED)
+    if options and 'since' in options:
+        donations = donations.filter(donated_at__gte=_since(options['since']))
+    if options and 'campaign' in options:
+        donations = donations.filter(campaign_id=options['campaign'])
+    if options and 'min_total' in options:
+        donations = (
+            donations.order_by().values('member')
+            .annotate(total=Sum('amount')).filter(total__gte=options['min_total'])
+        )
+    return _related(value, donations)
+
+
+CRITERIA = {
+    'sex': sex,
+    'status': status,
+    'language': language,
+    'postal_code': postal_code,
+    'enrolled': enrolled,
+    'attended': attended,
+    'donated': donated,
+}
+
+
+def compile_rules(rules):
+    """The filter over Member for `rules`; raises ValidationError, keyed by criterion, if invalid."""
+    if not isinstance(rules, dict):
+        raise ValidationError('Les critères doivent être un objet.')
+    q = Q(anonymized_at__isnull=True)
+    if 'status' not in rules:
+        q &= Q(status=Member.Status.ACTIVE)
+    errors = {}
+    for name, value in rules.items():
+        if name not in CRITERIA:
+            errors[name] = 'Critère inconnu.'
+            continue
+        try:
+            q &= CRITERIA[name](value)
+        except ValueError as exc:
+            errors[name] = str(exc)
+    if errors:
+        raise ValidationError(errors)
+    return q
+
+
+def evaluate(segment, member_ids=None):
+    """The members matching `segment` now (among `member_ids` if given), in one query."""
+    queryset = Member.objects.filter(compile_rules(segment.rules))
+    if member_ids is not None:
+        queryset = queryset.filter(pk__in=member_ids)
+    if segment.one_per_household:
+        queryset = one_per_household(queryset)
+    return queryset
+
+
+def members(segment):
+    """The materialized members of `segment`."""
+    return Member.objects.filter(segment_memberships__segment=segment)
+
+
+def refresh(segment, member_ids=None):
+    """
+    Bring the materialized members of `segment` up to date, only for
+    `member_ids` (with their whole households) if given. Returns the
+    number of rows added and removed.
+    """
+    stored = SegmentMember.objects.filter(segment=segment)
+    with transaction.atomic():
+        wanted = set(evaluate(segment, member_ids).values_list('pk', flat=True))
+        if member_ids is not None:
+            stored = stored.filter(member_id__in=member_ids)
+        current = set(stored.values_list('member_id', flat=True))
+        added, removed = wanted - current, current - wanted
+        SegmentMember.objects.bulk_create(
+            [SegmentMember(segment=segment, member_id=pk) for pk in added],
+            batch_size=BATCH_SIZE, ignore_conflicts=True,
+        )
+        removed_list = list(removed)
+        for start in range(0, len(removed_list), BATCH_SIZE):
+            stored.filter(member_id__in=removed_list[start:start + BATCH_SIZE]).delete()
+
+        segment.refreshed_at = timezone.now()
+        if member_ids is None:
+            segment.member_count = len(wanted)
+            Segment.objects.filter(pk=segment.pk).update(
+                member_count=segment.member_count, refreshed_at=segment.refreshed_at,
+            )
+        elif added or removed:
+            Segment.objects.filter(pk=segment.pk).update(
+                member_count=F('member_count') + len(added) - len(removed), refreshed_at=segment.refreshed_at,
+            )
+            segment.member_count += len(added) - len(removed)
+    # update() sends no signals.
+    invalidate_model_cache(Segment)
+    return len(added) + len(removed)
+
+
+def refresh_members(member_ids):
+    """Re-evaluate every segment for `member_ids`. Returns the number of rows changed."""
+    member_ids = set(member_ids)
+    households = Member.objects.filter(pk__in=member_ids, household_id__isnull=False).values('household_id')
+    # One per household depends on the rest of the household.
+    member_ids |= set(Member.objects.filter(household_id__in=households).values_list('pk', flat=True))
+    return sum(refresh(segment, member_ids) for segment in Segment.objects.all())
+
+
+def refresh_all():
+    return sum(refresh(segment) for segment in Segment.objects.all())
+
+
+def any_segment():
+    """Whether any segment exists, cached until segments change."""
+    key = ANY_SEGMENT_KEY.format(generation=get_generation(Segment))
+    return cache.get_or_set(key, Segment.objects.exists, 3600)
+
+
+def queue_refresh(member_ids):
+    """Re-evaluate the segments of `member_ids` in the background once committed."""
+    from .tasks import refresh_segment_members
+
+    member_ids = [str(pk) for pk in member_ids if pk]
+    if member_ids and any_segment():
+        transaction.on_commit(lambda: refresh_segment_members.delay(member_ids))
+
+
+# Signal receivers, connected in CommunicationsConfig.ready().
+
+def member_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not RULE_FIELDS & set(update_fields)):
+        return
+    queue_refresh([instance.pk])
+
+
+def related_saved(sender, instance, raw=False, **kwargs):
+    """post_save / post_delete of a Student, EventRegistration or Donation."""
+    if raw:
+        return
+    queue_refresh([getattr(instance, 'parent_member_id', None) or getattr(instance, 'member_id', None)])
+
+
+def member_deleted(sender, instance, **kwargs):
+    """pre_delete: its SegmentMember rows go by cascade, take it out of the counts."""
+    segments = SegmentMember.objects.filter(member=instance).values('segment')
+    if Segment.objects.filter(pk__in=segments).update(member_count=F('member_count') - 1):
+        invalidate_model_cache(Segment)
@@ -1,5 +1,11 @@
 from rest_framework import serializers
-from .models import Announcement, CalendarEvent, Newsletter, Notification
+from django.core.exceptions import ValidationError as DjangoValidationError
+from .models import (
+    Announcement, CalendarEvent, Newsletter, NewsletterLink, NewsletterStatistic, NewsletterTemplate, Notification,
+    Segment,
+)
+from .rendering import check_syntax
+from .segments import compile_rules
 
 
 class AnnouncementSerializer(serializers.ModelSerializer):
@@ -14,11 +20,63 @@ class CalendarEventSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class SegmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Segment
+        fields = '__all__'
+
+    def validate_rules(self, value):
+        try:
+            compile_rules(value)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.message_dict if hasattr(exc, 'error_dict') else exc.messages)
+        return value
+
+
+class SegmentNotifySerializer(serializers.Serializer):
+    """Input of SegmentViewSet.notify."""
+    channel = serializers.ChoiceField(choices=[Notification.Channel.EMAIL, Notification.Channel.SMS])
+    subject = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    content = serializers.CharField()
+
+
 class NewsletterSerializer(serializers.ModelSerializer):
     class Meta:
         model = Newsletter
         fields = '__all__'
 
+    def validate(self, attrs):
+        template_id = attrs.get('template_id', getattr(self.instance, 'template_id', ''))
+        if template_id and not NewsletterTemplate.objects.filter(key=template_id).exists():
+            raise serializers.ValidationError({'template_id': 'Gabarit inconnu.'})
+        try:
+            check_syntax(**{field: attrs[field] for field in ('subject', 'content') if field in attrs})
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.message_dict)
+        return attrs
+
+
+class NewsletterPreviewSerializer(serializers.Serializer):
+    """Output of NewsletterViewSet.preview."""
+    subject = serializers.CharField()
+    text = serializers.CharField()
+    html = serializers.CharField()
+
+
+class NewsletterStatisticSerializer(serializers.ModelSerializer):
+    """Output of NewsletterViewSet.stats: the aggregates only."""
+    recipient_count = serializers.IntegerField(source='newsletter.recipient_count')
+
+    class Meta:
+        model = NewsletterStatistic
+        fields = ['recipient_count', 'opens', 'unique_opens', 'clicks', 'unique_clicks', 'updated_at']
+
+
+class NewsletterLinkSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = NewsletterLink
+        fields = ['id', 'url', 'clicks', 'unique_clicks']
+
 
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
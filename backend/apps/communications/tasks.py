@@ -1,52 +1,66 @@
 from celery import shared_task
-from django.core.mail import send_mail
 from django.conf import settings
-from django.utils import timezone
-from .models import Notification, Newsletter
-from apps.members.models import Member
+from . import delivery, outbox, segments, tracking
+from .models import Newsletter, Segment
 
 
 @shared_task
 def send_notification_email(notification_id):
-    """Send an email notification."""
-    try:
-        notification = Notification.objects.get(id=notification_id)
-        send_mail(
-            subject=notification.subject,
-            message=notification.content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[notification.member.email],
-            fail_silently=False,
-        )
-        notification.status = Notification.Status.SENT
-        notification.sent_at = timezone.now()
-        notification.save()
-    except Exception as e:
-        notification.status = Notification.Status.FAILED
-        notification.error_message = str(e)
-        notification.save()
+    """Send one notification right away through the outbox (no-op if it is gone or not due)."""
+    return outbox.send_batch(outbox.claim(ids=[notification_id]))
+
+
+@shared_task
+def dispatch_notifications():
+    """Outbox dispatcher: woken by producers and every minute by beat; queues itself again until done."""
+    sent, done = outbox.dispatch(time_budget=settings.NOTIFICATION_DISPATCH_TIME_BUDGET)
+    if not done:
+        dispatch_notifications.delay()
+    return sent
 
 
 @shared_task
 def send_bulk_newsletter(newsletter_id):
-    """Send a newsletter to all active members."""
-    from apps.members.models import Member
-    
+    """Start or resume sending a newsletter, see apps.communications.delivery."""
     newsletter = Newsletter.objects.get(id=newsletter_id)
-    active_members = Member.objects.filter(status='ACTIVE')
-    
-    count = 0
-    for member in active_members:
-        # In a real app, use a proper email service with batching
-        send_mail(
-            subject=newsletter.subject,
-            message=newsletter.content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[member.email],
-            fail_silently=True,
-        )
-        count += 1
-    
-    newsletter.sent_at = timezone.now()
-    newsletter.recipient_count = count
-    newsletter.save()
+    return delivery.send(newsletter)
+
+
+@shared_task(bind=True, max_retries=8)
+def deliver_newsletter_chunk(self, newsletter_id, first_id, last_id):
+    """Send one chunk of a newsletter over one connection."""
+    try:
+        return delivery.send_chunk(newsletter_id, first_id, last_id)
+    except delivery.ProviderError as exc:
+        raise self.retry(exc=exc, countdown=delivery.backoff(self.request.retries))
+
+
+@shared_task
+def resume_newsletter_deliveries():
+    """Periodic: pick up newsletter sends that stopped making progress."""
+    return delivery.resume_stalled()
+
+
+@shared_task
+def refresh_segment(segment_id):
+    """Materialize a segment's members, after it is created or its rules change."""
+    segment = Segment.objects.filter(pk=segment_id).first()
+    return segments.refresh(segment) if segment else 0
+
+
+@shared_task
+def refresh_segment_members(member_ids):
+    """Re-evaluate every segment for members whose data changed."""
+    return segments.refresh_members(member_ids)
+
+
+@shared_task
+def refresh_segments():
+    """Nightly: recompute every segment in full (drift from bulk updates, dates)."""
+    return segments.refresh_all()
+
+
+@shared_task
+def flush_newsletter_tracking():
+    """Periodic: store the buffered newsletter opens and clicks in the aggregates."""
+    return tracking.flush()
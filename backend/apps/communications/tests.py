@@ -1,9 +1,25 @@
-from django.test import TestCase
+import re
+import smtplib
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.core.exceptions import ValidationError
+from django.core.mail.backends import locmem
+from django.test import TestCase, override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.utils import timezone
 from datetime import timedelta
-from .models import Announcement, CalendarEvent, Newsletter
+from core import counters, ratelimit, sms
+from . import delivery, outbox, segments, tracking
+from .models import (
+    Announcement, CalendarEvent, Newsletter, NewsletterDelivery, NewsletterLink, NewsletterStatistic, NewsletterTemplate,
+    Notification, Segment,
+)
+from .rendering import NewsletterRenderer, compile_source
+from .tasks import refresh_segment_members, send_notification_email
 from apps.members.models import Member
 
 
@@ -104,3 +120,495 @@ class CommunicationsAPITest(APITestCase):
             'status': 'PUBLISHED'
         })
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class AnnouncementCacheTest(APITestCase):
+    """Test the announcement response cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.announcement = Announcement.objects.create(
+            title='Prière du vendredi',
+            content='Horaire',
+            status='PUBLISHED'
+        )
+
+    def test_anonymous_list_served_from_cache(self):
+        """Test a repeated anonymous GET does not hit the database."""
+        self.client.get('/api/communications/announcements/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/communications/announcements/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_save_invalidates_cache(self):
+        """Test saving an announcement drops the cached list."""
+        self.client.get('/api/communications/announcements/')
+        self.announcement.title = 'Prière du vendredi - modifié'
+        self.announcement.save()
+        response = self.client.get('/api/communications/announcements/')
+        self.assertEqual(response.data['results'][0]['title'], 'Prière du vendredi - modifié')
+
+    def test_delete_invalidates_cache(self):
+        """Test deleting an announcement drops the cached list."""
+        self.client.get('/api/communications/announcements/')
+        self.announcement.delete()
+        response = self.client.get('/api/communications/announcements/')
+        self.assertEqual(response.data['results'], [])
+
+    def test_cached_list_answers_revalidation(self):
+        """Test a cached list replays its ETag and honours If-None-Match."""
+        etag = self.client.get('/api/communications/announcements/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/communications/announcements/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class FlakyBackend(locmem.EmailBackend):
+    """Refuses one address, and drops the connection once `disconnect_at` messages are out."""
+    refused = 'refused@example.com'
+    disconnect_at = None
+
+    def send_messages(self, messages):
+        if messages[0].to == [self.refused]:
+            raise smtplib.SMTPRecipientsRefused({self.refused: (550, b'No such user')})
+        if len(mail.outbox) == FlakyBackend.disconnect_at:
+            FlakyBackend.disconnect_at = None
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        return super().send_messages(messages)
+
+
+class NewsletterDeliveryTest(TestCase):
+    """Test chunked, resumable newsletter delivery."""
+
+    def setUp(self):
+        cache.clear()
+        for name in ['a', 'b', 'c', 'refused']:
+            Member.objects.create_user(email=f'{name}@example.com', password='x', postal_code='H1A1A1',
+                                       status=Member.Status.ACTIVE)
+        Member.objects.create_user(email='inactive@example.com', password='x', postal_code='H1A1A1',
+                                   status=Member.Status.INACTIVE)
+        self.newsletter = Newsletter.objects.create(subject='Infolettre', content='Bonjour')
+
+    def send(self, chunk_size=2):
+        """Run delivery.send() and return the chunks it queued."""
+        with patch('apps.communications.tasks.deliver_newsletter_chunk.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            delivery.send(self.newsletter, chunk_size=chunk_size)
+        return [call.args for call in delay.call_args_list]
+
+    def test_chunks_share_a_connection(self):
+        """Test each chunk sends over one connection and outcomes are recorded per recipient."""
+        chunks = self.send()
+        self.assertEqual(len(chunks), 2)
+        with patch('apps.communications.delivery.get_connection', wraps=get_connection) as connect:
+            for args in chunks:
+                delivery.send_chunk(*args)
+        self.assertEqual(connect.call_count, 2)
+        self.assertEqual(len(mail.outbox), 4)
+        html, mimetype = mail.outbox[0].alternatives[0]
+        self.assertEqual(mimetype, 'text/html')
+        self.assertRegex(html, r'^<p>Bonjour</p><img src="http://localhost:8000/api/communications/t/o/[^"]+\.gif"')
+
+        self.newsletter.refresh_from_db()
+        self.assertEqual(self.newsletter.status, Newsletter.Status.SENT)
+        self.assertEqual(self.newsletter.recipient_count, 4)
+        self.assertEqual(delivery.progress(self.newsletter), {'PENDING': 0, 'SENT': 4, 'FAILED': 0})
+        self.assertEqual(self.send(), [])
+
+    @override_settings(EMAIL_BACKEND='apps.communications.tests.FlakyBackend')
+    def test_failures_recorded_and_send_resumed(self):
+        """Test a refused recipient fails alone and a lost connection resumes without duplicates."""
+        FlakyBackend.disconnect_at = 2
+        [chunk] = self.send(chunk_size=10)
+        with self.assertRaises(delivery.ProviderError):
+            delivery.send_chunk(*chunk)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertGreater(delivery.progress(self.newsletter)['PENDING'], 0)
+
+        for args in self.send(chunk_size=10):
+            delivery.send_chunk(*args)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(len({message.to[0] for message in mail.outbox}), 3)
+        self.assertEqual(delivery.progress(self.newsletter), {'PENDING': 0, 'SENT': 3, 'FAILED': 1})
+        failed = NewsletterDelivery.objects.get(status=NewsletterDelivery.Status.FAILED)
+        self.assertEqual(failed.member.email, 'refused@example.com')
+        self.assertIn('No such user', failed.error_message)
+        self.newsletter.refresh_from_db()
+        self.assertEqual(self.newsletter.status, Newsletter.Status.SENT)
+
+    def test_outcomes_committed_as_sent(self):
+        """Test an unexpected error keeps what was sent, and the rows are leased while sending."""
+        [chunk] = self.send(chunk_size=10)
+        wait = ratelimit.wait
+        calls = []
+
+        def flaky_wait(*args):
+            calls.append(args)
+            if len(calls) == 3:
+                raise RuntimeError('Cache unavailable')
+            return wait(*args)
+
+        with patch('apps.communications.delivery.ratelimit.wait', side_effect=flaky_wait), \
+                self.assertRaises(RuntimeError):
+            delivery.send_chunk(*chunk)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(delivery.progress(self.newsletter)['SENT'], 2)
+        self.assertFalse(NewsletterDelivery.objects.filter(claimed_until__isnull=False).exists())
+
+        self.assertEqual(len(delivery.claim(self.newsletter, *chunk[1:])), 2)
+        self.assertEqual(delivery.claim(self.newsletter, *chunk[1:]), [])
+        NewsletterDelivery.objects.update(claimed_until=timezone.now() - timedelta(seconds=1))
+        delivery.send_chunk(*chunk)
+        self.assertEqual(len({message.to[0] for message in mail.outbox}), len(mail.outbox))
+
+    def test_send_endpoint(self):
+        """Test admins start a send in the background and follow its progress."""
+        admin = Member.objects.create_superuser(email='admin@example.com', password='x')
+        self.client.force_login(admin)
+        url = f'/api/communications/newsletters/{self.newsletter.pk}/'
+        with patch('apps.communications.views.send_bulk_newsletter.delay') as delay:
+            response = self.client.post(f'{url}send/')
+        self.assertEqual(response.status_code, 202)
+        delay.assert_called_once_with(str(self.newsletter.pk))
+
+        self.send()
+        response = self.client.get(f'{url}progress/')
+        self.assertEqual(response.json(), {
+            'status': 'SENDING', 'deliveries': {'PENDING': 4, 'SENT': 0, 'FAILED': 0},
+        })
+
+
+class FailingSmsBackend(sms.BaseBackend):
+    def send(self, to, body):
+        raise ConnectionError('Gateway unavailable')
+
+
+@override_settings(SMS_BACKEND='core.sms.LocMemBackend', SMS_RATE_LIMIT=0)
+class NotificationOutboxTest(TestCase):
+    """Test the notification outbox and its dispatcher."""
+
+    def setUp(self):
+        cache.clear()
+        sms.outbox.clear()
+        self.emailed = Member.objects.create_user(email='a@example.com', password='x', postal_code='H1A1A1')
+        self.texted = Member.objects.create_user(phone='5145550123', password='x', postal_code='H1A1A1')
+
+    def enqueue(self, member, channel, count=1):
+        with patch('apps.communications.tasks.dispatch_notifications.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            notifications = outbox.enqueue([
+                Notification(member=member, channel=channel, subject='Rappel', content=f'Message {i}')
+                for i in range(count)
+            ])
+        delay.assert_called_once_with()
+        return notifications
+
+    def test_dispatch_sends_each_channel_in_batches(self):
+        """Test a dispatch sends emails over one connection and SMS through the backend."""
+        self.enqueue(self.emailed, Notification.Channel.EMAIL, count=3)
+        self.enqueue(self.texted, Notification.Channel.SMS, count=2)
+        [push] = self.enqueue(self.emailed, Notification.Channel.PUSH)
+
+        with patch('apps.communications.outbox.get_connection', wraps=get_connection) as connect:
+            self.assertEqual(outbox.dispatch(), (5, True))
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual([message.to for message in sms.outbox], ['+15145550123'] * 2)
+        self.assertEqual(Notification.objects.filter(status=Notification.Status.SENT).count(), 5)
+        # No sender for PUSH yet: left pending, not failed.
+        push.refresh_from_db()
+        self.assertEqual((push.status, push.attempts), (Notification.Status.PENDING, 0))
+        self.assertNotIn(push, outbox.due())
+
+    def test_state_changes_invalidate_list_etag(self):
+        """Test claiming and sending move updated_at, so cached list ETags stop matching."""
+        from rest_framework.test import APIClient
+
+        self.enqueue(self.emailed, Notification.Channel.EMAIL)
+        client = APIClient()
+        client.force_authenticate(self.emailed)
+        etag = client.get('/api/communications/notifications/')['ETag']
+        self.assertEqual(client.get('/api/communications/notifications/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        outbox.dispatch()
+        self.assertEqual(client.get('/api/communications/notifications/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_failures_back_off_then_give_up(self):
+        """Test a failed send is retried after a backoff, and failed for good after MAX_ATTEMPTS."""
+        [notification] = self.enqueue(self.texted, Notification.Channel.SMS)
+        with override_settings(SMS_BACKEND='apps.communications.tests.FailingSmsBackend'):
+            outbox.dispatch()
+            notification.refresh_from_db()
+            self.assertEqual((notification.status, notification.attempts), (Notification.Status.PENDING, 1))
+            self.assertEqual(notification.error_message, 'Gateway unavailable')
+            self.assertGreater(notification.next_attempt_at, timezone.now() + timedelta(seconds=50))
+            self.assertEqual(outbox.claim(), [])
+
+            Notification.objects.update(attempts=outbox.MAX_ATTEMPTS - 1, next_attempt_at=timezone.now())
+            outbox.dispatch()
+            notification.refresh_from_db()
+            self.assertEqual(notification.status, Notification.Status.FAILED)
+
+        [notification] = self.enqueue(self.texted, Notification.Channel.SMS)
+        self.assertEqual(send_notification_email(str(notification.pk)), 1)
+        self.assertEqual(len(sms.outbox), 1)
+
+    def test_claims_are_leased(self):
+        """Test a claimed notification is not handed to another dispatcher, and a missing id is a no-op."""
+        self.enqueue(self.emailed, Notification.Channel.EMAIL)
+        self.assertEqual(len(outbox.claim()), 1)
+        self.assertEqual(outbox.claim(), [])
+        self.assertEqual(send_notification_email('00000000-0000-0000-0000-000000000000'), 0)
+
+
+class NewsletterRenderingTest(APITestCase):
+    """Test newsletters render per recipient from compiled templates."""
+
+    def setUp(self):
+        from apps.events.models import Event, EventRegistration
+
+        self.a = Member.objects.create_user(email='a@example.com', password='x', postal_code='H1A1A1',
+                                            first_name='<Amina>', preferred_language='ar')
+        self.b = Member.objects.create_user(email='b@example.com', password='x', postal_code='H1A1A1',
+                                            first_name='Karim')
+        MemberFamily = self.a.families.model
+        MemberFamily.objects.create(member=self.a, related_member=self.b, relationship='SPOUSE')
+        start = timezone.now() + timedelta(days=3)
+        event = Event.objects.create(title='Iftar', start_date=start, end_date=start + timedelta(hours=3),
+                                     status=Event.Status.OPEN)
+        EventRegistration.objects.create(event=event, member=self.a, barcode='IFTAR-1')
+        NewsletterTemplate.objects.create(
+            key='mensuel', name='Mensuel',
+            html_body='<div>{{ content }}</div><ul>{% for e in upcoming_events %}<li>{{ e.title }}</li>{% endfor %}</ul>',
+        )
+        self.newsletter = Newsletter.objects.create(
+            subject='Bonjour {{ first_name }}',
+            content='<p>{{ first_name }} ({{ language }}) avec {{ household|join:", " }}: '
+                    '{% for e in my_events %}{{ e.title }}{% endfor %}</p>',
+            template_id='mensuel',
+        )
+
+    def test_renders_merge_fields_from_compiled_templates(self):
+        """Test each recipient gets their fields, HTML escaped, and nothing is parsed or queried per recipient."""
+        compile_source.cache_clear()
+        renderer = NewsletterRenderer(self.newsletter)
+        members = list(Member.objects.filter(pk__in=[self.a.pk, self.b.pk]).order_by('email'))
+        with self.assertNumQueries(2):
+            renderer.prepare(members)
+        with self.assertNumQueries(0):
+            (subject, text, html), (_, text_b, _) = [renderer.render(member) for member in members]
+
+        self.assertEqual(subject, 'Bonjour <Amina>')
+        self.assertEqual(text, '<Amina> (ar) avec Karim: IftarIftar')
+        self.assertEqual(
+            html, '<div><p>&lt;Amina&gt; (ar) avec Karim: Iftar</p></div><ul><li>Iftar</li></ul>',
+        )
+        self.assertEqual(text_b, 'Karim (fr) avec <Amina>: Iftar')
+
+        misses = compile_source.cache_info().misses
+        NewsletterRenderer(self.newsletter)
+        self.assertEqual(compile_source.cache_info().misses, misses)
+
+    def test_invalid_templates_rejected(self):
+        """Test unknown layouts and broken merge fields are refused before sending."""
+        admin = Member.objects.create_superuser(email='admin@example.com', password='x')
+        self.client.force_authenticate(user=admin)
+        response = self.client.post('/api/communications/newsletters/', {
+            'subject': 'Salut', 'content': '{% for x in %}', 'template_id': 'inconnu',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('template_id', response.data)
+
+        response = self.client.post('/api/communications/newsletters/', {'subject': 'Salut', 'content': '{% for x in %}'})
+        self.assertIn('content', response.data)
+
+        response = self.client.get(f'/api/communications/newsletters/{self.newsletter.pk}/preview/')
+        self.assertEqual(response.data['subject'], 'Bonjour')
+
+
+class SegmentTest(APITestCase):
+    """Test audience segments compile to one query and stay materialized."""
+
+    def setUp(self):
+        from apps.education.models import Course, Student
+        from apps.finance.models import Donation
+
+        def member(email, **fields):
+            fields.setdefault('status', Member.Status.ACTIVE)
+            return Member.objects.create_user(email=email, password='x', postal_code=fields.pop('postal_code', 'H2B 2B2'), **fields)
+
+        self.amina = member('amina@example.com', sex='F', postal_code='h1a 1a1')
+        self.sara = member('sara@example.com', sex='F')
+        self.karim = member('karim@example.com', sex='M')
+        self.omar = member('omar@example.com', sex='M', status=Member.Status.PENDING)
+        gone = member('gone@example.com', sex='F', postal_code='H1A1A1')
+        Member.objects.filter(pk=gone.pk).update(anonymized_at=timezone.now())
+        course = Course.objects.create(name='Arabe')
+        Student.objects.create(parent_member=self.karim, course=course, first_name='Yasmine', last_name='K')
+        Donation.objects.create(member=self.sara, amount=80, type='ONE_TIME', payment_method='CASH', status='COMPLETED')
+        Donation.objects.create(member=self.sara, amount=40, type='ONE_TIME', payment_method='CASH', status='COMPLETED')
+        Donation.objects.create(member=self.amina, amount=500, type='ONE_TIME', payment_method='CASH', status='PENDING')
+        self.women = Segment.objects.get(name='Femmes')
+
+    def matching(self, **rules):
+        with self.assertNumQueries(1):
+            return set(segments.evaluate(Segment(rules=rules)).values_list('email', flat=True))
+
+    def test_rules_compile_to_one_query(self):
+        """Test each criterion, combined in a single query."""
+        self.assertEqual(self.matching(sex='F'), {'amina@example.com', 'sara@example.com'})
+        self.assertEqual(self.matching(sex='F', postal_code='H1A'), {'amina@example.com'})
+        self.assertEqual(self.matching(status=['PENDING']), {'omar@example.com'})
+        self.assertEqual(self.matching(enrolled=True), {'karim@example.com'})
+        self.assertEqual(self.matching(donated={'min_total': '100', 'since': 30}), {'sara@example.com'})
+        self.assertEqual(self.matching(sex='F', donated=False), {'amina@example.com'})
+        self.assertEqual(self.matching(attended=True), set())
+
+        with self.assertRaises(ValidationError) as raised:
+            segments.compile_rules({'sex': 'X', 'age': 30, 'donated': {'since': 'hier'}})
+        self.assertEqual(set(raised.exception.message_dict), {'sex', 'age', 'donated'})
+
+    def test_materialized_and_refreshed_incrementally(self):
+        """Test a refresh stores the members and a member's change updates only their rows."""
+        segments.refresh(self.women)
+        self.assertEqual(self.women.member_count, 2)
+        self.assertEqual(set(segments.members(self.women)), {self.amina, self.sara})
+
+        self.karim.sex = 'F'
+        with patch('apps.communications.tasks.refresh_segment_members.delay', side_effect=refresh_segment_members) \
+                as delay, self.captureOnCommitCallbacks(execute=True):
+            self.karim.save()
+            self.sara.last_login = timezone.now()
+            self.sara.save(update_fields=['last_login'])
+        delay.assert_called_once_with([str(self.karim.pk)])
+        self.women.refresh_from_db()
+        self.assertEqual(self.women.member_count, 3)
+        self.assertEqual(segments.members(self.women).count(), 3)
+
+        self.sara.delete()
+        self.women.refresh_from_db()
+        self.assertEqual(self.women.member_count, 2)
+
+    def test_bulk_member_writes_refresh_segments(self):
+        """Test imports, anonymization and merges, which send no member signals, still update segments."""
+        from apps.members import dedup, retention
+        from apps.members.importer import MemberImporter
+
+        donors = Segment.objects.create(name='Donateurs', rules={'donated': True})
+        everyone = Segment.objects.create(name='Tous', rules={})
+        segments.refresh_all()
+        with patch('apps.communications.tasks.refresh_segment_members.delay', side_effect=refresh_segment_members), \
+                self.captureOnCommitCallbacks(execute=True):
+            MemberImporter().run([(2, {'email': 'nadia@example.com', 'postal_code': 'H2B 2B2', 'sex': 'F',
+                                       'status': 'ACTIVE'})])
+            retention.anonymize([self.amina.pk])
+            dedup.merge(self.karim, self.sara)
+
+        self.assertEqual(set(segments.members(self.women).values_list('email', flat=True)), {'nadia@example.com'})
+        self.assertEqual(set(segments.members(donors)), {self.karim})
+        for segment in (self.women, donors, everyone):
+            segment.refresh_from_db()
+            self.assertEqual(segment.member_count, segments.members(segment).count(), segment.name)
+
+    def test_notify_refreshes_the_segment_first(self):
+        """Test a segment is brought up to date before its notifications are queued."""
+        segments.refresh(self.women)
+        Member.objects.filter(pk=self.amina.pk).update(anonymized_at=timezone.now())
+        with patch('apps.communications.tasks.dispatch_notifications.delay'), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(outbox.enqueue_segment(self.women, 'SMS', '', 'Rappel'), 1)
+        self.assertFalse(Notification.objects.filter(member=self.amina).exists())
+
+    def test_newsletter_and_notifications_target_a_segment(self):
+        """Test a newsletter goes to its segment only, and a segment can be notified through the API."""
+        newsletter = Newsletter.objects.create(subject='Soirée des soeurs', content='...', segment=self.women)
+        with patch('apps.communications.tasks.deliver_newsletter_chunk.delay'), \
+                self.captureOnCommitCallbacks(execute=True):
+            delivery.send(newsletter)
+        newsletter.refresh_from_db()
+        self.assertEqual(newsletter.recipient_count, 2)
+        self.assertEqual(
+            set(newsletter.deliveries.values_list('member__email', flat=True)), {'amina@example.com', 'sara@example.com'},
+        )
+
+        self.client.force_authenticate(user=Member.objects.create_superuser(email='admin@example.com', password='x'))
+        with patch('apps.communications.tasks.dispatch_notifications.delay'), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/communications/segments/{self.women.pk}/notify/', {'channel': 'SMS', 'content': 'Rappel'},
+            )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['queued'], 2)
+        self.assertEqual(Notification.objects.filter(channel='SMS', content='Rappel').count(), 2)
+
+        response = self.client.post('/api/communications/segments/', {'name': 'X', 'rules': {'sex': 'X'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(COUNTERS_BACKEND='core.counters.LocMemBackend', SITE_URL='https://acml.example')
+class NewsletterTrackingTest(APITestCase):
+    """Test opens and clicks are buffered, then flushed into the aggregates."""
+
+    def setUp(self):
+        counters._locmem.clear()
+        cache.clear()
+        self.newsletter = Newsletter.objects.create(subject='Dons', content='...')
+        self.deliveries = [
+            NewsletterDelivery.objects.create(
+                newsletter=self.newsletter,
+                member=Member.objects.create_user(email=f'm{i}@example.com', password='x', postal_code='H1A1A1'),
+            )
+            for i in range(2)
+        ]
+        self.admin = Member.objects.create_superuser(email='admin@example.com', password='x')
+
+    def tracked(self, delivery):
+        html = tracking.Tracker(self.newsletter).apply(
+            '<html><body><p><a class="btn" href="https://acml.ca/dons?a=1&amp;b=2">Donner</a></p></body></html>',
+            delivery.pk,
+        )
+        click, = re.findall(r'href="https://acml.example(/[^"]+)"', html)
+        pixel, = re.findall(r'<img src="https://acml.example(/[^"]+)"[^>]*></body>', html)
+        return pixel, click
+
+    def test_hits_buffered_then_flushed(self):
+        """Test hits write nothing until the flush, and the stats read the aggregates."""
+        (pixel_a, click_a), (pixel_b, _) = [self.tracked(d) for d in self.deliveries]
+        self.assertEqual(NewsletterLink.objects.get().url, 'https://acml.ca/dons?a=1&b=2')
+
+        with self.assertNumQueries(0):
+            for url in (pixel_a, pixel_a, pixel_a, pixel_b):
+                response = self.client.get(url)
+                self.assertEqual(response['Content-Type'], 'image/gif')
+        self.client.get(click_a)
+        with self.assertNumQueries(0):
+            response = self.client.get(click_a)
+        self.assertRedirects(response, 'https://acml.ca/dons?a=1&b=2', fetch_redirect_response=False)
+        self.assertFalse(NewsletterStatistic.objects.exists())
+
+        self.assertEqual(tracking.flush(), 8)
+        self.assertEqual(tracking.flush(), 0)
+        self.client.force_authenticate(user=self.admin)
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/communications/newsletters/{self.newsletter.pk}/stats/')
+        self.assertEqual(
+            {k: response.data[k] for k in ('opens', 'unique_opens', 'clicks', 'unique_clicks')},
+            {'opens': 4, 'unique_opens': 2, 'clicks': 2, 'unique_clicks': 1},
+        )
+        response = self.client.get(f'/api/communications/newsletters/{self.newsletter.pk}/links/')
+        self.assertEqual(response.data[0]['clicks'], 2)
+        self.assertEqual(response.data[0]['unique_clicks'], 1)
+
+    def test_forged_tokens_and_failed_flush(self):
+        """Test tampered tokens count nothing, and hits survive a failed flush."""
+        pixel, click = self.tracked(self.deliveries[0])
+        self.assertEqual(self.client.get(click.replace('/t/c/', '/t/c/x')).status_code, 404)
+        self.assertEqual(self.client.get(pixel.replace('.gif', 'x.gif')).status_code, 200)
+        self.assertEqual(counters.get_backend().drain(), {})
+
+        self.client.get(pixel)
+        with patch('apps.communications.tracking._store', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            tracking.flush()
+        self.assertEqual(tracking.flush(), 1)
+        self.assertEqual(NewsletterStatistic.objects.get().opens, 1)
+
@@ -0,0 +1,151 @@
+"""
+Newsletter open and click tracking.
+
+The HTML part of every newsletter message gets a 1x1 pixel, and its
+http(s) links are rewritten to a redirect; both URLs (under SITE_URL)
+carry a signed token naming the newsletter, the delivery (one recipient)
+and, for a click, the NewsletterLink.
+
+A hit checks the signature and adds to buffered counters (core.counters:
+hits, and distinct deliveries as HyperLogLog uniques). It writes nothing
+to the database and reads only the address of a clicked link, cached, so
+the burst of opens that follows a send costs one Redis round trip per
+hit. flush() (tasks.flush_newsletter_tracking, every minute) drains the
+counters into NewsletterStatistic and NewsletterLink with one UPDATE per
+newsletter or link hit since, and the stats endpoints read only those
+tables.
+"""
+import base64
+import html
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.urls import reverse
+
+from core import counters
+from core.cache import invalidate_model_cache
+from .models import Newsletter, NewsletterLink, NewsletterStatistic
+
+SIGNER = signing.Signer(salt='newsletter-tracking')
+LINK = re.compile(r'''(<a\s[^>]*?href=)(["'])(https?://.+?)\2''', re.IGNORECASE | re.DOTALL)
+BODY_END = re.compile(r'</body>', re.IGNORECASE)
+LINK_CACHE_KEY = 'tracking:link:{pk}'
+LINK_CACHE_TIMEOUT = 24 * 3600
+PIXEL = base64.b64decode('R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7')
+
+
+def _url(name, token):
+    return settings.SITE_URL.rstrip('/') + reverse(name, args=[token])
+
+
+class Tracker:
+    """Adds the pixel and tracked links to the messages of one newsletter."""
+
+    def __init__(self, newsletter):
+        self.newsletter = newsletter
+        self.links = dict(NewsletterLink.objects.filter(newsletter=newsletter).values_list('url', 'pk'))
+
+    def link_id(self, url):
+        if url not in self.links:
+            link, _ = NewsletterLink.objects.get_or_create(newsletter=self.newsletter, url=url)
+            self.links[url] = link.pk
+        return self.links[url]
+
+    def apply(self, body, delivery_id):
+        """`body` (HTML) with tracking for the recipient of `delivery_id`."""
+        prefix = f'{self.newsletter.pk.hex}.{delivery_id}'
+
+        def track(match):
+            url = html.unescape(match[3])
+            token = SIGNER.sign(f'{prefix}.{self.link_id(url)}')
+            return f'{match[1]}{match[2]}{_url("newsletter-click", token)}{match[2]}'
+
+        body = LINK.sub(track, body)
+        pixel = f'<img src="{_url("newsletter-open", SIGNER.sign(prefix))}" width="1" height="1" alt="">'
+        if BODY_END.search(body):
+            return BODY_END.sub(lambda match: pixel + match[0], body, count=1)
+        return body + pixel
+
+
+def _unsign(token, parts):
+    """The values signed in `token`; raises BadSignature or ValueError."""
+    values = SIGNER.unsign(token).split('.')
+    if len(values) != parts:
+        raise ValueError(token)
+    return values
+
+
+def record_open(token):
+    newsletter_id, delivery_id = _unsign(token, 2)
+    counters.get_backend().add([f'newsletter:{newsletter_id}:opens'], delivery_id)
+
+
+def record_click(token):
+    """Count a click; returns the link's address (None if it is gone)."""
+    newsletter_id, delivery_id, link_id = _unsign(token, 3)
+    url = link_url(int(link_id))
+    if url:
+        counters.get_backend().add(
+            [f'newsletter:{newsletter_id}:clicks', f'link:{link_id}:clicks'], delivery_id,
+        )
+    return url
+
+
+def link_url(pk):
+    return cache.get_or_set(
+        LINK_CACHE_KEY.format(pk=pk),
+        lambda: NewsletterLink.objects.filter(pk=pk).values_list('url', flat=True).first(),
+        LINK_CACHE_TIMEOUT,
+    )
+
+
+def flush():
+    """Store the hits buffered since the last flush. Returns their number."""
+    backend = counters.get_backend()
+    drained = backend.drain()
+    if not drained:
+        return 0
+    try:
+        with transaction.atomic():
+            _store(drained)
+    except Exception:
+        backend.restore(drained)
+        raise
+    # update() sends no signals.
+    invalidate_model_cache(NewsletterStatistic)
+    invalidate_model_cache(NewsletterLink)
+    return sum(counts.hits for counts in drained.values())
+
+
+def _store(drained):
+    newsletters = defaultdict(dict)
+    links = {}
+    for name, counts in drained.items():
+        kind, pk, event = name.split(':')
+        if kind == 'newsletter':
+            newsletters[pk][event] = counts
+        elif kind == 'link':
+            links[int(pk)] = counts
+
+    NewsletterStatistic.objects.bulk_create(
+        [NewsletterStatistic(newsletter_id=pk) for pk in Newsletter.objects.filter(pk__in=newsletters).values_list('pk', flat=True)],
+        ignore_conflicts=True,
+    )
+    for pk, events in newsletters.items():
+        fields = {}
+        for event in ('opens', 'clicks'):
+            if event in events:
+                # Uniques are estimated over all hits; an expired estimate restarts low.
+                fields[event] = F(event) + events[event].hits
+                fields[f'unique_{event}'] = Greatest(F(f'unique_{event}'), events[event].uniques)
+        NewsletterStatistic.objects.filter(newsletter_id=pk).update(**fields)
+    for pk, counts in links.items():
+        NewsletterLink.objects.filter(pk=pk).update(
+            clicks=F('clicks') + counts.hits, unique_clicks=Greatest(F('unique_clicks'), counts.uniques),
+        )
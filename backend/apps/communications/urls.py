@@ -7,7 +7,10 @@ router.register(r'announcements', views.AnnouncementViewSet)
 router.register(r'calendar', views.CalendarEventViewSet)
 router.register(r'newsletters', views.NewsletterViewSet)
 router.register(r'notifications', views.NotificationViewSet)
+router.register(r'segments', views.SegmentViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('t/o/<str:token>.gif', views.track_open, name='newsletter-open'),
+    path('t/c/<str:token>/', views.track_click, name='newsletter-click'),
 ]
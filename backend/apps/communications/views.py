@@ -1,21 +1,40 @@
-from rest_framework import viewsets, permissions
-from .models import Announcement, CalendarEvent, Newsletter, Notification
+from django.core.signing import BadSignature
+from django.db import transaction
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.template import TemplateSyntaxError
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from core.cache import CachedResponseMixin
+from core.views import ConditionalGetMixin
+from . import delivery, outbox, segments, tracking
+from .models import (
+    Announcement, CalendarEvent, Newsletter, NewsletterLink, NewsletterStatistic, NewsletterTemplate, Notification,
+    Segment,
+)
+from .rendering import NewsletterRenderer
 from .serializers import (
     AnnouncementSerializer, CalendarEventSerializer, 
-    NewsletterSerializer, NotificationSerializer
+    NewsletterSerializer, NewsletterPreviewSerializer, NewsletterStatisticSerializer, NewsletterLinkSerializer,
+    NotificationSerializer, SegmentSerializer, SegmentNotifySerializer
 )
+from .tasks import refresh_segment, send_bulk_newsletter
 
 
-class AnnouncementViewSet(viewsets.ModelViewSet):
+class AnnouncementViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Announcement.objects.all()
     serializer_class = AnnouncementSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filterset_fields = ['category', 'status']
 
 
-class CalendarEventViewSet(viewsets.ModelViewSet):
+class CalendarEventViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = CalendarEvent.objects.all()
     serializer_class = CalendarEventSerializer
+    cursor_ordering = ('start_time', 'id')
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filterset_fields = ['category']
 
@@ -25,11 +44,108 @@ class NewsletterViewSet(viewsets.ModelViewSet):
     serializer_class = NewsletterSerializer
     permission_classes = [permissions.IsAdminUser]
 
+    def get_renderer(self, newsletter):
+        try:
+            return NewsletterRenderer(newsletter)
+        except (NewsletterTemplate.DoesNotExist, TemplateSyntaxError) as exc:
+            raise ValidationError({'detail': f'Gabarit invalide : {exc}'})
+
+    @action(detail=True, methods=['post'])
+    def send(self, request, pk=None):
+        """Start sending the newsletter in the background, or resume an interrupted send."""
+        newsletter = self.get_object()
+        if newsletter.status == Newsletter.Status.SENT:
+            return Response({'detail': 'Infolettre déjà envoyée.'}, status=status.HTTP_400_BAD_REQUEST)
+        self.get_renderer(newsletter)
+        send_bulk_newsletter.delay(str(newsletter.pk))
+        return Response({'detail': 'Envoi en cours.'}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def preview(self, request, pk=None):
+        """The newsletter as the requesting admin would receive it."""
+        subject, text, html = self.get_renderer(self.get_object()).render(request.user)
+        return Response(NewsletterPreviewSerializer({'subject': subject, 'text': text, 'html': html}).data)
+
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        newsletter = self.get_object()
+        return Response({'status': newsletter.status, 'deliveries': delivery.progress(newsletter)})
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        """Opens and clicks, as of the last tracking flush."""
+        newsletter = self.get_object()
+        statistic = NewsletterStatistic.objects.filter(newsletter=newsletter).first() or NewsletterStatistic()
+        statistic.newsletter = newsletter
+        return Response(NewsletterStatisticSerializer(statistic).data)
+
+    @action(detail=True, methods=['get'])
+    def links(self, request, pk=None):
+        """Clicks per link, as of the last tracking flush."""
+        links = NewsletterLink.objects.filter(newsletter=self.get_object()).order_by('-clicks', 'id')
+        return Response(NewsletterLinkSerializer(links, many=True).data)
+
+
+class SegmentViewSet(viewsets.ModelViewSet):
+    queryset = Segment.objects.all()
+    serializer_class = SegmentSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def perform_create(self, serializer):
+        segment = serializer.save()
+        transaction.on_commit(lambda: refresh_segment.delay(str(segment.pk)))
 
-class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    def perform_update(self, serializer):
+        segment = serializer.save()
+        transaction.on_commit(lambda: refresh_segment.delay(str(segment.pk)))
+
+    @action(detail=True, methods=['post'])
+    def refresh(self, request, pk=None):
+        """Recompute the segment's members now."""
+        segment = self.get_object()
+        segments.refresh(segment)
+        return Response(self.get_serializer(segment).data)
+
+    @action(detail=True, methods=['post'])
+    def notify(self, request, pk=None):
+        """Queue a notification for every member of the segment."""
+        segment = self.get_object()
+        serializer = SegmentNotifySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        count = outbox.enqueue_segment(segment, **serializer.validated_data)
+        return Response({'queued': count}, status=status.HTTP_202_ACCEPTED)
+
+
+class NotificationViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return self.queryset.filter(member=self.request.user)
+
+
+# Tracking hits, see apps.communications.tracking: no authentication, no
+# database write.
+
+@never_cache
+@require_GET
+def track_open(request, token):
+    try:
+        tracking.record_open(token)
+    except (BadSignature, ValueError):
+        pass
+    return HttpResponse(tracking.PIXEL, content_type='image/gif')
+
+
+@never_cache
+@require_GET
+def track_click(request, token):
+    try:
+        url = tracking.record_click(token)
+    except (BadSignature, ValueError):
+        url = None
+    if not url:
+        raise Http404
+    return HttpResponseRedirect(url)
+
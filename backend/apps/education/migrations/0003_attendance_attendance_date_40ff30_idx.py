@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'id'], name='attendance_date_40ff30_idx'),
+        ),
+    ]
@@ -97,3 +97,6 @@ class Attendance(models.Model):
         verbose_name = 'Présence'
         verbose_name_plural = 'Présences'
         unique_together = ['student', 'course', 'date']
+        indexes = [
+            models.Index(fields=['date', 'id']),
+        ]
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.serializers import DynamicFieldsModelSerializer
 from .models import Course, CourseLevel, Student, Attendance
 
 
@@ -8,12 +9,13 @@ class CourseLevelSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(DynamicFieldsModelSerializer):
     levels = CourseLevelSerializer(many=True, read_only=True)
 
     class Meta:
         model = Course
         fields = '__all__'
+        expandable_fields = ['levels']
 
 
 class StudentSerializer(serializers.ModelSerializer):
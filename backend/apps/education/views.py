@@ -1,4 +1,8 @@
 from rest_framework import viewsets, permissions
+from core.cache import CachedResponseMixin
+from core.exports import ExportMixin
+from core.permissions import IsAdmin, IsTeacher
+from core.views import ExpandablePrefetchMixin
 from .models import Course, CourseLevel, Student, Attendance
 from .serializers import (
     CourseSerializer, CourseLevelSerializer, 
@@ -6,22 +10,26 @@ from .serializers import (
 )
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(CachedResponseMixin, ExpandablePrefetchMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filterset_fields = ['status']
+    expandable_prefetches = {'levels': 'levels'}
+    cache_models = (Course, CourseLevel)
 
 
 class CourseLevelViewSet(viewsets.ModelViewSet):
     queryset = CourseLevel.objects.all()
     serializer_class = CourseLevelSerializer
+    cursor_ordering = ('order_num', 'id')
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
 
 class StudentViewSet(viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
+    cursor_ordering = ('-enrolled_at', '-id')
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
@@ -30,10 +38,26 @@ class StudentViewSet(viewsets.ModelViewSet):
         return self.queryset.filter(parent_member=self.request.user)
 
 
-class AttendanceViewSet(viewsets.ModelViewSet):
+class AttendanceViewSet(ExportMixin, viewsets.ModelViewSet):
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
+    cursor_ordering = ('-date', '-id')
     permission_classes = [permissions.IsAuthenticated]
+    filterset_fields = {
+        'course': ['exact'],
+        'status': ['exact'],
+        'date': ['gte', 'lte'],
+    }
+    export_fields = (
+        ('Date', 'date'),
+        ('Cours', 'course__name'),
+        ('Prénom', 'student__first_name'),
+        ('Nom', 'student__last_name'),
+        ('Statut', 'status'),
+        ('Notes', 'notes'),
+    )
+    export_ordering = ('date', 'course__name', 'student__last_name', 'id')
+    export_permission_classes = [IsAdmin | IsTeacher]
 
     def get_queryset(self):
         if self.request.user.is_staff:
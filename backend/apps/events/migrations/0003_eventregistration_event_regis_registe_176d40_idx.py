@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventregistration',
+            index=models.Index(fields=['registered_at', 'id'], name='event_regis_registe_176d40_idx'),
+        ),
+    ]
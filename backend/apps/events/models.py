@@ -59,6 +59,9 @@ class EventRegistration(models.Model):
         verbose_name = 'Inscription à un événement'
         verbose_name_plural = 'Inscriptions aux événements'
         unique_together = ['event', 'member']
+        indexes = [
+            models.Index(fields=['registered_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.member} - {self.event}"
@@ -0,0 +1,43 @@
+"""
+Event reminders, queued in the notification outbox in one insert however
+many members registered (see apps.communications.outbox).
+"""
+from django.utils import timezone
+
+from apps.communications import outbox
+from apps.communications.models import Notification
+from apps.members.models import Member
+from .models import EventRegistration
+
+REMINDER_SUBJECT = 'Rappel : {title}'
+REMINDER_MESSAGE = (
+    'Bonjour {first_name},\n\n'
+    'Rappel : {title} aura lieu le {start:%d/%m/%Y à %H:%M}{location}.\n'
+)
+
+
+def queue_reminders(event):
+    """Queue a reminder to every member registered to `event`, by email or else SMS. Returns how many."""
+    registrants = Member.objects.filter(
+        event_registrations__event=event, event_registrations__status=EventRegistration.Status.REGISTERED,
+    ).only('id', 'first_name', 'email', 'phone')
+    context = {
+        'title': event.title,
+        'start': timezone.localtime(event.start_date),
+        'location': f' ({event.location})' if event.location else '',
+    }
+    notifications = []
+    for member in registrants.iterator(chunk_size=2000):
+        if member.email:
+            channel = Notification.Channel.EMAIL
+        elif member.phone:
+            channel = Notification.Channel.SMS
+        else:
+            continue
+        notifications.append(Notification(
+            member=member,
+            channel=channel,
+            subject=REMINDER_SUBJECT.format(**context),
+            content=REMINDER_MESSAGE.format(first_name=member.first_name, **context),
+        ))
+    return len(outbox.enqueue(notifications))
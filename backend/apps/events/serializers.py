@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.serializers import DynamicFieldsModelSerializer
 from .models import Event, EventRegistration, EventPhoto, EventFeedback
 
 
@@ -21,10 +22,11 @@ class EventFeedbackSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(DynamicFieldsModelSerializer):
     photos = EventPhotoSerializer(many=True, read_only=True)
     current_registrations = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Event
         fields = '__all__'
+        expandable_fields = ['photos']
@@ -122,3 +122,46 @@ class EventAPITest(APITestCase):
             'end_date': timezone.now() + timedelta(days=1, hours=2),
         })
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class EventReminderTest(APITestCase):
+    """Test event reminders go through the notification outbox."""
+
+    def test_remind_registrants(self):
+        """Test one notification is queued per registered member, by email or SMS."""
+        from unittest.mock import patch
+        from django.contrib.auth.models import Group
+        from apps.communications.models import Notification
+
+        event = Event.objects.create(
+            title='Aïd', start_date=timezone.now() + timedelta(days=2), end_date=timezone.now() + timedelta(days=2, hours=4),
+            status=Event.Status.OPEN, barcode_prefix='AID',
+        )
+        members = [
+            Member.objects.create_user(email='a@example.com', password='x', postal_code='H1A1A1'),
+            Member.objects.create_user(phone='5145550123', password='x', postal_code='H1A1A1'),
+            Member.objects.create_user(email='c@example.com', password='x', postal_code='H1A1A1'),
+        ]
+        for i, member in enumerate(members):
+            EventRegistration.objects.create(
+                event=event, member=member, barcode=f'AID-{i}',
+                status=EventRegistration.Status.CANCELLED if i == 2 else EventRegistration.Status.REGISTERED,
+            )
+        manager = Member.objects.create_user(email='manager@example.com', password='x', postal_code='H1A1A1')
+        manager.groups.add(Group.objects.create(name='EventManager'))
+
+        self.client.force_authenticate(user=members[0])
+        self.assertEqual(self.client.post(f'/api/events/events/{event.pk}/remind/').status_code,
+                         status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=manager)
+        with patch('apps.communications.tasks.dispatch_notifications.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/events/events/{event.pk}/remind/')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data, {'queued': 2})
+        delay.assert_called_once_with()
+        self.assertEqual(
+            dict(Notification.objects.values_list('member__email', 'channel')),
+            {'a@example.com': 'EMAIL', None: 'SMS'},
+        )
+
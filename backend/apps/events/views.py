@@ -1,7 +1,12 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from core.cache import CachedResponseMixin
+from core.exports import ExportMixin
+from core.permissions import IsAdmin, IsEventManager
+from core.views import ConditionalGetMixin, ExpandablePrefetchMixin
 from .models import Event, EventRegistration, EventPhoto, EventFeedback
+from .reminders import queue_reminders
 from .serializers import (
     EventSerializer, EventRegistrationSerializer, 
     EventPhotoSerializer, EventFeedbackSerializer
@@ -9,11 +14,14 @@ from .serializers import (
 import uuid
 
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(CachedResponseMixin, ConditionalGetMixin, ExpandablePrefetchMixin, viewsets.ModelViewSet):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
+    cursor_ordering = ('-start_date', '-id')
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filterset_fields = ['status']
+    expandable_prefetches = {'photos': 'photos'}
+    cache_models = (Event, EventPhoto)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def register(self, request, pk=None):
@@ -39,11 +47,32 @@ class EventViewSet(viewsets.ModelViewSet):
         serializer = EventRegistrationSerializer(registration)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['post'], permission_classes=[IsAdmin | IsEventManager])
+    def remind(self, request, pk=None):
+        """Queue a reminder to every registered member."""
+        queued = queue_reminders(self.get_object())
+        return Response({'queued': queued}, status=status.HTTP_202_ACCEPTED)
 
-class EventRegistrationViewSet(viewsets.ModelViewSet):
+
+class EventRegistrationViewSet(ExportMixin, viewsets.ModelViewSet):
     queryset = EventRegistration.objects.all()
     serializer_class = EventRegistrationSerializer
+    cursor_ordering = ('-registered_at', '-id')
     permission_classes = [permissions.IsAuthenticated]
+    filterset_fields = ['event', 'status']
+    export_fields = (
+        ('Événement', 'event__title'),
+        ('Prénom', 'member__first_name'),
+        ('Nom', 'member__last_name'),
+        ('Courriel', 'member__email'),
+        ('Téléphone', 'member__phone'),
+        ('Statut', 'status'),
+        ('Code-barres', 'barcode'),
+        ('Consentement image', 'image_consent'),
+        ('Inscrit le', 'registered_at'),
+        ('Arrivé le', 'checked_in_at'),
+    )
+    export_ordering = ('registered_at', 'id')
 
     def get_queryset(self):
         if self.request.user.is_staff:
@@ -54,6 +83,7 @@ class EventRegistrationViewSet(viewsets.ModelViewSet):
 class EventPhotoViewSet(viewsets.ModelViewSet):
     queryset = EventPhoto.objects.all()
     serializer_class = EventPhotoSerializer
+    cursor_ordering = ('-uploaded_at', '-id')
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
 
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['donated_at', 'id'], name='donations_donated_9e2fe0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['member', 'donated_at', 'id'], name='donations_member__239070_idx'),
+        ),
+    ]
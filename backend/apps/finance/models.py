@@ -85,6 +85,10 @@ class Donation(models.Model):
         verbose_name = 'Don / Cotisation'
         verbose_name_plural = 'Dons / Cotisations'
         ordering = ['-donated_at']
+        indexes = [
+            models.Index(fields=['donated_at', 'id']),
+            models.Index(fields=['member', 'donated_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.amount} {self.currency} - {self.member}"
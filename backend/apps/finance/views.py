@@ -1,5 +1,7 @@
 from rest_framework import viewsets, permissions
-from .models import Campaign, TaxReceipt, Donation
+from core.cache import CachedResponseMixin
+from core.exports import ExportMixin
+from core.permissions import IsAdmin, IsTreasurer
 from .models import Campaign, TaxReceipt, Donation
 from .serializers import CampaignSerializer, TaxReceiptSerializer, DonationSerializer
 from .utils import generate_receipt_pdf
@@ -8,7 +10,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 
 
-class CampaignViewSet(viewsets.ModelViewSet):
+class CampaignViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Campaign.objects.all()
     serializer_class = CampaignSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -18,6 +20,7 @@ class CampaignViewSet(viewsets.ModelViewSet):
 class TaxReceiptViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = TaxReceipt.objects.all()
     serializer_class = TaxReceiptSerializer
+    cursor_ordering = ('-issued_at', '-id')
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
@@ -26,10 +29,34 @@ class TaxReceiptViewSet(viewsets.ReadOnlyModelViewSet):
         return self.queryset.filter(member=self.request.user)
 
 
-class DonationViewSet(viewsets.ModelViewSet):
+class DonationViewSet(ExportMixin, viewsets.ModelViewSet):
     queryset = Donation.objects.all()
     serializer_class = DonationSerializer
+    cursor_ordering = ('-donated_at', '-id')
     permission_classes = [permissions.IsAuthenticated]
+    filterset_fields = {
+        'status': ['exact'],
+        'type': ['exact'],
+        'campaign': ['exact'],
+        'donated_at': ['gte', 'lt'],
+    }
+    export_fields = (
+        ('Date', 'donated_at'),
+        ('Montant', 'amount'),
+        ('Devise', 'currency'),
+        ('Type', 'type'),
+        ('Méthode de paiement', 'payment_method'),
+        ('Statut', 'status'),
+        ('Campagne', 'campaign__name'),
+        ('Prénom', 'member__first_name'),
+        ('Nom', 'member__last_name'),
+        ('Courriel', 'member__email'),
+        ('Reçu fiscal', 'receipt__receipt_number'),
+        ('ID de transaction', 'payment_id'),
+        ('ID', 'id'),
+    )
+    export_ordering = ('donated_at', 'id')
+    export_permission_classes = [IsAdmin | IsTreasurer]
 
     def get_queryset(self):
         if self.request.user.is_staff:
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Member, MemberFamily, MemberSkill, MemberContribution, MemberCard
+from .models import Member, MemberFamily, MemberSkill, Skill, MemberContribution, MemberCard, RetentionSweep
+from .search import search_members
 
 
 class MemberFamilyInline(admin.TabularInline):
@@ -40,6 +41,10 @@ class MemberAdmin(UserAdmin):
     )
     inlines = [MemberFamilyInline, MemberSkillInline, MemberContributionInline]
 
+    def get_search_results(self, request, queryset, search_term):
+        # Indexed full-text / trigram search instead of icontains scans.
+        return search_members(queryset, search_term), False
+
 
 @admin.register(MemberFamily)
 class MemberFamilyAdmin(admin.ModelAdmin):
@@ -48,7 +53,15 @@ class MemberFamilyAdmin(admin.ModelAdmin):
 
 @admin.register(MemberSkill)
 class MemberSkillAdmin(admin.ModelAdmin):
-    list_display = ('member', 'skill_name', 'proficiency')
+    list_display = ('member', 'skill_name', 'proficiency', 'skill', 'level')
+    list_filter = ('level',)
+
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'aliases')
+    search_fields = ('name', 'slug')
+    prepopulated_fields = {'slug': ('name',)}
 
 
 @admin.register(MemberContribution)
@@ -60,3 +73,14 @@ class MemberContributionAdmin(admin.ModelAdmin):
 @admin.register(MemberCard)
 class MemberCardAdmin(admin.ModelAdmin):
     list_display = ('member', 'card_number', 'year', 'expires_at')
+
+
+@admin.register(RetentionSweep)
+class RetentionSweepAdmin(admin.ModelAdmin):
+    list_display = ('started_at', 'cutoff', 'finished_at', 'members', 'notifications', 'family_links')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,28 @@
+from django.apps import AppConfig
+
+
+class MembersConfig(AppConfig):
+    name = 'apps.members'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+        from . import dedup, households, skills, stats
+        from .models import Member, MemberFamily, MemberSkill, Skill
+
+        pre_save.connect(stats.remember_stats_key, sender=Member, dispatch_uid='members.stats.pre_save')
+        post_save.connect(stats.update_on_save, sender=Member, dispatch_uid='members.stats.post_save')
+        post_delete.connect(stats.update_on_delete, sender=Member, dispatch_uid='members.stats.post_delete')
+
+        pre_save.connect(households.remember_edge, sender=MemberFamily, dispatch_uid='members.households.pre_save')
+        post_save.connect(households.update_on_edge_save, sender=MemberFamily,
+                          dispatch_uid='members.households.post_save')
+        post_delete.connect(households.update_on_edge_delete, sender=MemberFamily,
+                            dispatch_uid='members.households.post_delete')
+        pre_delete.connect(households.remember_household, sender=Member,
+                           dispatch_uid='members.households.member_pre_delete')
+        post_delete.connect(households.update_on_member_delete, sender=Member,
+                            dispatch_uid='members.households.member_delete')
+        pre_delete.connect(dedup.member_deleted, sender=Member, dispatch_uid='members.dedup.member_pre_delete')
+
+        pre_save.connect(skills.normalize_on_save, sender=MemberSkill, dispatch_uid='members.skills.pre_save')
+        post_save.connect(skills.fold_aliases, sender=Skill, dispatch_uid='members.skills.fold_aliases')
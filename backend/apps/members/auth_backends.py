@@ -1,5 +1,7 @@
 from django.contrib.auth.backends import ModelBackend
 from django.db.models import Q
+
+from core.authentication import get_cached_user
 from .models import Member
 
 
@@ -20,7 +22,5 @@ class EmailOrPhoneBackend(ModelBackend):
             return None
 
     def get_user(self, user_id):
-        try:
-            return Member.objects.get(pk=user_id)
-        except Member.DoesNotExist:
-            return None
+        user = get_cached_user(user_id)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,131 @@
+"""
+Annual member card issuance.
+
+issue_cards() gives every active member a MemberCard for the year, then
+renders the QR code and Code128 barcode of each card into storage.
+
+- Cards are created with bulk_create, skipping members who already have
+  one for the year (the `(member, year)` constraint settles races).
+- Images are rendered in a process pool, a batch at a time. Workers only
+  turn card numbers into PNG bytes; the parent process writes the files
+  and records them with bulk_update, so storage clients and database
+  connections never cross a fork.
+- A card counts as rendered once both image fields are set. Running the
+  job again picks up where it stopped and leaves finished cards alone.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from django.utils import timezone
+
+from core.cache import invalidate_model_cache
+from core.utils import render_barcode_image, render_qr_code
+from .models import Member, MemberCard
+
+CARD_NUMBER = 'ACML-{year}-{member}'
+IMAGE_NAME = 'cards/{year}/{number}-{kind}.png'
+
+
+def card_number(member_id, year) -> str:
+    """Card number of a member for a year; stable, so reruns cannot duplicate."""
+    return CARD_NUMBER.format(year=year, member=member_id.hex.upper())
+
+
+def render_card(number):
+    """Return `(number, qr_png, barcode_png)`. Runs in the worker processes."""
+    return number, render_qr_code(number), render_barcode_image(number)
+
+
+def issue_cards(year=None, batch_size=500, workers=None):
+    """Create and render the cards of `year` (default: this year)."""
+    year = year or timezone.localdate().year
+    created = create_cards(year, batch_size=batch_size)
+    rendered = render_cards(year, batch_size=batch_size, workers=workers)
+    return {'year': year, 'created': created, 'rendered': rendered}
+
+
+def create_cards(year, batch_size=500):
+    """Create the missing cards of active members. Returns the number created."""
+    member_ids = list(
+        Member.objects.filter(status=Member.Status.ACTIVE)
+        .exclude(cards__year=year)
+        .order_by()
+        .values_list('pk', flat=True)
+    )
+    if not member_ids:
+        return 0
+
+    cards = MemberCard.objects.filter(year=year)
+    before = cards.count()
+    expires_at = date(year, 12, 31)
+    for start in range(0, len(member_ids), batch_size):
+        MemberCard.objects.bulk_create(
+            [
+                MemberCard(member_id=pk, year=year, card_number=card_number(pk, year), expires_at=expires_at)
+                for pk in member_ids[start:start + batch_size]
+            ],
+            ignore_conflicts=True,
+        )
+    invalidate_model_cache(MemberCard)
+    return cards.count() - before
+
+
+def render_cards(year, batch_size=500, workers=None):
+    """Render the images of the cards of `year` that have none. Returns the number rendered."""
+    workers = _pool_size(workers)
+    pending = (
+        MemberCard.objects.filter(year=year)
+        .filter(Q(qr_code='') | Q(barcode=''))
+        .only('id', 'card_number', 'qr_code', 'barcode')
+        .order_by('card_number')
+    )
+    executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+    rendered = 0
+    last = ''
+    try:
+        while True:
+            batch = list(pending.filter(card_number__gt=last)[:batch_size])
+            if not batch:
+                break
+            last = batch[-1].card_number
+            numbers = [card.card_number for card in batch]
+            if executor:
+                images = executor.map(render_card, numbers, chunksize=max(1, len(numbers) // (workers * 4)))
+            else:
+                images = map(render_card, numbers)
+
+            by_number = {card.card_number: card for card in batch}
+            for number, qr_png, barcode_png in images:
+                card = by_number[number]
+                card.qr_code.name = _store(card.qr_code, year, number, 'qr', qr_png)
+                card.barcode.name = _store(card.barcode, year, number, 'barcode', barcode_png)
+            MemberCard.objects.bulk_update(batch, ['qr_code', 'barcode'])
+            rendered += len(batch)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    if rendered:
+        invalidate_model_cache(MemberCard)
+    return rendered
+
+
+def _pool_size(workers):
+    # Celery's prefork children are daemonic and may not start processes.
+    if multiprocessing.current_process().daemon:
+        return 0
+    if workers is None:
+        return os.cpu_count() or 1
+    return workers
+
+
+def _store(field, year, number, kind, content):
+    name = IMAGE_NAME.format(year=year, number=number, kind=kind)
+    # Left over by an interrupted run: replace it rather than get a suffixed copy.
+    if field.storage.exists(name):
+        field.storage.delete(name)
+    return field.storage.save(name, ContentFile(content))
@@ -0,0 +1,275 @@
+"""
+Member deduplication.
+
+Comparing every pair of members is quadratic, so candidates come from
+blocking: each member gets a few keys (normalized phone, email local
+part, phonetic name, postal area + phonetic last name) stored in the
+indexed MemberBlockingKey table, and only members sharing a key are
+compared. Keys shared by more than MAX_BLOCK_SIZE members (a very common
+name in one postal area...) are too unspecific and skipped.
+
+Pairs are scored with the trigram similarity of pg_trgm, computed here so
+the job runs the same on every database, and pairs scoring at least
+SCORE_THRESHOLD land in the DuplicateCandidate review queue. merge() then
+folds one member into the other in a single transaction.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from itertools import combinations, groupby
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from apps.communications.models import SegmentMember
+from apps.communications.segments import queue_refresh
+from core.cache import invalidate_model_cache
+from . import households
+from .models import DuplicateCandidate, Member, MemberBlockingKey, MemberFamily
+
+MAX_BLOCK_SIZE = 50
+SCORE_THRESHOLD = 0.7
+BATCH_SIZE = 2000
+DETAIL_FIELDS = ('first_name', 'last_name', 'email', 'phone', 'postal_code')
+# Common mailbox names that say nothing about who is behind them.
+GENERIC_EMAIL_LOCALS = {'info', 'contact', 'admin', 'famille', 'family', 'noreply'}
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'), **dict.fromkeys('CGJKQSXZ', '2'), **dict.fromkeys('DT', '3'),
+    'L': '4', **dict.fromkeys('MN', '5'), 'R': '6',
+}
+
+
+def _ascii(text):
+    return unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+
+
+def soundex(name):
+    """Soundex code of a name, accents folded ('Hélène' -> 'H450'); '' if no letters."""
+    letters = re.sub('[^A-Z]', '', _ascii(name).upper())
+    if not letters:
+        return ''
+    code, previous = letters[0], SOUNDEX_CODES.get(letters[0])
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter)
+        if digit and digit != previous:
+            code += digit
+        if letter not in 'HW':
+            previous = digit
+    return (code + '000')[:4]
+
+
+def trigrams(text):
+    """The trigrams pg_trgm extracts from `text`."""
+    grams = set()
+    for word in re.findall(r'[a-z0-9]+', _ascii(text).lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    """pg_trgm similarity(): shared trigrams over all trigrams."""
+    a, b = trigrams(a), trigrams(b)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def normalize_phone(phone):
+    digits = ''.join(filter(str.isdigit, phone or ''))
+    return digits[-10:] if len(digits) >= 10 else ''
+
+
+def email_local(email):
+    local = (email or '').lower().split('@')[0].split('+')[0].replace('.', '')
+    return '' if local in GENERIC_EMAIL_LOCALS else local
+
+
+def blocking_keys(first_name, last_name, email, phone, postal_code):
+    keys = set()
+    if phone := normalize_phone(phone):
+        keys.add(f'phone:{phone}')
+    if local := email_local(email):
+        keys.add(f'email:{local}')
+    first, last = soundex(first_name), soundex(last_name)
+    if first and last:
+        keys.add(f'name:{last}:{first}')
+    area = (postal_code or '')[:3].upper()
+    if last and len(area) == 3:
+        keys.add(f'area:{area}:{last}')
+    return keys
+
+
+def score(a, b):
+    """
+    Score two members given as (first_name, last_name, email, phone,
+    postal_code) tuples, between 0 and 1. Names weigh most, so relatives
+    sharing a phone or an address rarely reach the threshold. Contact
+    details only count when both members have the same kind, since
+    registering once by email and once by phone is the common case.
+    """
+    weights = {
+        'name': (0.6, similarity(f'{a[0]} {a[1]}', f'{b[0]} {b[1]}')),
+        'area': (0.15, float(bool(a[4]) and a[4][:3].upper() == (b[4] or '')[:3].upper())),
+    }
+    emails = email_local(a[2]), email_local(b[2])
+    phones = normalize_phone(a[3]), normalize_phone(b[3])
+    if all(emails) or all(phones):
+        same_phone = all(phones) and phones[0] == phones[1]
+        weights['contact'] = (0.25, max(similarity(*emails) if all(emails) else 0.0, float(same_phone)))
+    total = sum(weight for weight, _ in weights.values())
+    return round(sum(weight * value for weight, value in weights.values()) / total, 3)
+
+
+def rebuild_keys(batch_size=BATCH_SIZE):
+    """Recompute the blocking keys of every member (anonymized ones have none)."""
+    with transaction.atomic():
+        MemberBlockingKey.objects.all().delete()
+        batch = []
+        members = Member.objects.filter(anonymized_at__isnull=True).values_list('pk', *DETAIL_FIELDS)
+        for pk, *details in members.iterator(chunk_size=batch_size):
+            batch.extend(MemberBlockingKey(member_id=pk, key=key) for key in blocking_keys(*details))
+            if len(batch) >= batch_size:
+                MemberBlockingKey.objects.bulk_create(batch)
+                batch = []
+        MemberBlockingKey.objects.bulk_create(batch)
+
+
+def candidate_pairs():
+    """Map each pair of members sharing a usable block to the kinds of keys shared."""
+    usable = (
+        MemberBlockingKey.objects.values('key')
+        .annotate(size=Count('id'))
+        .filter(size__gt=1, size__lte=MAX_BLOCK_SIZE)
+        .values('key')
+    )
+    rows = (
+        MemberBlockingKey.objects.filter(key__in=usable)
+        .order_by('key', 'member_id')
+        .values_list('key', 'member_id')
+    )
+    pairs = defaultdict(set)
+    for key, block in groupby(rows.iterator(chunk_size=BATCH_SIZE), key=lambda row: row[0]):
+        kind = key.split(':', 1)[0]
+        for (_, a), (_, b) in combinations(block, 2):
+            pairs[a, b].add(kind)
+    return pairs
+
+
+def find_duplicates(threshold=SCORE_THRESHOLD):
+    """
+    Refresh the blocking keys and the review queue. Pending candidates are
+    rescored, and dropped when they no longer reach `threshold`; dismissed
+    and merged ones are left alone. Returns the number of pairs scored.
+    """
+    rebuild_keys()
+    pairs = candidate_pairs()
+    pks = list({pk for pair in pairs for pk in pair})
+    details = {}
+    for start in range(0, len(pks), BATCH_SIZE):
+        for pk, *values in Member.objects.filter(pk__in=pks[start:start + BATCH_SIZE]).values_list('pk', *DETAIL_FIELDS):
+            details[pk] = values
+
+    candidates = []
+    for (a, b), kinds in pairs.items():
+        if a not in details or b not in details:
+            continue
+        pair_score = score(details[a], details[b])
+        if pair_score >= threshold:
+            candidates.append(DuplicateCandidate(
+                member_a_id=a, member_b_id=b, score=pair_score, reasons=sorted(kinds),
+            ))
+    with transaction.atomic():
+        reviewed = set(
+            DuplicateCandidate.objects.exclude(status=DuplicateCandidate.Status.PENDING)
+            .values_list('member_a_id', 'member_b_id')
+        )
+        kept = {(c.member_a_id, c.member_b_id) for c in candidates}
+        stale = [
+            pk for pk, a, b in DuplicateCandidate.objects.filter(status=DuplicateCandidate.Status.PENDING)
+            .values_list('pk', 'member_a_id', 'member_b_id')
+            if (a, b) not in kept
+        ]
+        for start in range(0, len(stale), BATCH_SIZE):
+            DuplicateCandidate.objects.filter(pk__in=stale[start:start + BATCH_SIZE]).delete()
+        DuplicateCandidate.objects.bulk_create(
+            [c for c in candidates if (c.member_a_id, c.member_b_id) not in reviewed],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['member_a', 'member_b'],
+            update_fields=['score', 'reasons'],
+        )
+    return len(pairs)
+
+
+def merge(keep, duplicate, reviewed_by=None):
+    """
+    Fold `duplicate` into `keep` and delete it. Every row pointing at the
+    duplicate (family links, donations, registrations, students,
+    reservations, notifications...) is re-pointed with one UPDATE per
+    table; where that would break a unique constraint (both registered to
+    the same event...) the duplicate's row is dropped. `keep` inherits
+    the groups, and the email or phone it lacks.
+    """
+    if keep.pk == duplicate.pk:
+        raise ValueError('Cannot merge a member into itself.')
+
+    with transaction.atomic():
+        keep, duplicate = (
+            Member.objects.select_for_update().get(pk=keep.pk),
+            Member.objects.select_for_update().get(pk=duplicate.pk),
+        )
+        # A link between the two would become a link of `keep` to itself.
+        MemberFamily.objects.filter(
+            Q(member=keep, related_member=duplicate) | Q(member=duplicate, related_member=keep)
+        ).delete()
+        for relation in Member._meta.related_objects:
+            # Segment rows go with the duplicate (keeping the counts right) and `keep` is re-evaluated.
+            skipped = (DuplicateCandidate, MemberBlockingKey, SegmentMember)
+            if not relation.one_to_many or relation.related_model in skipped:
+                continue
+            _repoint(relation.related_model, relation.field.name, keep, duplicate)
+        keep.groups.add(*duplicate.groups.all())
+        keep.user_permissions.add(*duplicate.user_permissions.all())
+
+        DuplicateCandidate.objects.filter(
+            Q(member_a=duplicate) | Q(member_b=duplicate), status=DuplicateCandidate.Status.PENDING,
+        ).exclude(Q(member_a=keep) | Q(member_b=keep)).delete()
+        DuplicateCandidate.objects.filter(
+            Q(member_a=keep, member_b=duplicate) | Q(member_a=duplicate, member_b=keep)
+        ).update(status=DuplicateCandidate.Status.MERGED, reviewed_at=timezone.now(), reviewed_by=reviewed_by)
+
+        inherited = [field for field in ('email', 'phone') if not getattr(keep, field) and getattr(duplicate, field)]
+        values = {field: getattr(duplicate, field) for field in inherited}
+        duplicate.delete()
+        if inherited:
+            for field, value in values.items():
+                setattr(keep, field, value)
+            keep.save(update_fields=[*inherited, 'updated_at'])
+        # Family links were moved with update(): join the two households.
+        households.refresh(members=[keep.pk])
+        queue_refresh([keep.pk])
+    return keep
+
+
+def _repoint(model, field, keep, duplicate):
+    rows = model._base_manager.filter(**{field: duplicate})
+    for unique in model._meta.unique_together:
+        if field in unique:
+            others = [name for name in unique if name != field]
+            clash = model._base_manager.filter(**{field: keep}, **{name: OuterRef(name) for name in others})
+            rows.filter(Exists(clash)).delete()
+    if rows.update(**{field: keep}):
+        # update() sends no signals.
+        invalidate_model_cache(model)
+
+
+# Signal receivers, connected in MembersConfig.ready().
+
+def member_deleted(sender, instance, **kwargs):
+    """pre_delete: a pending pair would be left with one side null."""
+    DuplicateCandidate.objects.filter(
+        Q(member_a=instance) | Q(member_b=instance), status=DuplicateCandidate.Status.PENDING,
+    ).delete()
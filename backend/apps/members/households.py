@@ -0,0 +1,206 @@
+"""
+Household index.
+
+A household is a connected component of the MemberFamily graph (edges
+between `member` and `related_member`). Each member of one carries its
+`household_id`, so a whole household is one indexed lookup instead of a
+recursive walk over family links; members without any link have none.
+
+The index is refreshed incrementally: saving or deleting a family link,
+or deleting a member, recomputes only the households around it (see the
+receivers below). Bulk updates of MemberFamily send no signals: call
+refresh() with the members involved, or rebuild() to recompute
+everything.
+"""
+import uuid
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.db.models.functions import ExtractYear
+
+from core.authentication import invalidate_users
+from core.cache import invalidate_model_cache
+from .models import Member, MemberFamily
+
+BATCH_SIZE = 1000
+
+
+def components(edges):
+    """Group the nodes of `edges` (pairs) into connected components (union-find)."""
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for a, b in edges:
+        parent[find(a)] = find(b)
+    groups = defaultdict(set)
+    for node in list(parent):
+        groups[find(node)].add(node)
+    return list(groups.values())
+
+
+def _edges(queryset):
+    return queryset.filter(related_member__isnull=False).values_list('member_id', 'related_member_id')
+
+
+def refresh(members=(), households=()):
+    """
+    Recompute the households of `members`, of every member of `households`
+    and of everyone now linked to them.
+    """
+    seeds = set(members)
+    households = {household for household in households if household}
+    with transaction.atomic():
+        if seeds:
+            households |= set(
+                Member.objects.filter(pk__in=seeds, household_id__isnull=False).values_list('household_id', flat=True)
+            )
+        if households:
+            seeds |= set(Member.objects.filter(household_id__in=households).values_list('pk', flat=True))
+
+        # Walk the family links out from the seeds, one query per step.
+        nodes, frontier, edges = set(seeds), set(seeds), set()
+        while frontier:
+            found = set(_edges(MemberFamily.objects.filter(
+                Q(member_id__in=frontier) | Q(related_member_id__in=frontier)
+            )))
+            edges |= found
+            frontier = {node for edge in found for node in edge} - nodes
+            nodes |= frontier
+
+        current = dict(Member.objects.filter(pk__in=nodes).values_list('pk', 'household_id'))
+        _assign(components(edges), current)
+
+
+def rebuild():
+    """Recompute every household from the family links."""
+    with transaction.atomic():
+        groups = components(_edges(MemberFamily.objects.all()).iterator())
+        linked = {pk for group in groups for pk in group}
+        current = {
+            pk: household
+            for pk, household in Member.objects.values_list('pk', 'household_id').iterator()
+            if household or pk in linked
+        }
+        _assign(groups, current)
+
+
+def _assign(groups, current):
+    """
+    Give each group of two or more members one household id, reusing the
+    id most of it already has so a refresh rewrites as few rows as
+    possible; members left alone lose theirs. `current` maps every member
+    concerned to its household id.
+    """
+    targets = {}
+    used = set()
+    for group in sorted(groups, key=len, reverse=True):
+        if len(group) < 2:
+            continue
+        counts = Counter(current[pk] for pk in group if current.get(pk) and current[pk] not in used)
+        household = counts.most_common(1)[0][0] if counts else uuid.uuid4()
+        used.add(household)
+        for pk in group:
+            targets[pk] = household
+    changes = defaultdict(list)
+    for pk, household in current.items():
+        if targets.get(pk) != household:
+            changes[targets.get(pk)].append(pk)
+    for household, pks in changes.items():
+        for start in range(0, len(pks), BATCH_SIZE):
+            Member.objects.filter(pk__in=pks[start:start + BATCH_SIZE]).update(household_id=household)
+    if changes:
+        # update() sends no signals.
+        invalidate_model_cache(Member)
+        invalidate_users([pk for pks in changes.values() for pk in pks])
+
+
+def household_members(member):
+    """The members of `member`'s household (just `member` when it has none)."""
+    if member.household_id:
+        return Member.objects.filter(household_id=member.household_id)
+    return Member.objects.filter(pk=member.pk)
+
+
+def _scope(member, field):
+    if member.household_id:
+        return {f'{field}__household_id': member.household_id}
+    return {field: member}
+
+
+def summary(member):
+    """
+    A household's members, students and completed donations per year, in
+    three indexed queries whatever the size of the family tree.
+    """
+    from apps.education.models import Student
+    from apps.finance.models import Donation
+
+    donations = (
+        Donation.objects.filter(status=Donation.Status.COMPLETED, **_scope(member, 'member'))
+        .annotate(year=ExtractYear('donated_at'))
+        .values('year')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by('year')
+    )
+    return {
+        'household_id': member.household_id,
+        'members': list(household_members(member).order_by('last_name', 'first_name')),
+        'students': list(Student.objects.filter(**_scope(member, 'parent_member')).order_by('last_name', 'first_name')),
+        'donations': list(donations),
+    }
+
+
+def one_per_household(queryset):
+    """
+    Narrow a member queryset to one member per household (the one with the
+    smallest id within the queryset), e.g. for household-level mailings.
+    """
+    sibling = queryset.filter(household_id=OuterRef('household_id'), pk__lt=OuterRef('pk'))
+    return queryset.exclude(Exists(sibling))
+
+
+# Signal receivers, connected in MembersConfig.ready().
+
+def remember_edge(sender, instance, raw=False, **kwargs):
+    """pre_save: keep the link as stored, in case the save moves it."""
+    if raw or instance._state.adding:
+        return
+    instance._stored_edge = (
+        MemberFamily.objects.filter(pk=instance.pk).values_list('member_id', 'related_member_id').first()
+    )
+
+
+def update_on_edge_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    stored = getattr(instance, '_stored_edge', None) or ()
+    edge = (instance.member_id, instance.related_member_id)
+    if instance.related_member_id is None and not any(stored):
+        return
+    if tuple(stored) != edge:
+        refresh(members={*stored, *edge} - {None})
+
+
+def update_on_edge_delete(sender, instance, **kwargs):
+    if instance.related_member_id:
+        refresh(members={instance.member_id, instance.related_member_id})
+
+
+def remember_household(sender, instance, **kwargs):
+    """pre_delete: the stored household, which the instance may not know."""
+    instance._stored_household = (
+        Member.objects.filter(pk=instance.pk).values_list('household_id', flat=True).first()
+    )
+
+
+def update_on_member_delete(sender, instance, **kwargs):
+    household = getattr(instance, '_stored_household', instance.household_id)
+    if household:
+        refresh(households=[household])
@@ -0,0 +1,262 @@
+"""
+Bulk member import from CSV or XLSX files.
+
+Rows are read lazily, validated one by one and inserted with bulk_create
+in batches, so a registry of thousands of members is a handful of
+queries instead of one hashed-password INSERT per API call. Imported
+members get an unusable password and must go through password reset.
+"""
+import codecs
+import csv
+import io
+import os
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from apps.communications.segments import queue_refresh
+from core.cache import invalidate_model_cache
+from core.utils import validate_quebec_postal_code
+from . import stats
+from .models import Member, generate_guid
+
+# Accepted column headers (lower-cased) for each member field.
+COLUMNS = {
+    'first_name': ('first_name', 'prénom', 'prenom'),
+    'last_name': ('last_name', 'nom', 'nom de famille'),
+    'email': ('email', 'courriel', 'adresse courriel'),
+    'phone': ('phone', 'téléphone', 'telephone', 'tél', 'tel'),
+    'postal_code': ('postal_code', 'code postal'),
+    'sex': ('sex', 'sexe'),
+    'status': ('status', 'statut'),
+}
+HEADER_ALIASES = {alias: field for field, aliases in COLUMNS.items() for alias in aliases}
+
+
+class ImportFileError(Exception):
+    """The uploaded file cannot be read at all."""
+
+
+def read_rows(fileobj, filename):
+    """
+    Yield `(line_number, row)` for each data row, `row` being a dict of
+    member fields. Line numbers match the spreadsheet (the header is 1).
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        rows = _read_csv(fileobj)
+    elif extension in ('.xlsx', '.xlsm'):
+        rows = _read_xlsx(fileobj)
+    else:
+        raise ImportFileError('Format non supporté : utilisez un fichier .csv ou .xlsx.')
+
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise ImportFileError('Le fichier est vide.')
+    fields = [HEADER_ALIASES.get(str(name or '').strip().lower()) for name in header]
+    if not {'email', 'phone'} & set(fields):
+        raise ImportFileError('Colonne « courriel » ou « téléphone » introuvable.')
+
+    for line, values in enumerate(rows, start=2):
+        row = {
+            field: str(value).strip()
+            for field, value in zip(fields, values)
+            if field and value is not None
+        }
+        if any(row.values()):
+            yield line, row
+
+
+def _encoding(fileobj):
+    """UTF-8 if the whole file decodes as such, else Windows-1252 (Excel's CSV in Québec)."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for chunk in iter(lambda: fileobj.read(64 * 1024), b''):
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return 'cp1252'
+    finally:
+        fileobj.seek(0)
+    return 'utf-8-sig'
+
+
+def _read_csv(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding=_encoding(fileobj), newline='')
+    try:
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(text, dialect)
+    except UnicodeDecodeError:
+        raise ImportFileError('Le fichier CSV doit être encodé en UTF-8 ou Windows-1252.')
+    finally:
+        # Leave the caller's file open.
+        if not fileobj.closed:
+            text.detach()
+
+
+def _read_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("L'import XLSX nécessite le paquet openpyxl.")
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception:
+        raise ImportFileError('Fichier XLSX illisible.')
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def clean_row(row):
+    """Return `(member fields, errors)` for one row, normalized like Member.save()."""
+    errors = {}
+    data = {
+        'first_name': row.get('first_name', ''),
+        'last_name': row.get('last_name', ''),
+        'email': row.get('email', '').lower() or None,
+        'phone': ''.join(filter(str.isdigit, row.get('phone', ''))) or None,
+        'postal_code': row.get('postal_code', '').upper(),
+        'sex': row.get('sex', '').upper()[:1] or None,
+    }
+
+    if not data['email'] and not data['phone']:
+        errors['email'] = ['Un courriel ou un numéro de téléphone est requis.']
+    if data['email']:
+        try:
+            validate_email(data['email'])
+        except ValidationError:
+            errors['email'] = ['Adresse courriel invalide.']
+    if data['phone'] and len(data['phone']) != 10:
+        errors['phone'] = ['Le numéro de téléphone doit comporter exactement 10 chiffres.']
+    if not validate_quebec_postal_code(data['postal_code']):
+        errors['postal_code'] = ['Code postal invalide (format A1A 1A1).']
+    if data['sex'] and data['sex'] not in Member.Sex.values:
+        errors['sex'] = ['Valeur invalide (M ou F).']
+
+    status = row.get('status', '').upper()
+    if status:
+        if status not in Member.Status.values:
+            errors['status'] = ['Statut invalide.']
+        data['status'] = status
+
+    return data, errors
+
+
+class MemberImporter:
+    """
+    Validate and insert rows from read_rows().
+
+        report = MemberImporter().run(read_rows(fh, 'registre.xlsx'))
+
+    `report` holds the created/skipped counts and a per-row error list.
+    With `dry_run`, everything is validated and deduplicated but nothing
+    is written.
+    """
+
+    def __init__(self, batch_size=500, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.created = 0
+        self.errors = []
+        self._seen_emails = set()
+        self._seen_phones = set()
+
+    def run(self, rows):
+        batch = []
+        for line, row in rows:
+            data, errors = clean_row(row)
+            if errors:
+                self.errors.append({'row': line, 'errors': errors})
+                continue
+            batch.append((line, data))
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+
+        if self.created and not self.dry_run:
+            invalidate_model_cache(Member)
+        return self.report()
+
+    def report(self):
+        return {
+            'created': self.created,
+            'skipped': len(self.errors),
+            'dry_run': self.dry_run,
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+        }
+
+    def _flush(self, batch):
+        """Drop duplicates of existing members or earlier rows, then insert."""
+        emails = {data['email'] for _, data in batch if data['email']}
+        phones = {data['phone'] for _, data in batch if data['phone']}
+        existing_emails, existing_phones = set(), set()
+        for email, phone in (
+            Member.objects.annotate(email_lower=Lower('email'))
+            .filter(Q(email_lower__in=emails) | Q(phone__in=phones))
+            .values_list('email_lower', 'phone')
+        ):
+            existing_emails.add(email)
+            existing_phones.add(phone)
+        existing_emails.discard(None)
+        existing_phones.discard(None)
+
+        members = []
+        for line, data in batch:
+            errors = {}
+            if data['email'] in existing_emails:
+                errors['email'] = ['Un membre avec ce courriel existe déjà.']
+            elif data['email'] in self._seen_emails:
+                errors['email'] = ['Courriel en double dans le fichier.']
+            if data['phone'] in existing_phones:
+                errors['phone'] = ['Un membre avec ce numéro de téléphone existe déjà.']
+            elif data['phone'] in self._seen_phones:
+                errors['phone'] = ['Numéro de téléphone en double dans le fichier.']
+            if errors:
+                self.errors.append({'row': line, 'errors': errors})
+                continue
+
+            if data['email']:
+                self._seen_emails.add(data['email'])
+            if data['phone']:
+                self._seen_phones.add(data['phone'])
+            members.append((line, Member(
+                username=generate_guid(),
+                # Unusable, and cheap: no hashing for imported members.
+                password=make_password(None),
+                must_change_password=True,
+                **data,
+            )))
+
+        if self.dry_run or not members:
+            self.created += len(members)
+            return
+        try:
+            with transaction.atomic():
+                Member.objects.bulk_create([member for _, member in members])
+                stats.record_changes(after=[stats.stats_key(member) for _, member in members])
+                # bulk_create() sends no signals.
+                queue_refresh([member.pk for _, member in members])
+            self.created += len(members)
+        except IntegrityError:
+            # Someone registered concurrently: insert one by one to find out who.
+            for line, member in members:
+                try:
+                    with transaction.atomic():
+                        member.save(force_insert=True)
+                    self.created += 1
+                except IntegrityError:
+                    self.errors.append({'row': line, 'errors': {'__all__': ['Membre déjà existant.']}})
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.members import dedup
+from apps.members.models import DuplicateCandidate
+
+
+class Command(BaseCommand):
+    help = 'Refreshes the member duplicate review queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=dedup.SCORE_THRESHOLD)
+
+    def handle(self, *args, **options):
+        pairs = dedup.find_duplicates(threshold=options['threshold'])
+        pending = DuplicateCandidate.objects.filter(status=DuplicateCandidate.Status.PENDING).count()
+        self.stdout.write(self.style.SUCCESS(f'{pairs} pair(s) compared, {pending} candidate(s) awaiting review.'))
@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.members.importer import ImportFileError, MemberImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Imports members from a CSV or XLSX registry'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate and report without creating anyone.')
+        parser.add_argument('--report', help='Write the per-row error report to this JSON file.')
+
+    def handle(self, *args, **options):
+        importer = MemberImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        try:
+            with open(options['path'], 'rb') as fh:
+                report = importer.run(read_rows(fh, options['path']))
+        except (ImportFileError, OSError) as exc:
+            raise CommandError(str(exc))
+
+        for error in report['errors']:
+            messages = '; '.join(f"{field}: {' '.join(msgs)}" for field, msgs in error['errors'].items())
+            self.stdout.write(self.style.WARNING(f"Ligne {error['row']}: {messages}"))
+        if options['report']:
+            with open(options['report'], 'w') as fh:
+                json.dump(report, fh, indent=2, ensure_ascii=False)
+
+        verb = 'would be created' if options['dry_run'] else 'created'
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} member(s) {verb}, {report['skipped']} row(s) skipped."
+        ))
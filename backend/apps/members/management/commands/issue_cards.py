@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.members.cards import issue_cards
+
+
+class Command(BaseCommand):
+    help = 'Issues the annual cards of active members and renders their QR codes and barcodes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Defaults to the current year.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int,
+                            help='Rendering processes (default: one per CPU, 0 to render in-process).')
+
+    def handle(self, *args, **options):
+        report = issue_cards(year=options['year'], batch_size=options['batch_size'], workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['year']}: {report['created']} card(s) created, {report['rendered']} rendered."
+        ))
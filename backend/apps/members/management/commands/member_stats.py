@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.members import stats
+
+
+class Command(BaseCommand):
+    help = 'Recounts the membership dashboard statistics or takes a snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['rebuild', 'snapshot'])
+
+    def handle(self, *args, **options):
+        if options['action'] == 'rebuild':
+            stats.rebuild()
+            self.stdout.write(self.style.SUCCESS('Member statistics recounted.'))
+        else:
+            stats.snapshot()
+            self.stdout.write(self.style.SUCCESS('Snapshot taken.'))
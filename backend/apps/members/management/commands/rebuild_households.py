@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.members import households
+from apps.members.models import Member
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the household index from the family links'
+
+    def handle(self, *args, **options):
+        households.rebuild()
+        count = Member.objects.exclude(household_id=None).values('household_id').distinct().count()
+        self.stdout.write(self.style.SUCCESS(f'{count} household(s).'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.members import retention
+
+
+class Command(BaseCommand):
+    help = 'Anonymizes members whose Law 25 retention date has passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--time-budget', type=int, help='Stop after this many seconds; the next run resumes.')
+
+    def handle(self, *args, **options):
+        current = retention.sweep(batch_size=options['batch_size'], time_budget=options['time_budget'])
+        state = 'finished' if current.finished_at else 'paused'
+        self.stdout.write(self.style.SUCCESS(
+            f'Sweep {state}: {current.members} member(s), {current.notifications} notification(s) '
+            f'and {current.family_links} family link(s) anonymized.'
+        ))
@@ -0,0 +1,64 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:39
+
+import apps.members.models
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('members', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='member',
+            managers=[
+            ],
+        ),
+        migrations.RenameField(
+            model_name='member',
+            old_name='gender',
+            new_name='sex',
+        ),
+        migrations.RemoveField(
+            model_name='member',
+            name='membership_type',
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='must_change_password',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='postal_code',
+            field=models.CharField(default='', max_length=10),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='member',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='member',
+            name='phone',
+            field=models.CharField(blank=True, max_length=20, null=True, unique=True, validators=[django.core.validators.RegexValidator(message='Le numéro de téléphone doit comporter exactement 10 chiffres.', regex='^\\d{10}$')]),
+        ),
+        migrations.AlterField(
+            model_name='member',
+            name='username',
+            field=models.CharField(default=apps.members.models.generate_guid, max_length=150, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['created_at', 'id'], name='members_created_57b673_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['phone'], name='members_phone_c64f9d_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:56
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+# PostgreSQL only: the search configuration, the trigger maintaining
+# members.search_vector and the GIN indexes used by apps.members.search.
+CREATE_SEARCH_SQL = """
+CREATE TEXT SEARCH CONFIGURATION french_unaccent (COPY = french);
+ALTER TEXT SEARCH CONFIGURATION french_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+
+-- unaccent() is only STABLE; index expressions need an IMMUTABLE wrapper.
+CREATE FUNCTION immutable_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+CREATE FUNCTION member_search_name(first_name text, last_name text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$ SELECT immutable_unaccent(lower(coalesce(first_name, '') || ' ' || coalesce(last_name, ''))) $$;
+
+CREATE FUNCTION members_search_vector_update() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('french_unaccent', coalesce(NEW.first_name, '') || ' ' || coalesce(NEW.last_name, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(NEW.email, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(NEW.phone, '')), 'B');
+    RETURN NEW;
+END $$;
+
+CREATE TRIGGER members_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF first_name, last_name, email, phone ON members
+    FOR EACH ROW EXECUTE FUNCTION members_search_vector_update();
+
+UPDATE members SET first_name = first_name;
+
+CREATE INDEX members_search_vector_gin ON members USING gin (search_vector);
+CREATE INDEX members_search_name_trgm ON members USING gin (member_search_name(first_name, last_name) gin_trgm_ops);
+CREATE INDEX members_email_trgm ON members USING gin (lower(email) gin_trgm_ops);
+CREATE INDEX members_phone_trgm ON members USING gin (phone gin_trgm_ops);
+"""
+
+DROP_SEARCH_SQL = """
+DROP INDEX IF EXISTS members_phone_trgm;
+DROP INDEX IF EXISTS members_email_trgm;
+DROP INDEX IF EXISTS members_search_name_trgm;
+DROP INDEX IF EXISTS members_search_vector_gin;
+DROP TRIGGER IF EXISTS members_search_vector_trigger ON members;
+DROP FUNCTION IF EXISTS members_search_vector_update();
+DROP FUNCTION IF EXISTS member_search_name(text, text);
+DROP FUNCTION IF EXISTS immutable_unaccent(text);
+DROP TEXT SEARCH CONFIGURATION IF EXISTS french_unaccent;
+"""
+
+
+def create_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SEARCH_SQL)
+
+
+def drop_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0002_alter_member_managers_rename_gender_member_sex_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.AddField(
+            model_name='member',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search, drop_search),
+    ]
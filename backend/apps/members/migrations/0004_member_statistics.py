@@ -0,0 +1,75 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:04
+
+import uuid
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Substr, Upper
+
+
+def count_existing_members(apps, schema_editor):
+    """Initial counts; same buckets as apps.members.stats.rebuild()."""
+    Member = apps.get_model('members', 'Member')
+    MemberStatistic = apps.get_model('members', 'MemberStatistic')
+    counts = Counter({('total', ''): 0})
+    rows = (
+        Member.objects.annotate(postal_area=Upper(Substr('postal_code', 1, 3)))
+        .values('status', 'sex', 'postal_area')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+    for row in rows:
+        for bucket in (
+            ('total', ''),
+            ('status', row['status'] or ''),
+            ('sex', row['sex'] or ''),
+            ('postal_area', row['postal_area'] or ''),
+        ):
+            counts[bucket] += row['count']
+    MemberStatistic.objects.bulk_create(
+        MemberStatistic(dimension=dimension, value=value, count=count)
+        for (dimension, value), count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0003_member_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberStatistic',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('status', 'Statut'), ('sex', 'Sexe'), ('postal_area', "Région de tri d'acheminement")], max_length=20)),
+                ('value', models.CharField(blank=True, max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Statistique des membres',
+                'verbose_name_plural': 'Statistiques des membres',
+                'db_table': 'member_statistics',
+                'unique_together': {('dimension', 'value')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MemberStatisticSnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('status', 'Statut'), ('sex', 'Sexe'), ('postal_area', "Région de tri d'acheminement")], max_length=20)),
+                ('value', models.CharField(blank=True, max_length=20)),
+                ('count', models.IntegerField()),
+            ],
+            options={
+                'verbose_name': 'Instantané des statistiques',
+                'verbose_name_plural': 'Instantanés des statistiques',
+                'db_table': 'member_statistic_snapshots',
+                'unique_together': {('date', 'dimension', 'value')},
+            },
+        ),
+        migrations.RunPython(count_existing_members, migrations.RunPython.noop),
+    ]
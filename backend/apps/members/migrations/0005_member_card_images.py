@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0004_member_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='membercard',
+            name='barcode',
+            field=models.ImageField(blank=True, upload_to='cards/', verbose_name='Code-barres'),
+        ),
+        migrations.AddField(
+            model_name='membercard',
+            name='qr_code',
+            field=models.ImageField(blank=True, upload_to='cards/', verbose_name='Code QR'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:11
+
+import uuid
+from django.db import migrations, models
+
+RETENTION_INDEX = models.Index(
+    fields=['data_retention_date', 'id'],
+    condition=models.Q(anonymized_at__isnull=True, data_retention_date__isnull=False),
+    name='members_retention_due_idx',
+)
+
+
+def add_retention_index(apps, schema_editor):
+    # CONCURRENTLY on PostgreSQL, so writes to members are not blocked meanwhile.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS members_retention_due_idx '
+            'ON members (data_retention_date, id) '
+            'WHERE anonymized_at IS NULL AND data_retention_date IS NOT NULL'
+        )
+    else:
+        schema_editor.add_index(apps.get_model('members', 'Member'), RETENTION_INDEX)
+
+
+def remove_retention_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('members', 'Member'), RETENTION_INDEX)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('members', '0005_member_card_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RetentionSweep',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('cutoff', models.DateField(help_text='Members whose retention date is before this day are anonymized')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('last_retention_date', models.DateField(blank=True, null=True)),
+                ('last_member_id', models.UUIDField(blank=True, null=True)),
+                ('members', models.PositiveIntegerField(default=0)),
+                ('notifications', models.PositiveIntegerField(default=0)),
+                ('family_links', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Purge Loi 25',
+                'verbose_name_plural': 'Purges Loi 25',
+                'db_table': 'member_retention_sweeps',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='anonymized_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[migrations.AddIndex(model_name='member', index=RETENTION_INDEX)],
+            database_operations=[migrations.RunPython(add_retention_index, remove_retention_index)],
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:17
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0006_retention_sweep'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('score', models.FloatField()),
+                ('reasons', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('PENDING', 'À examiner'), ('MERGED', 'Fusionnés'), ('DISMISSED', 'Écartés')], default='PENDING', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('member_a', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('member_b', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Doublon potentiel',
+                'verbose_name_plural': 'Doublons potentiels',
+                'db_table': 'member_duplicate_candidates',
+                'indexes': [models.Index(fields=['status', '-score', 'id'], name='member_dupl_status_64d5e9_idx')],
+                'unique_together': {('member_a', 'member_b')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MemberBlockingKey',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=100)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Clé de regroupement',
+                'verbose_name_plural': 'Clés de regroupement',
+                'db_table': 'member_blocking_keys',
+                'indexes': [models.Index(fields=['key', 'member'], name='member_bloc_key_326693_idx')],
+                'unique_together': {('member', 'key')},
+            },
+        ),
+    ]
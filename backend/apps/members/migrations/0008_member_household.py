@@ -0,0 +1,45 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:21
+
+import uuid
+
+from django.db import migrations, models
+
+
+def build_households(apps, schema_editor):
+    """Initial households; same components as apps.members.households.rebuild()."""
+    Member = apps.get_model('members', 'Member')
+    MemberFamily = apps.get_model('members', 'MemberFamily')
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    edges = MemberFamily.objects.filter(related_member__isnull=False).values_list('member_id', 'related_member_id')
+    for a, b in edges.iterator():
+        parent[find(a)] = find(b)
+    groups = {}
+    for node in list(parent):
+        groups.setdefault(find(node), []).append(node)
+    for pks in groups.values():
+        if len(pks) > 1:
+            Member.objects.filter(pk__in=pks).update(household_id=uuid.uuid4())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0007_member_duplicates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='household_id',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(build_households, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:25
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.utils.text import slugify
+
+# PostgreSQL only: trigram index matching search terms to skill slugs.
+CREATE_TRGM_SQL = 'CREATE INDEX skills_slug_trgm ON skills USING gin (slug gin_trgm_ops);'
+DROP_TRGM_SQL = 'DROP INDEX IF EXISTS skills_slug_trgm;'
+
+# Same as apps.members.skills.LEVEL_WORDS.
+LEVEL_WORDS = {
+    **dict.fromkeys(['debutant', 'debutante', 'beginner', 'novice', 'base', 'notions'], 1),
+    **dict.fromkeys(['intermediaire', 'intermediate', 'moyen', 'moyenne'], 2),
+    **dict.fromkeys(['avance', 'avancee', 'advanced', 'confirme', 'confirmee'], 3),
+    **dict.fromkeys(['expert', 'experte', 'professionnel', 'professionnelle', 'pro'], 4),
+}
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_TRGM_SQL)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_TRGM_SQL)
+
+
+def link_skills(apps, schema_editor):
+    """Initial taxonomy; same keys as apps.members.skills.link_all()."""
+    Skill = apps.get_model('members', 'Skill')
+    MemberSkill = apps.get_model('members', 'MemberSkill')
+    skills = {}
+    for name in list(MemberSkill.objects.order_by().values_list('skill_name', flat=True).distinct()):
+        slug = slugify(name)[:100]
+        if not slug:
+            continue
+        if slug not in skills:
+            skills[slug] = Skill.objects.create(slug=slug, name=' '.join(name.split())[:100])
+        MemberSkill.objects.filter(skill_name=name).update(skill=skills[slug])
+    for proficiency in list(MemberSkill.objects.order_by().values_list('proficiency', flat=True).distinct()):
+        for word in slugify(proficiency).split('-'):
+            level = LEVEL_WORDS.get(word) or (int(word) if word in ('1', '2', '3', '4') else None)
+            if level:
+                MemberSkill.objects.filter(proficiency=proficiency).update(level=level)
+                break
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0008_member_household'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('aliases', models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                'verbose_name': 'Compétence (répertoire)',
+                'verbose_name_plural': 'Compétences (répertoire)',
+                'db_table': 'skills',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='memberskill',
+            name='level',
+            field=models.PositiveSmallIntegerField(blank=True, choices=[(1, 'Débutant'), (2, 'Intermédiaire'), (3, 'Avancé'), (4, 'Expert')], editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='memberskill',
+            name='skill',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='member_skills', to='members.skill'),
+        ),
+        migrations.AddIndex(
+            model_name='memberskill',
+            index=models.Index(fields=['skill', '-level', 'member'], name='member_skills_directory_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.RunPython(link_skills, migrations.RunPython.noop),
+    ]
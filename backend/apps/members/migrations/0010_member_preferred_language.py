@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0009_skill_directory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='preferred_language',
+            field=models.CharField(choices=[('fr', 'Français'), ('en', 'Anglais'), ('ar', 'Arabe')], default='fr', max_length=2),
+        ),
+    ]
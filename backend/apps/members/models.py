@@ -1,8 +1,10 @@
 import uuid
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
+from django.utils.text import slugify
 
 
 def generate_guid():
@@ -46,6 +48,11 @@ class Member(AbstractUser):
         ACTIVE = 'ACTIVE', 'Actif'
         INACTIVE = 'INACTIVE', 'Inactif'
         PENDING = 'PENDING', 'En attente'
+
+    class Language(models.TextChoices):
+        FRENCH = 'fr', 'Français'
+        ENGLISH = 'en', 'Anglais'
+        ARABIC = 'ar', 'Arabe'
     
     username = models.CharField(max_length=150, unique=True, default=generate_guid)
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -60,12 +67,19 @@ class Member(AbstractUser):
     sex = models.CharField(max_length=1, choices=Sex.choices, blank=True, null=True)
     status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
     postal_code = models.CharField(max_length=10)
+    preferred_language = models.CharField(max_length=2, choices=Language.choices, default=Language.FRENCH)
     must_change_password = models.BooleanField(default=True)
     
     # Law 25 Compliance (Quebec)
     consent_timestamp = models.DateTimeField(null=True, blank=True)
     consent_version = models.CharField(max_length=20, null=True, blank=True)
     data_retention_date = models.DateField(null=True, blank=True)
+    anonymized_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Connected component of the family links, see apps.members.households.
+    household_id = models.UUIDField(null=True, blank=True, editable=False, db_index=True)
+
+    # Maintained by a database trigger on PostgreSQL, see apps.members.search.
+    search_vector = SearchVectorField(null=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -81,8 +95,15 @@ class Member(AbstractUser):
         verbose_name_plural = 'Membres'
         indexes = [
             models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['created_at', 'id']),
             models.Index(fields=['email']),
             models.Index(fields=['phone']),
+            # Members due for anonymization, see apps.members.retention.
+            models.Index(
+                fields=['data_retention_date', 'id'],
+                condition=models.Q(anonymized_at__isnull=True, data_retention_date__isnull=False),
+                name='members_retention_due_idx',
+            ),
         ]
 
     def clean(self):
@@ -98,6 +119,20 @@ class Member(AbstractUser):
             self.phone = ''.join(filter(str.isdigit, self.phone))
         super().save(*args, **kwargs)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the dashboard buckets as loaded, see apps.members.stats.
+        from .stats import stats_key
+        instance._stats_key = stats_key(instance)
+        return instance
+
+    def get_session_auth_hash(self):
+        # Members from the auth cache carry the hash instead of the password, see core.authentication.
+        if 'password' not in self.__dict__ and '_session_auth_hash' in self.__dict__:
+            return self._session_auth_hash
+        return super().get_session_auth_hash()
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email or self.phone or self.username})"
 
@@ -124,19 +159,58 @@ class MemberFamily(models.Model):
         verbose_name_plural = 'Relations familiales'
 
 
+class Skill(models.Model):
+    """Normalized skill of the volunteer directory, see apps.members.skills."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    slug = models.SlugField(max_length=100, unique=True)
+    name = models.CharField(max_length=100)
+    # Other spellings, as slugs ('patisserie' for 'cuisine'...).
+    aliases = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        db_table = 'skills'
+        verbose_name = 'Compétence (répertoire)'
+        verbose_name_plural = 'Compétences (répertoire)'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        if not isinstance(self.aliases, list) or not all(isinstance(alias, str) for alias in self.aliases):
+            raise ValidationError({'aliases': 'Indiquez une liste de libellés.'})
+        self.aliases = sorted({slugify(alias) for alias in self.aliases} - {'', self.slug})
+
+
 class MemberSkill(models.Model):
     """Skills that members can offer."""
+
+    class Level(models.IntegerChoices):
+        BEGINNER = 1, 'Débutant'
+        INTERMEDIATE = 2, 'Intermédiaire'
+        ADVANCED = 3, 'Avancé'
+        EXPERT = 4, 'Expert'
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='skills')
     skill_name = models.CharField(max_length=100)
     proficiency = models.CharField(max_length=50, blank=True)
+    # Normalized from skill_name / proficiency on save, see apps.members.skills.
+    skill = models.ForeignKey(
+        Skill, on_delete=models.PROTECT, null=True, blank=True, editable=False, related_name='member_skills'
+    )
+    level = models.PositiveSmallIntegerField(choices=Level.choices, null=True, blank=True, editable=False)
     
     class Meta:
         db_table = 'member_skills'
         verbose_name = 'Compétence'
         verbose_name_plural = 'Compétences'
         unique_together = ['member', 'skill_name']
+        indexes = [
+            # Inverted index of the directory: the members of a skill, best level first.
+            models.Index(fields=['skill', '-level', 'member'], name='member_skills_directory_idx'),
+        ]
 
 
 class MemberContribution(models.Model):
@@ -174,9 +248,115 @@ class MemberCard(models.Model):
     year = models.PositiveIntegerField()
     issued_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateField(null=True, blank=True)
+    qr_code = models.ImageField(upload_to='cards/', blank=True, verbose_name="Code QR")
+    barcode = models.ImageField(upload_to='cards/', blank=True, verbose_name="Code-barres")
     
     class Meta:
         db_table = 'member_cards'
         verbose_name = 'Carte de membre'
         verbose_name_plural = 'Cartes de membre'
         unique_together = ['member', 'year']
+
+
+class MemberStatistic(models.Model):
+    """Running member counts per dashboard bucket, see apps.members.stats."""
+
+    class Dimension(models.TextChoices):
+        TOTAL = 'total', 'Total'
+        STATUS = 'status', 'Statut'
+        SEX = 'sex', 'Sexe'
+        POSTAL_AREA = 'postal_area', 'Région de tri d\'acheminement'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    dimension = models.CharField(max_length=20, choices=Dimension.choices)
+    value = models.CharField(max_length=20, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'member_statistics'
+        verbose_name = 'Statistique des membres'
+        verbose_name_plural = 'Statistiques des membres'
+        unique_together = ['dimension', 'value']
+
+
+class MemberStatisticSnapshot(models.Model):
+    """Daily copy of MemberStatistic, for growth curves."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField()
+    dimension = models.CharField(max_length=20, choices=MemberStatistic.Dimension.choices)
+    value = models.CharField(max_length=20, blank=True)
+    count = models.IntegerField()
+
+    class Meta:
+        db_table = 'member_statistic_snapshots'
+        verbose_name = 'Instantané des statistiques'
+        verbose_name_plural = 'Instantanés des statistiques'
+        unique_together = ['date', 'dimension', 'value']
+
+
+class RetentionSweep(models.Model):
+    """One run of the Law 25 retention sweep: progress checkpoint and audit record."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    cutoff = models.DateField(help_text="Members whose retention date is before this day are anonymized")
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Keyset cursor of the last anonymized member.
+    last_retention_date = models.DateField(null=True, blank=True)
+    last_member_id = models.UUIDField(null=True, blank=True)
+    members = models.PositiveIntegerField(default=0)
+    notifications = models.PositiveIntegerField(default=0)
+    family_links = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'member_retention_sweeps'
+        verbose_name = 'Purge Loi 25'
+        verbose_name_plural = 'Purges Loi 25'
+        ordering = ['-started_at']
+
+
+class MemberBlockingKey(models.Model):
+    """Blocking keys of a member for duplicate detection, see apps.members.dedup."""
+
+    id = models.BigAutoField(primary_key=True)
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=100)
+
+    class Meta:
+        db_table = 'member_blocking_keys'
+        verbose_name = 'Clé de regroupement'
+        verbose_name_plural = 'Clés de regroupement'
+        unique_together = ['member', 'key']
+        indexes = [
+            models.Index(fields=['key', 'member']),
+        ]
+
+
+class DuplicateCandidate(models.Model):
+    """Pair of members that may be the same person, awaiting review."""
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'À examiner'
+        MERGED = 'MERGED', 'Fusionnés'
+        DISMISSED = 'DISMISSED', 'Écartés'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Kept (null) once the member is merged away, as a record of the merge.
+    member_a = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, related_name='+')
+    member_b = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, related_name='+')
+    score = models.FloatField()
+    reasons = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    reviewed_by = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        db_table = 'member_duplicate_candidates'
+        verbose_name = 'Doublon potentiel'
+        verbose_name_plural = 'Doublons potentiels'
+        unique_together = ['member_a', 'member_b']
+        indexes = [
+            models.Index(fields=['status', '-score', 'id']),
+        ]
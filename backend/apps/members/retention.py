@@ -0,0 +1,140 @@
+"""
+Law 25 retention sweep.
+
+Members whose `data_retention_date` has passed are anonymized in batches:
+each batch is one short transaction of set-based UPDATEs on the rows it
+picked (locked with SKIP LOCKED, so members being edited are simply left
+for the next run), never a lock on the whole table. The personal data of
+notifications and family links pointing at them is cleared as well, and
+their deduplication keys and pending duplicate pairs are deleted.
+
+Due members are read in (data_retention_date, id) order from a partial
+index holding only members not yet anonymized. A RetentionSweep row
+records the cutoff, the keyset cursor after every batch and the counts;
+an interrupted or time-boxed sweep resumes from it on the next run and
+stays behind as the audit record once finished.
+"""
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from apps.communications.models import NewsletterDelivery, Notification
+from apps.communications.segments import queue_refresh
+from core.authentication import invalidate_users
+from core.cache import invalidate_model_cache
+from . import stats
+from .models import DuplicateCandidate, Member, MemberBlockingKey, MemberFamily, RetentionSweep
+
+
+def due_members(cutoff):
+    """Members not yet anonymized whose retention date is before `cutoff`."""
+    return Member.objects.filter(anonymized_at__isnull=True, data_retention_date__lt=cutoff)
+
+
+def anonymize(pks):
+    """
+    Anonymize these members, their notifications and the family links
+    naming them, with one UPDATE per table. Returns the counts.
+    """
+    pks = list(pks)
+    rows = list(
+        Member.objects.filter(pk__in=pks, anonymized_at__isnull=True)
+        .values_list('pk', *stats.TRACKED_FIELDS)
+    )
+    pks = [pk for pk, *_ in rows]
+    if not pks:
+        return {'members': 0, 'notifications': 0, 'family_links': 0}
+
+    now = timezone.now()
+    counts = {
+        'members': Member.objects.filter(pk__in=pks).update(
+            first_name='',
+            last_name='',
+            email=None,
+            phone=None,
+            sex=None,
+            postal_code='',
+            password=make_password(None),
+            is_active=False,
+            status=Member.Status.INACTIVE,
+            anonymized_at=now,
+            updated_at=now,
+        ),
+        'notifications': Notification.objects.filter(member_id__in=pks).update(
+            subject='', content='', error_message='', updated_at=now,
+        ),
+        'family_links': MemberFamily.objects.filter(
+            Q(member_id__in=pks) | Q(related_member_id__in=pks)
+        ).update(first_name='', last_name=''),
+    }
+    # Provider errors may quote the address.
+    NewsletterDelivery.objects.filter(member_id__in=pks).exclude(error_message='').update(error_message='')
+    Token.objects.filter(user_id__in=pks).delete()
+    # Blocking keys hold the phone, email local part and phonetic names.
+    MemberBlockingKey.objects.filter(member_id__in=pks).delete()
+    DuplicateCandidate.objects.filter(
+        Q(member_a_id__in=pks) | Q(member_b_id__in=pks), status=DuplicateCandidate.Status.PENDING,
+    ).delete()
+    stats.record_changes(
+        before=[stats.bucket_key(status, sex, postal_code) for _, status, sex, postal_code in rows],
+        after=[stats.bucket_key(Member.Status.INACTIVE, None, '')] * len(rows),
+    )
+    # Anonymized members leave every segment.
+    queue_refresh(pks)
+
+    def invalidate():
+        # update() sends no signals.
+        for model in (Member, Notification, NewsletterDelivery, MemberFamily):
+            invalidate_model_cache(model)
+        invalidate_users(pks)
+    transaction.on_commit(invalidate)
+    return counts
+
+
+def sweep(batch_size=500, time_budget=None):
+    """
+    Anonymize due members, resuming the unfinished sweep if there is one.
+    Stops after `time_budget` seconds if given; returns the RetentionSweep.
+    """
+    current = RetentionSweep.objects.filter(finished_at__isnull=True).order_by('started_at').first()
+    if current is None:
+        current = RetentionSweep.objects.create(cutoff=timezone.localdate())
+    deadline = time.monotonic() + time_budget if time_budget else None
+
+    while not _sweep_batch(current, batch_size):
+        if deadline and time.monotonic() >= deadline:
+            return current
+    current.finished_at = timezone.now()
+    current.save(update_fields=['finished_at'])
+    return current
+
+
+def _sweep_batch(current, batch_size):
+    """Anonymize the next batch and checkpoint. Returns True when nothing is left."""
+    queryset = due_members(current.cutoff)
+    if current.last_member_id:
+        queryset = queryset.filter(
+            Q(data_retention_date__gt=current.last_retention_date)
+            | Q(data_retention_date=current.last_retention_date, pk__gt=current.last_member_id)
+        )
+    with transaction.atomic():
+        batch = list(
+            queryset.select_for_update(skip_locked=True)
+            .order_by('data_retention_date', 'pk')
+            .values_list('pk', 'data_retention_date')[:batch_size]
+        )
+        if not batch:
+            return True
+        counts = anonymize(pk for pk, _ in batch)
+        current.last_member_id, current.last_retention_date = batch[-1]
+        current.members += counts['members']
+        current.notifications += counts['notifications']
+        current.family_links += counts['family_links']
+        current.save(update_fields=[
+            'last_member_id', 'last_retention_date', 'members', 'notifications', 'family_links',
+        ])
+    return len(batch) < batch_size
@@ -0,0 +1,71 @@
+"""
+Member search.
+
+On PostgreSQL, members are matched on a `search_vector` column kept up to
+date by a trigger (names in the accent-insensitive `french_unaccent`
+configuration, email and phone as-is) and, for typos and partial names,
+on trigram word similarity. Every predicate is served by a GIN index
+created in migration 0003. Results are ranked best match first.
+
+Other databases fall back to case-insensitive substring matching.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q, TextField, Value
+from django.db.models.functions import Cast, Greatest, Lower
+from rest_framework.filters import SearchFilter
+
+SEARCH_CONFIG = 'french_unaccent'
+RANK_ORDERING = ('-search_rank', '-id')
+
+
+def is_ranked() -> bool:
+    """Whether searches are ranked (and paginated by rank)."""
+    return connection.vendor == 'postgresql'
+
+
+def search_members(queryset, term: str):
+    """Filter `queryset` to members matching `term`, annotated with `search_rank`."""
+    term = ' '.join(term.split())
+    if not term:
+        return queryset
+
+    digits = ''.join(filter(str.isdigit, term))
+    if not is_ranked():
+        condition = (
+            Q(first_name__icontains=term) | Q(last_name__icontains=term) | Q(email__icontains=term)
+        )
+        if digits:
+            condition |= Q(phone__contains=digits)
+        return queryset.filter(condition)
+
+    query = SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+    needle = Func(Lower(Value(term)), function='immutable_unaccent', output_field=TextField())
+    queryset = queryset.annotate(
+        # Same expressions as the trigram indexes, so the planner can use them.
+        search_name=Func(F('first_name'), F('last_name'), function='member_search_name', output_field=TextField()),
+        search_email=Lower('email'),
+        # Both scores are float4; as double precision the rank round-trips
+        # exactly through the pagination cursor, so ties at a page boundary
+        # still compare equal on the next page.
+        search_rank=Cast(
+            Greatest(SearchRank(F('search_vector'), query), TrigramWordSimilarity(needle, 'search_name')),
+            FloatField(),
+        ),
+    )
+    condition = (
+        Q(search_vector=query)
+        | Q(search_name__trigram_word_similar=needle)
+        | Q(search_email__contains=term.lower())
+    )
+    if len(digits) >= 3:
+        condition |= Q(phone__contains=digits)
+    return queryset.filter(condition)
+
+
+class MemberSearchFilter(SearchFilter):
+    """`?search=` backend for MemberViewSet, see search_members()."""
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '')
+        return search_members(queryset, term)
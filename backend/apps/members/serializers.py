@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Member, MemberFamily, MemberSkill, MemberContribution, MemberCard
+from core.serializers import DynamicFieldsModelSerializer
+from .models import Member, MemberFamily, MemberSkill, MemberContribution, MemberCard, DuplicateCandidate
 
 
 class MemberFamilySerializer(serializers.ModelSerializer):
@@ -26,7 +27,7 @@ class MemberCardSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class MemberSerializer(serializers.ModelSerializer):
+class MemberSerializer(DynamicFieldsModelSerializer):
     families = MemberFamilySerializer(many=True, read_only=True)
     skills = MemberSkillSerializer(many=True, read_only=True)
     contributions = MemberContributionSerializer(many=True, read_only=True)
@@ -36,10 +37,69 @@ class MemberSerializer(serializers.ModelSerializer):
         model = Member
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name', 
-            'phone', 'sex', 'status', 'postal_code', 'is_staff', 'date_joined',
+            'phone', 'sex', 'status', 'postal_code', 'preferred_language', 'is_staff', 'date_joined',
             'must_change_password',
             'consent_timestamp', 'consent_version', 'data_retention_date',
-            'created_at', 'updated_at',
+            'household_id', 'created_at', 'updated_at',
             'families', 'skills', 'contributions', 'cards'
         ]
-        read_only_fields = ['id', 'username', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'username', 'household_id', 'created_at', 'updated_at']
+        expandable_fields = ['families', 'skills', 'contributions', 'cards']
+
+
+class MemberBulkStatusSerializer(serializers.Serializer):
+    """Input of MemberViewSet.bulk_status."""
+    action = serializers.ChoiceField(choices=['approve', 'deactivate'])
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, max_length=10000)
+
+
+class DuplicateMemberSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Member
+        fields = ['id', 'first_name', 'last_name', 'email', 'phone', 'postal_code', 'status', 'created_at']
+
+
+class DuplicateCandidateSerializer(serializers.ModelSerializer):
+    member_a = DuplicateMemberSerializer(read_only=True)
+    member_b = DuplicateMemberSerializer(read_only=True)
+
+    class Meta:
+        model = DuplicateCandidate
+        fields = ['id', 'member_a', 'member_b', 'score', 'reasons', 'status', 'created_at', 'reviewed_at']
+
+
+class DuplicateMergeSerializer(serializers.Serializer):
+    """Input of DuplicateCandidateViewSet.merge: the member to keep (default: member_a)."""
+    keep = serializers.UUIDField(required=False)
+
+
+class HouseholdDonationsSerializer(serializers.Serializer):
+    year = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    count = serializers.IntegerField()
+
+
+class HouseholdSerializer(serializers.Serializer):
+    """Output of MemberViewSet.household, see apps.members.households.summary()."""
+    household_id = serializers.UUIDField(allow_null=True)
+    members = DuplicateMemberSerializer(many=True)
+    students = serializers.SerializerMethodField()
+    donations = HouseholdDonationsSerializer(many=True)
+
+    def get_students(self, data):
+        from apps.education.serializers import StudentSerializer
+        return StudentSerializer(data['students'], many=True).data
+
+
+class VolunteerSerializer(serializers.ModelSerializer):
+    """Output of MemberSkillViewSet.volunteers, see apps.members.skills.find_volunteers()."""
+    proximity = serializers.IntegerField()
+    best_level = serializers.IntegerField(allow_null=True)
+    best_skill = serializers.CharField()
+
+    class Meta:
+        model = Member
+        fields = [
+            'id', 'first_name', 'last_name', 'email', 'phone', 'postal_code',
+            'best_skill', 'best_level', 'proximity',
+        ]
@@ -0,0 +1,235 @@
+"""
+Volunteer skill directory.
+
+Members type their skills as free text ('Cuisine', 'cuisine ', 'Pâtisserie'
+...). On save, each MemberSkill is linked to a Skill of the taxonomy by
+slug (accents, case and punctuation folded; a Skill's `aliases` send
+other spellings to it) and its proficiency is read into a `level`, so the
+directory groups and ranks on exact keys instead of scanning text.
+
+The (skill, level, member) index on member_skills is the inverted index:
+the posting list of a skill, best level first. On PostgreSQL, the query
+term is matched against skill slugs through a trigram GIN index, so
+'cuisin' or 'jardinnage' still find their skill.
+
+Facet counts (skills, levels, postal areas) are cached per generation of
+the tables they read; bulk writes must call link_all(), which also
+invalidates them.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, Count, Exists, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Replace, Substr, Upper
+from django.db.models.lookups import Exact, StartsWith
+from django.utils.text import slugify
+
+from core.cache import get_generation, invalidate_model_cache
+from .models import Member, MemberSkill, Skill
+
+TAXONOMY_KEY = 'skills:taxonomy:{generation}'
+FACETS_KEY = 'skills:facets:{generations}:{digest}'
+FACETS_TIMEOUT = 300
+FACET_SIZE = 20
+MAX_MATCHED_SKILLS = 20
+
+# Words of the proficiency text giving its level, as slugs.
+LEVEL_WORDS = {
+    **dict.fromkeys(['debutant', 'debutante', 'beginner', 'novice', 'base', 'notions'], MemberSkill.Level.BEGINNER),
+    **dict.fromkeys(['intermediaire', 'intermediate', 'moyen', 'moyenne'], MemberSkill.Level.INTERMEDIATE),
+    **dict.fromkeys(['avance', 'avancee', 'advanced', 'confirme', 'confirmee'], MemberSkill.Level.ADVANCED),
+    **dict.fromkeys(['expert', 'experte', 'professionnel', 'professionnelle', 'pro'], MemberSkill.Level.EXPERT),
+}
+
+
+def normalize(name) -> str:
+    """Taxonomy key of a skill name ('  Pâtisserie fine' -> 'patisserie-fine')."""
+    return slugify(name or '')[:100]
+
+
+def parse_level(proficiency):
+    """MemberSkill.Level read from free text ('Très avancé' -> ADVANCED), or None."""
+    for word in normalize(proficiency).split('-'):
+        if word in LEVEL_WORDS:
+            return LEVEL_WORDS[word]
+        if word.isdigit() and int(word) in MemberSkill.Level.values:
+            return MemberSkill.Level(int(word))
+    return None
+
+
+def taxonomy():
+    """Map every slug and alias of the taxonomy to its Skill id."""
+    key = TAXONOMY_KEY.format(generation=get_generation(Skill))
+    mapping = cache.get(key)
+    if mapping is None:
+        mapping = {}
+        rows = list(Skill.objects.values_list('pk', 'slug', 'aliases'))
+        for pk, _, aliases in rows:
+            mapping.update(dict.fromkeys(aliases or (), pk))
+        # Slugs win over aliases.
+        mapping.update({slug: pk for pk, slug, _ in rows})
+        cache.set(key, mapping, None)
+    return mapping
+
+
+def resolve(name):
+    """Id of the Skill for a free-text name, added to the taxonomy if new."""
+    slug = normalize(name)
+    if not slug:
+        return None
+    if pk := taxonomy().get(slug):
+        return pk
+    skill, _ = Skill.objects.get_or_create(slug=slug, defaults={'name': ' '.join(name.split())[:100]})
+    return skill.pk
+
+
+def link_all():
+    """
+    Link the rows saved without signals (bulk_create, COPY...) to the
+    taxonomy and read their levels, one UPDATE per distinct value.
+    Returns the number of rows updated.
+    """
+    updated = 0
+    unlinked = MemberSkill.objects.filter(skill__isnull=True)
+    for name in list(unlinked.order_by().values_list('skill_name', flat=True).distinct()):
+        updated += unlinked.filter(skill_name=name).update(skill=resolve(name))
+    unleveled = MemberSkill.objects.filter(level__isnull=True)
+    for proficiency in list(unleveled.order_by().values_list('proficiency', flat=True).distinct()):
+        if level := parse_level(proficiency):
+            updated += unleveled.filter(proficiency=proficiency).update(level=level)
+    if updated:
+        # update() sends no signals.
+        invalidate_model_cache(MemberSkill)
+    return updated
+
+
+def match_skills(term):
+    """Ids of the skills a search term designates: an exact slug or alias, else similar slugs."""
+    slug = normalize(term)
+    if not slug:
+        return []
+    if pk := taxonomy().get(slug):
+        return [pk]
+    condition = Q(slug__contains=slug)
+    if connection.vendor == 'postgresql':
+        condition |= Q(slug__trigram_similar=slug)
+    return list(Skill.objects.filter(condition).values_list('pk', flat=True)[:MAX_MATCHED_SKILLS])
+
+
+def normalize_postal_code(postal_code) -> str:
+    return ''.join((postal_code or '').split()).upper()
+
+
+def directory(skills=None, min_level=None, area=''):
+    """The skills of active members, narrowed to `skills` (ids), a minimum level and a postal area."""
+    queryset = MemberSkill.objects.filter(skill__isnull=False, member__status=Member.Status.ACTIVE)
+    if skills is not None:
+        queryset = queryset.filter(skill__in=skills)
+    if min_level:
+        queryset = queryset.filter(level__gte=min_level)
+    if area := normalize_postal_code(area):
+        queryset = queryset.filter(member__postal_code__istartswith=area)
+    return queryset
+
+
+def facets(skills=None, min_level=None, area=''):
+    """
+    Number of members per skill, level and postal area (first three
+    characters of the postal code) within the narrowed directory.
+    """
+    params = repr((sorted(map(str, skills)) if skills is not None else None, min_level, normalize_postal_code(area)))
+    key = FACETS_KEY.format(
+        generations='.'.join(str(get_generation(model)) for model in (Skill, MemberSkill, Member)),
+        digest=hashlib.md5(params.encode('utf-8')).hexdigest(),
+    )
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    rows = directory(skills, min_level, area)
+    members = Count('member', distinct=True)
+    levels = dict(MemberSkill.Level.choices)
+    data = {
+        'total': rows.aggregate(count=members)['count'],
+        'skills': [
+            {'value': slug, 'label': name, 'count': count}
+            for slug, name, count in rows.values('skill__slug', 'skill__name').annotate(count=members)
+            .order_by('-count', 'skill__name').values_list('skill__slug', 'skill__name', 'count')[:FACET_SIZE]
+        ],
+        'levels': [
+            {'value': level, 'label': levels.get(level, 'Non précisé'), 'count': count}
+            for level, count in rows.values('level').annotate(count=members)
+            .order_by(F('level').desc(nulls_last=True)).values_list('level', 'count')
+        ],
+        'postal_areas': [
+            {'value': prefix, 'label': prefix, 'count': count}
+            for prefix, count in rows.annotate(area=Upper(Substr('member__postal_code', 1, 3)))
+            .values('area').annotate(count=members)
+            .order_by('-count', 'area').values_list('area', 'count')[:FACET_SIZE]
+        ],
+    }
+    cache.set(key, data, FACETS_TIMEOUT)
+    return data
+
+
+def proximity(near):
+    """
+    How close a member's postal code is to `near`: 3 same code, 2 same
+    area (first three characters), 1 same region (first letter), else 0.
+    """
+    near = normalize_postal_code(near)
+    if not near:
+        return Value(0, output_field=IntegerField())
+    code = Upper(Replace('postal_code', Value(' '), Value('')))
+    whens = [When(StartsWith(code, near[:1]), then=1)]
+    if len(near) >= 3:
+        whens.insert(0, When(StartsWith(code, near[:3]), then=2))
+    if len(near) >= 6:
+        whens.insert(0, When(Exact(code, near), then=3))
+    return Case(*whens, default=0, output_field=IntegerField())
+
+
+def find_volunteers(term, near='', min_level=None, limit=50):
+    """
+    Active members offering the skill `term`, closest to the postal code
+    `near` first, then best level first. Returns `(skill ids, members)`,
+    members annotated with `proximity`, `best_level` and `best_skill`.
+    """
+    skills = match_skills(term)
+    offered = MemberSkill.objects.filter(member=OuterRef('pk'), skill__in=skills)
+    if min_level:
+        offered = offered.filter(level__gte=min_level)
+    best = offered.order_by(F('level').desc(nulls_last=True), 'skill__name')
+    members = (
+        Member.objects.filter(status=Member.Status.ACTIVE)
+        .filter(Exists(offered))
+        .annotate(
+            proximity=proximity(near),
+            best_level=Subquery(best.values('level')[:1]),
+            best_skill=Subquery(best.values('skill__name')[:1]),
+        )
+        .order_by('-proximity', F('best_level').desc(nulls_last=True), 'last_name', 'first_name', 'id')
+    )
+    return skills, members[:limit]
+
+
+# Signal receivers, connected in MembersConfig.ready().
+
+def normalize_on_save(sender, instance, raw=False, **kwargs):
+    """pre_save: link the skill to the taxonomy and read its level."""
+    if raw:
+        return
+    instance.skill_id = resolve(instance.skill_name)
+    instance.level = parse_level(instance.proficiency)
+
+
+def fold_aliases(sender, instance, raw=False, **kwargs):
+    """post_save: move the members of skills that became aliases of `instance`, drop those skills."""
+    if raw or not instance.aliases:
+        return
+    folded = Skill.objects.filter(slug__in=instance.aliases).exclude(pk=instance.pk)
+    if MemberSkill.objects.filter(skill__in=folded).update(skill=instance):
+        # update() sends no signals.
+        invalidate_model_cache(MemberSkill)
+    folded.delete()
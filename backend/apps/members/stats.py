@@ -0,0 +1,165 @@
+"""
+Membership dashboard statistics.
+
+MemberStatistic holds one running count per (dimension, value) bucket:
+the total, each status, each sex and each postal area (the first three
+characters of the postal code). Saving or deleting a member moves it
+between buckets with a couple of `count = count ± 1` UPDATEs in the same
+transaction, so the dashboard reads a few hundred rows at most whatever
+the number of members.
+
+Bulk writes send no signals: call record_changes() with what changed, or
+rebuild() to recount from scratch. snapshot() copies the counts of the
+day into MemberStatisticSnapshot for growth curves.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Substr, Upper
+from django.utils import timezone
+
+from .models import Member, MemberStatistic, MemberStatisticSnapshot
+
+Dimension = MemberStatistic.Dimension
+TRACKED_FIELDS = ('status', 'sex', 'postal_code')
+
+
+def stats_key(member):
+    """
+    The buckets a member counts in, as a tuple of (dimension, value), or
+    None when the tracked fields were not loaded (deferred).
+    """
+    values = member.__dict__
+    if any(field not in values for field in TRACKED_FIELDS):
+        return None
+    return bucket_key(values['status'], values['sex'], values['postal_code'])
+
+
+def bucket_key(status, sex, postal_code):
+    return (
+        (Dimension.TOTAL, ''),
+        (Dimension.STATUS, status or ''),
+        (Dimension.SEX, sex or ''),
+        (Dimension.POSTAL_AREA, (postal_code or '')[:3].upper()),
+    )
+
+
+def record_changes(before=(), after=()):
+    """
+    Apply the move of members between buckets: `before` and `after` are
+    iterables of stats_key()/bucket_key() tuples of the removed and added
+    states.
+    """
+    deltas = Counter()
+    for key in before:
+        deltas.subtract(key)
+    for key in after:
+        deltas.update(key)
+    for (dimension, value), delta in sorted(deltas.items()):
+        if delta:
+            _increment(dimension, value, delta)
+
+
+def _increment(dimension, value, delta):
+    bucket = MemberStatistic.objects.filter(dimension=dimension, value=value)
+    if bucket.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            MemberStatistic.objects.create(dimension=dimension, value=value, count=delta)
+    except IntegrityError:
+        # Created concurrently.
+        bucket.update(count=F('count') + delta)
+
+
+def rebuild():
+    """Recount every bucket from the members table."""
+    counts = Counter()
+    rows = (
+        Member.objects.annotate(postal_area=Upper(Substr('postal_code', 1, 3)))
+        .values('status', 'sex', 'postal_area')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+    for row in rows:
+        for bucket in bucket_key(row['status'], row['sex'], row['postal_area']):
+            counts[bucket] += row['count']
+    counts.setdefault((Dimension.TOTAL, ''), 0)
+
+    with transaction.atomic():
+        MemberStatistic.objects.all().delete()
+        MemberStatistic.objects.bulk_create(
+            MemberStatistic(dimension=dimension, value=value, count=count)
+            for (dimension, value), count in counts.items()
+        )
+
+
+def snapshot(date=None):
+    """Store today's counts (or replace them if already taken)."""
+    date = date or timezone.localdate()
+    with transaction.atomic():
+        MemberStatisticSnapshot.objects.filter(date=date).delete()
+        MemberStatisticSnapshot.objects.bulk_create(
+            MemberStatisticSnapshot(date=date, dimension=stat.dimension, value=stat.value, count=stat.count)
+            for stat in MemberStatistic.objects.all()
+        )
+
+
+def dashboard(days=90):
+    """Current counts per dimension, plus the status snapshots of the last `days` days."""
+    data = {'total': 0, 'by_status': {}, 'by_sex': {}, 'by_postal_area': {}}
+    keys = {
+        Dimension.STATUS: 'by_status',
+        Dimension.SEX: 'by_sex',
+        Dimension.POSTAL_AREA: 'by_postal_area',
+    }
+    for dimension, value, count in MemberStatistic.objects.values_list('dimension', 'value', 'count'):
+        if dimension == Dimension.TOTAL:
+            data['total'] = count
+        elif count:
+            data[keys[dimension]][value] = count
+
+    since = timezone.localdate() - timedelta(days=days)
+    growth = {}
+    for date, dimension, value, count in (
+        MemberStatisticSnapshot.objects
+        .filter(date__gte=since, dimension__in=[Dimension.TOTAL, Dimension.STATUS])
+        .order_by('date')
+        .values_list('date', 'dimension', 'value', 'count')
+    ):
+        point = growth.setdefault(date, {'date': date})
+        point[value or 'total'] = count
+    data['growth'] = list(growth.values())
+    return data
+
+
+# Signal receivers, connected in MembersConfig.ready().
+
+def remember_stats_key(sender, instance, raw=False, **kwargs):
+    """pre_save: fetch the stored buckets when the instance does not know them."""
+    if raw or instance._state.adding or getattr(instance, '_stats_key', None) is not None:
+        return
+    stored = Member.objects.filter(pk=instance.pk).values_list(*TRACKED_FIELDS).first()
+    instance._stats_key = bucket_key(*stored) if stored else None
+
+
+def update_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new = stats_key(instance)
+    if new is None:
+        # Some tracked fields are deferred: read what was actually stored.
+        stored = Member.objects.filter(pk=instance.pk).values_list(*TRACKED_FIELDS).first()
+        new = bucket_key(*stored)
+    old = None if created else getattr(instance, '_stats_key', None)
+    if old != new:
+        record_changes(before=[old] if old else [], after=[new])
+    instance._stats_key = new
+
+
+def update_on_delete(sender, instance, **kwargs):
+    key = getattr(instance, '_stats_key', None) or stats_key(instance)
+    if key:
+        record_changes(before=[key])
@@ -0,0 +1,60 @@
+from celery import shared_task
+from django.conf import settings
+
+from apps.communications import outbox
+from apps.communications.models import Notification
+from . import cards, dedup, retention, stats
+from .models import Member
+
+WELCOME_SUBJECT = 'Bienvenue à l\'ACML'
+WELCOME_MESSAGE = (
+    'Bonjour {first_name},\n\n'
+    'Votre adhésion a été approuvée. Bienvenue dans la communauté!\n'
+)
+
+
+@shared_task
+def send_welcome_notifications(member_ids):
+    """Queue the welcome email of newly approved members in the notification outbox."""
+    members = (
+        Member.objects.filter(pk__in=member_ids, status=Member.Status.ACTIVE)
+        .exclude(email=None)
+        .only('id', 'first_name')
+    )
+    notifications = outbox.enqueue([
+        Notification(
+            member=member,
+            channel=Notification.Channel.EMAIL,
+            subject=WELCOME_SUBJECT,
+            content=WELCOME_MESSAGE.format(first_name=member.first_name),
+        )
+        for member in members
+    ])
+    return len(notifications)
+
+
+@shared_task
+def snapshot_member_statistics():
+    """Daily snapshot of the dashboard counts (Celery beat)."""
+    stats.snapshot()
+
+
+@shared_task
+def issue_member_cards(year=None):
+    """Annual card issuance, see apps.members.cards."""
+    return cards.issue_cards(year=year)
+
+
+@shared_task
+def sweep_data_retention():
+    """Law 25 retention sweep (Celery beat); queues itself again until done."""
+    current = retention.sweep(time_budget=settings.RETENTION_SWEEP_TIME_BUDGET)
+    if current.finished_at is None:
+        sweep_data_retention.delay()
+    return current.members
+
+
+@shared_task
+def find_member_duplicates():
+    """Refresh the duplicate review queue (Celery beat)."""
+    return dedup.find_duplicates()
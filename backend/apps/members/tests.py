@@ -1,8 +1,23 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connection
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import Member, MemberFamily, MemberSkill
+from core.middleware import reset_metrics_switch
+from . import cards, dedup, households, retention, skills, stats
+from .models import (
+    DuplicateCandidate, Member, MemberCard, MemberFamily, MemberSkill, MemberStatistic, RetentionSweep, Skill,
+)
+from .search import is_ranked
 
 Member = get_user_model()
 
@@ -152,3 +167,791 @@ class MemberAPITest(APITestCase):
         self.client.force_authenticate(user=self.admin)
         response = self.client.get('/api/members/members/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class MemberPaginationTest(APITestCase):
+    """Test keyset cursor pagination on the members list."""
+
+    def setUp(self):
+        self.admin = Member.objects.create_superuser(
+            email='admin@example.com',
+            password='admin123',
+            postal_code='J6E 2A1'
+        )
+        for i in range(6):
+            Member.objects.create_user(
+                email=f'member{i}@example.com',
+                password='testpass123',
+                postal_code='J6E 2A1'
+            )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_cursor_walks_every_member_once(self):
+        """Test following next links returns each member exactly once."""
+        seen = []
+        url = '/api/members/members/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen.extend(m['id'] for m in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+
+    def test_previous_link_returns_first_page(self):
+        """Test the previous cursor walks back to the same rows."""
+        first = self.client.get('/api/members/members/?page_size=3')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [m['id'] for m in back.data['results']],
+            [m['id'] for m in first.data['results']]
+        )
+
+    def test_invalid_cursor(self):
+        """Test a tampered cursor is rejected."""
+        response = self.client.get('/api/members/members/?cursor=cD1nYXJiYWdl')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MemberSparseFieldsTest(APITestCase):
+    """Test ?fields= and ?expand= on the members endpoints."""
+
+    def setUp(self):
+        self.admin = Member.objects.create_superuser(
+            email='admin@example.com',
+            password='admin123',
+            postal_code='J6E 2A1'
+        )
+        MemberSkill.objects.create(member=self.admin, skill_name='Cuisine')
+        self.client.force_authenticate(user=self.admin)
+
+    def test_relations_are_opt_in(self):
+        """Test nested relations are omitted unless expanded."""
+        response = self.client.get(f'/api/members/members/{self.admin.id}/')
+        self.assertNotIn('skills', response.data)
+        self.assertNotIn('families', response.data)
+
+        response = self.client.get(f'/api/members/members/{self.admin.id}/?expand=skills')
+        self.assertEqual(response.data['skills'][0]['skill_name'], 'Cuisine')
+        self.assertNotIn('families', response.data)
+
+    def test_sparse_fieldset(self):
+        """Test only requested fields are rendered."""
+        response = self.client.get('/api/members/members/?fields=id,first_name,status')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'first_name', 'status'})
+
+    def test_unexpanded_list_skips_prefetch(self):
+        """Test the list issues no prefetch queries for unrequested relations."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/members/members/')
+        self.assertFalse(any('member_skills' in q['sql'] for q in queries))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/members/members/?expand=skills')
+        self.assertTrue(any('member_skills' in q['sql'] for q in queries))
+
+
+class MemberConditionalGetTest(APITestCase):
+    """Test ETag / Last-Modified handling on the members endpoints."""
+
+    def setUp(self):
+        self.admin = Member.objects.create_superuser(
+            email='admin@example.com',
+            password='admin123',
+            postal_code='J6E 2A1'
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_detail_not_modified(self):
+        """Test a matching If-None-Match returns 304 on detail."""
+        url = f'/api/members/members/{self.admin.id}/'
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.admin.first_name = 'Changed'
+        self.admin.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_not_modified(self):
+        """Test the list ETag changes when a member is added."""
+        response = self.client.get('/api/members/members/')
+        etag = response['ETag']
+
+        response = self.client.get('/api/members/members/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Member.objects.create_user(email='new@example.com', password='pass', postal_code='J6E 2A1')
+        response = self.client.get('/api/members/members/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class RequestMetricsTest(APITestCase):
+    """Test the Server-Timing instrumentation middleware."""
+
+    def setUp(self):
+        cache.clear()
+        reset_metrics_switch()
+        self.admin = Member.objects.create_superuser(
+            email='admin@example.com',
+            password='admin123',
+            postal_code='J6E 2A1'
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def tearDown(self):
+        reset_metrics_switch()
+
+    def test_disabled_by_default(self):
+        """Test no Server-Timing header is sent when instrumentation is off."""
+        response = self.client.get('/api/members/members/')
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_METRICS_ENABLED=True)
+    def test_server_timing_header(self):
+        """Test query count and serialization time are reported."""
+        with self.assertLogs('acml.metrics', level='INFO') as logs:
+            response = self.client.get('/api/members/members/')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+        self.assertIn('"queries": 2', logs.output[0])
+
+    def test_runtime_switch(self):
+        """Test the cache switch overrides the setting."""
+        cache.set('metrics:enabled', True)
+        response = self.client.get('/api/members/members/')
+        self.assertIn('Server-Timing', response)
+
+
+class MemberSearchTest(APITestCase):
+    """Test ?search= and filters on the members list."""
+
+    def setUp(self):
+        self.admin = Member.objects.create_superuser(
+            email='admin@example.com',
+            password='admin123',
+            postal_code='J6E 2A1'
+        )
+        Member.objects.create_user(
+            email='amina@example.com', password='x', first_name='Amina', last_name='Haddad',
+            phone='5145550101', postal_code='H1A 1A1', status=Member.Status.ACTIVE,
+        )
+        Member.objects.create_user(
+            email='karim@example.com', password='x', first_name='Karim', last_name='Touati',
+            phone='4385550202', postal_code='H1A 1A1', status=Member.Status.PENDING,
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def search(self, query):
+        response = self.client.get('/api/members/members/', {'search': query})
+        return [m['email'] for m in response.data['results']]
+
+    def test_search_by_name_email_and_phone(self):
+        """Test a member is found by name, email or phone digits."""
+        self.assertEqual(self.search('haddad'), ['amina@example.com'])
+        self.assertEqual(self.search('karim@'), ['karim@example.com'])
+        self.assertEqual(self.search('438-555'), ['karim@example.com'])
+
+    @skipUnless(is_ranked(), 'Ranked search needs PostgreSQL.')
+    def test_ranked_pages_keep_ties(self):
+        """Test members tied on rank across a page boundary are all listed, once."""
+        emails = {'amina@example.com'}
+        for i in range(5):
+            emails.add(f'haddad{i}@example.com')
+            Member.objects.create_user(
+                email=f'haddad{i}@example.com', password='x', first_name='Amina', last_name='Haddad',
+                postal_code='H1A 1A1',
+            )
+        listed = []
+        url = '/api/members/members/?search=haddad&page_size=2'
+        while url:
+            response = self.client.get(url)
+            listed += [m['email'] for m in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(sorted(listed), sorted(emails))
+
+    def test_filterset_fields_are_applied(self):
+        """Test ?status= is honoured now that filter backends are configured."""
+        response = self.client.get('/api/members/members/', {'status': 'ACTIVE'})
+        self.assertEqual([m['email'] for m in response.data['results']], ['amina@example.com'])
+
+
+class MemberImportTest(APITestCase):
+    """Test the bulk CSV/XLSX import endpoint."""
+
+    def setUp(self):
+        self.admin = Member.objects.create_superuser(
+            email='admin@example.com',
+            password='admin123',
+            postal_code='J6E 2A1'
+        )
+        Member.objects.create_user(phone='5145550000', password='x', postal_code='H1A 1A1')
+        self.client.force_authenticate(user=self.admin)
+
+    def upload(self, content, name='registre.csv', **params):
+        upload = SimpleUploadedFile(name, content)
+        query = '?dry_run=1' if params.get('dry_run') else ''
+        return self.client.post(f'/api/members/members/import/{query}', {'file': upload}, format='multipart')
+
+    def test_csv_import_with_error_report(self):
+        """Test valid rows are created and invalid or duplicate rows reported."""
+        content = (
+            'Prénom;Nom;Courriel;Téléphone;Code postal\n'
+            'Amina;Haddad;Amina@Example.com;(514) 555-0101;h1a 1a1\n'
+            'Karim;Touati;;438 555 0202;H1A1A1\n'
+            'Omar;Saidi;admin@example.com;;H1A 1A1\n'
+            'Sara;Kaci;sara@example.com;514-555-0000;H1A 1A1\n'
+            'Leila;Brahimi;amina@example.com;;H1A 1A1\n'
+            'Ali;Ouali;ali@example;;12345\n'
+        ).encode('utf-8')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.upload(content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([e['row'] for e in response.data['errors']], [4, 5, 6, 7])
+        self.assertEqual(set(response.data['errors'][3]['errors']), {'email', 'postal_code'})
+        self.assertLess(len(queries), 10)
+
+        amina = Member.objects.get(email='amina@example.com')
+        self.assertEqual(amina.phone, '5145550101')
+        self.assertFalse(amina.has_usable_password())
+        self.assertTrue(Member.objects.filter(phone='4385550202', email=None).exists())
+
+    def test_xlsx_dry_run(self):
+        """Test an XLSX upload is validated without writing in dry-run mode."""
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        workbook.active.append(['first_name', 'last_name', 'email', 'postal_code'])
+        workbook.active.append(['Yasmine', 'Diallo', 'yasmine@example.com', 'H2B 2B2'])
+        buffer = BytesIO()
+        workbook.save(buffer)
+
+        response = self.upload(buffer.getvalue(), name='registre.xlsx', dry_run=True)
+        self.assertEqual(response.data['created'], 1)
+        self.assertFalse(Member.objects.filter(email='yasmine@example.com').exists())
+
+    def test_import_requires_admin(self):
+        """Test regular members cannot import."""
+        self.client.force_authenticate(user=Member.objects.get(phone='5145550000'))
+        response = self.upload(b'email\n')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_windows_1252_csv(self):
+        """Test an Excel CSV in Windows-1252 is imported rather than failing."""
+        content = 'Prénom;Nom;Courriel;Code postal\nHélène;Côté;helene@example.com;H1A 1A1\n'.encode('cp1252')
+        response = self.upload(content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(Member.objects.get(email='helene@example.com').last_name, 'Côté')
+
+
+
+class MemberBulkStatusTest(APITestCase):
+    """Test bulk approve / deactivate."""
+
+    def setUp(self):
+        self.admin = Member.objects.create_superuser(
+            email='admin@example.com',
+            password='admin123',
+            postal_code='J6E 2A1',
+            status=Member.Status.ACTIVE,
+        )
+        self.pending = [
+            Member.objects.create_user(email=f'pending{i}@example.com', password='x', postal_code='H1A 1A1')
+            for i in range(3)
+        ]
+        self.client.force_authenticate(user=self.admin)
+
+    def test_bulk_approve_by_ids(self):
+        """Test only pending members are approved and welcomed, in one UPDATE."""
+        ids = [str(m.id) for m in self.pending[:2]] + [str(self.admin.id)]
+        with patch('apps.members.views.send_welcome_notifications.delay') as delay, \
+                patch('apps.communications.tasks.refresh_segment_members.delay') as refresh, \
+                self.captureOnCommitCallbacks(execute=True) as callbacks, \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/members/members/bulk_status/', {'action': 'approve', 'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(response.data['skipped'], 1)
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('UPDATE "members"')]), 1)
+        self.assertEqual(len(callbacks), 2)
+        self.assertCountEqual(delay.call_args.args[0], ids[:2])
+        # The audience segments are re-evaluated for the approved members.
+        self.assertCountEqual(refresh.call_args.args[0], ids[:2])
+        self.assertEqual(Member.objects.filter(status=Member.Status.ACTIVE).count(), 3)
+
+    def test_bulk_deactivate_by_filter(self):
+        """Test the list filters select the members when no ids are given."""
+        response = self.client.post('/api/members/members/bulk_status/?status=PENDING', {'action': 'deactivate'}, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(Member.objects.get(pk=self.admin.pk).status, Member.Status.ACTIVE)
+
+    def test_requires_ids_or_filter(self):
+        """Test an unscoped request is refused."""
+        response = self.client.post('/api/members/members/bulk_status/', {'action': 'approve'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_or_empty_filters_refused(self):
+        """Test parameters that filter nothing do not select every member."""
+        for query in ('?foo=1', '?search=', '?search=%20&status='):
+            response = self.client.post(f'/api/members/members/bulk_status/{query}', {'action': 'deactivate'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+        self.assertEqual(Member.objects.filter(status=Member.Status.INACTIVE).count(), 0)
+
+    def test_welcome_notifications(self):
+        """Test the task creates one welcome email per approved member."""
+        from apps.communications.models import Notification
+        from .tasks import send_welcome_notifications
+
+        Member.objects.filter(pk=self.pending[0].pk).update(status=Member.Status.ACTIVE)
+        with patch('apps.communications.tasks.dispatch_notifications.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            sent = send_welcome_notifications([str(m.id) for m in self.pending])
+        self.assertEqual(sent, 1)
+        self.assertEqual(delay.call_count, 1)
+        self.assertEqual(Notification.objects.get().member, self.pending[0])
+
+
+class MemberStatisticsTest(APITestCase):
+    """Test the incrementally maintained dashboard counts."""
+
+    def setUp(self):
+        self.admin = Member.objects.create_superuser(
+            email='admin@example.com',
+            password='admin123',
+            postal_code='J6E 2A1',
+            status=Member.Status.ACTIVE,
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def dashboard(self):
+        return self.client.get('/api/members/members/dashboard/').data
+
+    def assertMatchesRecount(self):
+        counts = dict(((s.dimension, s.value), s.count) for s in MemberStatistic.objects.all() if s.count)
+        stats.rebuild()
+        recount = dict(((s.dimension, s.value), s.count) for s in MemberStatistic.objects.all() if s.count)
+        self.assertEqual(counts, recount)
+
+    def test_counts_follow_saves_and_deletes(self):
+        """Test create, update, deferred update and delete keep the counts exact."""
+        member = Member.objects.create_user(email='a@example.com', password='x', postal_code='H2X 1Y4', sex='F')
+        data = self.dashboard()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['by_status'], {'ACTIVE': 1, 'PENDING': 1})
+        self.assertEqual(data['by_postal_area'], {'J6E': 1, 'H2X': 1})
+
+        member.postal_code = 'H3A 0G4'
+        member.save()
+        deferred = Member.objects.only('id').get(pk=member.pk)
+        deferred.status = Member.Status.INACTIVE
+        deferred.save()
+        self.assertMatchesRecount()
+
+        Member.objects.get(pk=member.pk).delete()
+        self.assertEqual(self.dashboard()['by_status'], {'ACTIVE': 1})
+        self.assertMatchesRecount()
+
+    def test_bulk_paths_keep_counts(self):
+        """Test bulk status changes and imports update the counts."""
+        pending = Member.objects.create_user(email='p@example.com', password='x', postal_code='H1A 1A1')
+        with patch('apps.members.views.send_welcome_notifications.delay'):
+            self.client.post('/api/members/members/bulk_status/', {'action': 'approve', 'ids': [str(pending.id)]}, format='json')
+        self.client.post('/api/members/members/import/', {
+            'file': SimpleUploadedFile('r.csv', b'email,postal_code\nnew@example.com,H1A 1A1\n'),
+        }, format='multipart')
+        self.assertEqual(self.dashboard()['by_status'], {'ACTIVE': 2, 'PENDING': 1})
+        self.assertMatchesRecount()
+
+    def test_dashboard_query_count_is_constant(self):
+        """Test the dashboard does not scan members."""
+        stats.snapshot()
+        with CaptureQueriesContext(connection) as queries:
+            data = self.dashboard()
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any('FROM "members"' in q['sql'] for q in queries))
+        self.assertEqual(data['growth'][0]['total'], 1)
+
+
+class MemberCardIssuanceTest(APITestCase):
+    """Test annual card issuance."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.active = [
+            Member.objects.create_user(
+                email=f'active{i}@example.com', password='x', postal_code='H1A 1A1', status=Member.Status.ACTIVE
+            )
+            for i in range(3)
+        ]
+        Member.objects.create_user(email='pending@example.com', password='x', postal_code='H1A 1A1')
+
+    def test_issue_is_idempotent(self):
+        """Test active members get one rendered card each, and a rerun does nothing."""
+        report = cards.issue_cards(year=2026, batch_size=2, workers=0)
+        self.assertEqual(report, {'year': 2026, 'created': 3, 'rendered': 3})
+        card = MemberCard.objects.get(member=self.active[0], year=2026)
+        self.assertEqual(card.card_number, cards.card_number(self.active[0].pk, 2026))
+        with card.qr_code.open('rb') as fh:
+            self.assertEqual(fh.read(4), b'\x89PNG')
+        self.assertTrue(card.barcode.name.endswith('-barcode.png'))
+
+        self.assertEqual(cards.issue_cards(year=2026, workers=0), {'year': 2026, 'created': 0, 'rendered': 0})
+        self.assertEqual(MemberCard.objects.count(), 3)
+
+    def test_resumes_unrendered_cards(self):
+        """Test only cards without images are rendered, through the process pool."""
+        cards.issue_cards(year=2026, workers=0)
+        MemberCard.objects.filter(member=self.active[1]).update(qr_code='')
+        self.assertEqual(cards.render_cards(2026, workers=2), 1)
+        card = MemberCard.objects.get(member=self.active[1])
+        self.assertEqual(card.qr_code.name, f'cards/2026/{card.card_number}-qr.png')
+
+    def test_issue_endpoint_queues_the_job(self):
+        """Test the API hands issuance to Celery."""
+        admin = Member.objects.create_superuser(email='admin@example.com', password='x', postal_code='J6E 2A1')
+        self.client.force_authenticate(user=admin)
+        with patch('apps.members.views.issue_member_cards.delay') as delay:
+            response = self.client.post('/api/members/cards/issue/', {'year': 2027}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        delay.assert_called_once_with(2027)
+
+
+class RetentionSweepTest(TestCase):
+    """Test the Law 25 retention sweep."""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.communications.models import Notification
+
+        today = timezone.localdate()
+        self.expired = [
+            Member.objects.create_user(
+                email=f'old{i}@example.com', phone=f'514555000{i}', password='x', postal_code='H1A 1A1',
+                first_name='Ancien', status=Member.Status.ACTIVE, data_retention_date=today - timedelta(days=i + 1),
+            )
+            for i in range(5)
+        ]
+        self.kept = Member.objects.create_user(
+            email='kept@example.com', password='x', postal_code='H2X 1Y4', first_name='Actuel',
+            data_retention_date=today,
+        )
+        Notification.objects.create(member=self.expired[0], channel='EMAIL', subject='Reçu', content='Bonjour Ancien')
+        MemberFamily.objects.create(member=self.kept, related_member=self.expired[1], relationship='PARENT',
+                                    first_name='Ancien', last_name='Parent')
+
+    def test_sweep_anonymizes_expired_members(self):
+        """Test expired members and what names them are cleared, the others kept."""
+        from apps.communications.models import Notification
+
+        current = retention.sweep(batch_size=2)
+        self.assertIsNotNone(current.finished_at)
+        self.assertEqual((current.members, current.notifications, current.family_links), (5, 1, 1))
+
+        member = Member.objects.get(pk=self.expired[0].pk)
+        self.assertEqual((member.first_name, member.email, member.phone), ('', None, None))
+        self.assertFalse(member.is_active)
+        self.assertFalse(member.has_usable_password())
+        self.assertEqual(Notification.objects.get().content, '')
+        self.assertEqual(MemberFamily.objects.get().first_name, '')
+        self.assertEqual(Member.objects.get(pk=self.kept.pk).email, 'kept@example.com')
+
+        # Members are not swept twice.
+        self.assertEqual(retention.sweep().members, 0)
+        counts = dict(((s.dimension, s.value), s.count) for s in MemberStatistic.objects.all() if s.count)
+        stats.rebuild()
+        self.assertEqual(counts, dict(((s.dimension, s.value), s.count) for s in MemberStatistic.objects.all() if s.count))
+
+    def test_sweep_drops_dedup_data(self):
+        """Test blocking keys and pending pairs of anonymized members go in the sweep."""
+        from .models import MemberBlockingKey
+
+        twin = Member.objects.create_user(
+            email='old0@exemple.com', password='x', postal_code='H1A 1A1', first_name='Ancien',
+        )
+        dedup.find_duplicates()
+        self.assertTrue(DuplicateCandidate.objects.exists())
+        retention.sweep()
+        expired = [member.pk for member in self.expired]
+        self.assertFalse(MemberBlockingKey.objects.filter(member_id__in=expired).exists())
+        self.assertFalse(DuplicateCandidate.objects.filter(status=DuplicateCandidate.Status.PENDING).exists())
+        self.assertTrue(MemberBlockingKey.objects.filter(member=twin).exists())
+
+    def test_interrupted_sweep_resumes(self):
+        """Test a time-boxed sweep checkpoints and the next run continues it."""
+        first = retention.sweep(batch_size=2, time_budget=1e-9)
+        self.assertIsNone(first.finished_at)
+        self.assertEqual(first.members, 2)
+        self.assertEqual(first.last_member_id, self.expired[3].pk)
+
+        second = retention.sweep(batch_size=2)
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(second.members, 5)
+        self.assertEqual(RetentionSweep.objects.count(), 1)
+        self.assertFalse(retention.due_members(second.cutoff).exists())
+
+
+class MemberDedupTest(APITestCase):
+    """Test duplicate detection and merging."""
+
+    def setUp(self):
+        self.admin = Member.objects.create_superuser(email='admin@example.com', password='x', postal_code='J6E 2A1')
+        self.jean = Member.objects.create_user(
+            email='jean.tremblay@example.com', password='x', first_name='Jean', last_name='Tremblay',
+            postal_code='H2X 1Y4', status=Member.Status.ACTIVE,
+        )
+        self.jean_again = Member.objects.create_user(
+            phone='514-555-1234', password='x', first_name='Jean', last_name='Tremblai', postal_code='H2X 3A1',
+        )
+        # Same family name and postal area, different person.
+        self.marie = Member.objects.create_user(
+            email='marie@example.com', phone='5145559999', password='x', first_name='Marie',
+            last_name='Tremblay', postal_code='H2X 1Y4',
+        )
+        Member.objects.create_user(
+            email='jean.t@example.com', phone='4505559999', password='x', first_name='Paul', last_name='Roy',
+            postal_code='J6E 1A1',
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_soundex_and_similarity(self):
+        """Test the phonetic code and the pg_trgm-compatible similarity."""
+        self.assertEqual(dedup.soundex('Tremblay'), dedup.soundex('Trembley'))
+        self.assertEqual(dedup.soundex('Hélène'), 'H450')
+        self.assertAlmostEqual(dedup.similarity('word', 'two words'), 4 / 11)
+
+    def test_find_duplicates(self):
+        """Test only the likely pair is queued, and a rerun keeps a dismissal."""
+        dedup.find_duplicates()
+        candidate = DuplicateCandidate.objects.get()
+        self.assertEqual({candidate.member_a, candidate.member_b}, {self.jean, self.jean_again})
+        self.assertIn('name', candidate.reasons)
+
+        response = self.client.post(f'/api/members/duplicates/{candidate.pk}/dismiss/')
+        self.assertEqual(response.status_code, 200)
+        dedup.find_duplicates()
+        self.assertEqual(DuplicateCandidate.objects.get().status, DuplicateCandidate.Status.DISMISSED)
+
+    def test_stale_candidates_dropped(self):
+        """Test a pending pair goes once it scores too low, or when one of its members is deleted."""
+        dedup.find_duplicates()
+        self.jean_again.first_name, self.jean_again.last_name = 'Karim', 'Benali'
+        self.jean_again.save()
+        dedup.find_duplicates()
+        self.assertFalse(DuplicateCandidate.objects.exists())
+
+        self.jean_again.first_name, self.jean_again.last_name = 'Jean', 'Tremblai'
+        self.jean_again.save()
+        dedup.find_duplicates()
+        candidate = DuplicateCandidate.objects.get()
+        DuplicateCandidate.objects.filter(pk=candidate.pk).update(member_b=None)
+        response = self.client.post(f'/api/members/duplicates/{candidate.pk}/merge/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        dedup.find_duplicates()
+        self.jean.delete()
+        self.assertFalse(DuplicateCandidate.objects.filter(status=DuplicateCandidate.Status.PENDING).exists())
+
+    def test_merge_repoints_related_rows(self):
+        """Test a merge moves every reference in one go and keeps the missing phone."""
+        from apps.events.models import Event, EventRegistration
+        from apps.finance.models import Donation
+        from django.utils import timezone
+
+        event = Event.objects.create(title='Aïd', start_date=timezone.now(), end_date=timezone.now())
+        for member, code in [(self.jean, 'A'), (self.jean_again, 'B')]:
+            EventRegistration.objects.create(event=event, member=member, barcode=code)
+        Donation.objects.create(member=self.jean_again, amount=50, type='ONE_TIME', payment_method='CASH')
+        MemberFamily.objects.create(member=self.marie, related_member=self.jean_again, relationship='SPOUSE')
+        dedup.find_duplicates()
+        candidate = DuplicateCandidate.objects.get()
+
+        response = self.client.post(f'/api/members/duplicates/{candidate.pk}/merge/', {'keep': str(self.jean.pk)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['phone'], '5145551234')
+        self.assertFalse(Member.objects.filter(pk=self.jean_again.pk).exists())
+        self.assertEqual(Donation.objects.get().member, self.jean)
+        self.assertEqual(EventRegistration.objects.get().barcode, 'A')
+        self.assertEqual(MemberFamily.objects.get().related_member, self.jean)
+        candidate.refresh_from_db()
+        self.assertEqual((candidate.status, candidate.reviewed_by), (DuplicateCandidate.Status.MERGED, self.admin))
+
+        response = self.client.post(f'/api/members/duplicates/{candidate.pk}/merge/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class HouseholdIndexTest(APITestCase):
+    """Test the household index follows family links."""
+
+    def setUp(self):
+        self.a, self.b, self.c, self.d = [
+            Member.objects.create_user(email=f'{name}@example.com', password='x', postal_code='H1A 1A1',
+                                       last_name=name)
+            for name in 'abcd'
+        ]
+
+    def household(self, member):
+        return Member.objects.get(pk=member.pk).household_id
+
+    def link(self, member, related):
+        return MemberFamily.objects.create(member=member, related_member=related, relationship='SPOUSE')
+
+    def test_links_join_and_split_households(self):
+        """Test adding, moving and deleting links keeps components exact."""
+        self.link(self.a, self.b)
+        bc = self.link(self.c, self.b)
+        self.assertIsNotNone(self.household(self.a))
+        self.assertEqual({self.household(m) for m in (self.a, self.b, self.c)}, {self.household(self.a)})
+        self.assertIsNone(self.household(self.d))
+
+        bc.related_member = self.d
+        bc.save()
+        self.assertEqual(self.household(self.c), self.household(self.d))
+        self.assertNotEqual(self.household(self.c), self.household(self.a))
+
+        bc.delete()
+        self.assertIsNone(self.household(self.c))
+        self.b.delete()
+        self.assertIsNone(self.household(self.a))
+
+    def test_rebuild_matches_incremental(self):
+        """Test a full rebuild finds the same components."""
+        self.link(self.a, self.b)
+        self.link(self.c, self.d)
+        Member.objects.update(household_id=None)
+        households.rebuild()
+        a, b, c, d = (self.household(m) for m in (self.a, self.b, self.c, self.d))
+        self.assertEqual((a, c), (b, d))
+        self.assertNotEqual(a, c)
+
+    def test_household_endpoint(self):
+        """Test members, students and donations come back in a fixed number of queries."""
+        from apps.education.models import Course, Student
+        from apps.finance.models import Donation
+
+        self.link(self.a, self.b)
+        self.link(self.b, self.c)
+        course = Course.objects.create(name='Arabe')
+        Student.objects.create(parent_member=self.c, course=course, first_name='Enfant', last_name='c')
+        for member, amount in [(self.a, 20), (self.c, 30), (self.d, 1000)]:
+            Donation.objects.create(member=member, amount=amount, type='ONE_TIME', payment_method='CASH',
+                                    status='COMPLETED')
+        one = households.one_per_household(Member.objects.filter(pk__in=[self.a.pk, self.b.pk, self.d.pk]))
+        self.assertEqual(one.count(), 2)
+
+        self.client.force_authenticate(user=Member.objects.get(pk=self.a.pk))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/members/members/{self.b.pk}/household/')
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), 4)
+        self.assertEqual(len(response.data['members']), 3)
+        self.assertEqual(len(response.data['students']), 1)
+        self.assertEqual(response.data['donations'][0]['total'], '50.00')
+
+        response = self.client.get(f'/api/members/members/{self.d.pk}/household/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SkillDirectoryTest(APITestCase):
+    """Test the volunteer skill directory."""
+
+    def setUp(self):
+        cache.clear()
+        self.near, self.area, self.far = [
+            Member.objects.create_user(email=f'{name}@example.com', password='x', postal_code=postal_code,
+                                       last_name=name, status=Member.Status.ACTIVE)
+            for name, postal_code in [('near', 'H2X 1Y4'), ('area', 'H2X 3Z9'), ('far', 'J4K 2B2')]
+        ]
+        MemberSkill.objects.create(member=self.near, skill_name='Cuisine', proficiency='débutant')
+        MemberSkill.objects.create(member=self.area, skill_name=' cuisine ', proficiency='Très avancée')
+        MemberSkill.objects.create(member=self.far, skill_name='CUISINE', proficiency='Expert')
+        MemberSkill.objects.create(member=self.far, skill_name='Jardinage')
+
+    def test_skills_are_normalized(self):
+        """Test spellings share one Skill and proficiencies become levels."""
+        self.assertEqual(Skill.objects.count(), 2)
+        levels = dict(MemberSkill.objects.filter(skill__slug='cuisine').values_list('member__last_name', 'level'))
+        self.assertEqual(levels, {
+            'near': MemberSkill.Level.BEGINNER, 'area': MemberSkill.Level.ADVANCED, 'far': MemberSkill.Level.EXPERT,
+        })
+
+        # Rows written without signals are linked afterwards.
+        MemberSkill.objects.bulk_create([MemberSkill(member=self.near, skill_name='Pâtisserie', proficiency='3')])
+        self.assertEqual(skills.link_all(), 2)
+        pastry = MemberSkill.objects.get(skill_name='Pâtisserie')
+        self.assertEqual((pastry.skill.slug, pastry.level), ('patisserie', MemberSkill.Level.ADVANCED))
+
+        # Making it an alias folds it into cuisine.
+        cooking = Skill.objects.get(slug='cuisine')
+        cooking.aliases = ['Pâtisserie']
+        cooking.full_clean()
+        cooking.save()
+        self.assertFalse(Skill.objects.filter(slug='patisserie').exists())
+        self.assertEqual(skills.match_skills('patisserie'), [cooking.pk])
+
+    def test_volunteers_ranked_by_proximity_then_level(self):
+        """Test the closest members come first, the best level breaking ties."""
+        MemberSkill.objects.create(
+            member=Member.objects.create_user(email='twin@example.com', password='x', postal_code='H2X1Y4',
+                                              last_name='twin', status=Member.Status.ACTIVE),
+            skill_name='cuisine', proficiency='expert',
+        )
+        Member.objects.filter(pk=self.area.pk).update(status=Member.Status.INACTIVE)
+        _, members = skills.find_volunteers('Cuisiné', near='h2x1y4')
+        self.assertEqual([m.last_name for m in members], ['twin', 'near', 'far'])
+        self.assertEqual([m.proximity for m in members], [3, 3, 0])
+
+        _, members = skills.find_volunteers('cuis', near='H2X', min_level=MemberSkill.Level.ADVANCED)
+        self.assertEqual([m.last_name for m in members], ['twin', 'far'])
+
+    def test_endpoints(self):
+        """Test the directory endpoints, their permissions and the facet cache."""
+        from django.contrib.auth.models import Group
+
+        manager = Member.objects.create_user(email='manager@example.com', password='x', postal_code='H1A1A1')
+        self.client.force_authenticate(user=self.near)
+        self.assertEqual(self.client.get('/api/members/skills/volunteers/?skill=cuisine').status_code,
+                         status.HTTP_403_FORBIDDEN)
+
+        manager.groups.add(Group.objects.create(name='EventManager'))
+        self.client.force_authenticate(user=manager)
+        response = self.client.get('/api/members/skills/volunteers/?skill=cuisine&near=H2X 1Y4&limit=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['skills'], ['Cuisine'])
+        self.assertEqual([row['last_name'] for row in response.data['results']], ['near', 'area'])
+        self.assertEqual(self.client.get('/api/members/skills/volunteers/').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/members/skills/volunteers/?skill=x&level=9').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get('/api/members/skills/facets/')
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(response.data['skills'][0], {'value': 'cuisine', 'label': 'Cuisine', 'count': 3})
+        self.assertEqual(response.data['postal_areas'][0], {'value': 'H2X', 'label': 'H2X', 'count': 2})
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get('/api/members/skills/facets/')
+        self.assertEqual(cached.data, response.data)
+        self.assertLessEqual(len(queries), 2)
+
+        response = self.client.get('/api/members/skills/facets/?skill=cuisine&area=h2x&level=3')
+        self.assertEqual(response.data['total'], 1)
+        self.assertEqual(response.data['levels'], [{'value': 3, 'label': 'Avancé', 'count': 1}])
+
+        # A new skill invalidates the cached counts.
+        MemberSkill.objects.create(member=self.near, skill_name='Jardinage')
+        response = self.client.get('/api/members/skills/facets/?skill=jardinage')
+        self.assertEqual(response.data['total'], 2)
+
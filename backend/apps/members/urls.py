@@ -8,6 +8,7 @@ router.register(r'families', views.MemberFamilyViewSet)
 router.register(r'skills', views.MemberSkillViewSet)
 router.register(r'contributions', views.MemberContributionViewSet)
 router.register(r'cards', views.MemberCardViewSet)
+router.register(r'duplicates', views.DuplicateCandidateViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
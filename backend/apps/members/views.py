@@ -1,19 +1,74 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from .models import Member, MemberFamily, MemberSkill, MemberContribution, MemberCard
+from django_filters.rest_framework import DjangoFilterBackend
+from apps.communications import segments as audience_segments
+from core.authentication import invalidate_users
+from core.cache import invalidate_model_cache
+from core.exports import ExportMixin
+from core.permissions import IsAdmin, IsEventManager
+from core.views import ConditionalGetMixin, ExpandablePrefetchMixin
+from .models import Member, MemberFamily, MemberSkill, MemberContribution, MemberCard, DuplicateCandidate, Skill
+from . import dedup, households, skills, stats
+from .importer import ImportFileError, MemberImporter, read_rows
+from .search import RANK_ORDERING, MemberSearchFilter, is_ranked
 from .serializers import (
     MemberSerializer, MemberFamilySerializer, MemberSkillSerializer,
-    MemberContributionSerializer, MemberCardSerializer
+    MemberContributionSerializer, MemberCardSerializer, MemberBulkStatusSerializer,
+    DuplicateCandidateSerializer, DuplicateMemberSerializer, DuplicateMergeSerializer, HouseholdSerializer,
+    VolunteerSerializer
 )
+from .tasks import issue_member_cards, send_welcome_notifications
 
+# Bulk status actions: target status and the statuses it applies to.
+STATUS_TRANSITIONS = {
+    'approve': (Member.Status.ACTIVE, [Member.Status.PENDING]),
+    'deactivate': (Member.Status.INACTIVE, [Member.Status.ACTIVE, Member.Status.PENDING]),
+}
 
-class MemberViewSet(viewsets.ModelViewSet):
-    queryset = Member.objects.all().prefetch_related('families', 'skills', 'contributions', 'cards')
+
+class MemberViewSet(ExportMixin, ConditionalGetMixin, ExpandablePrefetchMixin, viewsets.ModelViewSet):
+    queryset = Member.objects.all()
     serializer_class = MemberSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, MemberSearchFilter]
     search_fields = ['first_name', 'last_name', 'email', 'phone']
     filterset_fields = ['status', 'sex', 'postal_code']
+    expandable_prefetches = {
+        'families': 'families',
+        'skills': 'skills',
+        'contributions': 'contributions',
+        'cards': 'cards',
+    }
+    export_fields = (
+        ('Prénom', 'first_name'),
+        ('Nom', 'last_name'),
+        ('Courriel', 'email'),
+        ('Téléphone', 'phone'),
+        ('Sexe', 'sex'),
+        ('Code postal', 'postal_code'),
+        ('Statut', 'status'),
+        ('Inscrit le', 'created_at'),
+        ('ID', 'id'),
+    )
+
+    def get_filter_params(self):
+        """The declared list filters (and ?search=) given a value in the query string."""
+        names = [*self.filterset_fields, MemberSearchFilter.search_param]
+        return {
+            name: self.request.query_params[name]
+            for name in names if self.request.query_params.get(name, '').strip()
+        }
+
+    def get_cursor_ordering(self):
+        # Ranked searches page by relevance instead of creation date.
+        if is_ranked() and self.request.query_params.get('search', '').strip():
+            return RANK_ORDERING
+        return getattr(self, 'cursor_ordering', None)
 
     @action(detail=False, methods=['post'], permission_classes=[permissions.AllowAny])
     def register(self, request):
@@ -31,6 +86,38 @@ class MemberViewSet(viewsets.ModelViewSet):
         user = serializer.save(must_change_password=False)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['get'])
+    def household(self, request, pk=None):
+        """The member's household: members, students and donations per year."""
+        member = self.get_object()
+        user = request.user
+        same_household = member.household_id is not None and member.household_id == user.household_id
+        if not (user.is_staff or member.pk == user.pk or same_household):
+            raise PermissionDenied()
+        return Response(HouseholdSerializer(households.summary(member)).data)
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def dashboard(self, request):
+        try:
+            days = min(int(request.query_params.get('days', 90)), 730)
+        except ValueError:
+            return Response({'detail': 'Paramètre « days » invalide.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(stats.dashboard(days=days))
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser],
+            permission_classes=[permissions.IsAdminUser])
+    def bulk_import(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'detail': 'Le fichier est requis.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        try:
+            report = MemberImporter(dry_run=dry_run).run(read_rows(upload.file, upload.name))
+        except ImportFileError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def change_password(self, request):
         user = request.user
@@ -46,10 +133,65 @@ class MemberViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def approve(self, request, pk=None):
         member = self.get_object()
+        was_pending = member.status == Member.Status.PENDING
         member.status = Member.Status.ACTIVE
-        member.save()
+        member.save(update_fields=['status', 'updated_at'])
+        if was_pending:
+            transaction.on_commit(lambda: send_welcome_notifications.delay([str(member.pk)]))
         return Response({'detail': f'Membre {member.first_name} {member.last_name} approuvé avec succès.'})
 
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def bulk_status(self, request):
+        """
+        Approve or deactivate many members at once.
+
+        Targets the `ids` given in the body, or else every member matching
+        the list filters in the query string (?status=, ?search=...).
+        Members not in a source status of the action are left untouched.
+        """
+        serializer = MemberBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        target, sources = STATUS_TRANSITIONS[serializer.validated_data['action']]
+
+        ids = serializer.validated_data.get('ids')
+        if ids is not None:
+            queryset = Member.objects.filter(pk__in=ids)
+        elif self.get_filter_params():
+            queryset = self.filter_queryset(self.get_queryset())
+        else:
+            # Unknown or empty parameters would select every member.
+            return Response(
+                {'detail': 'Indiquez des identifiants ou un filtre.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            # Lock the matching rows so the welcome list is exactly what was updated.
+            rows = list(
+                Member.objects.select_for_update()
+                .filter(pk__in=queryset.values('pk'), status__in=sources)
+                .values_list('pk', *stats.TRACKED_FIELDS)
+            )
+            changed = [pk for pk, *_ in rows]
+            updated = Member.objects.filter(pk__in=changed).update(status=target, updated_at=timezone.now())
+            stats.record_changes(
+                before=[stats.bucket_key(old, sex, postal_code) for _, old, sex, postal_code in rows],
+                after=[stats.bucket_key(target, sex, postal_code) for _, old, sex, postal_code in rows],
+            )
+
+        # update() sends no signals.
+        invalidate_model_cache(Member)
+        invalidate_users(changed)
+        audience_segments.queue_refresh(changed)
+        if target == Member.Status.ACTIVE and changed:
+            transaction.on_commit(lambda: send_welcome_notifications.delay([str(pk) for pk in changed]))
+
+        return Response({
+            'action': serializer.validated_data['action'],
+            'updated': updated,
+            'skipped': len(ids) - updated if ids is not None else None,
+        })
+
 
 class MemberFamilyViewSet(viewsets.ModelViewSet):
     queryset = MemberFamily.objects.all()
@@ -60,8 +202,44 @@ class MemberFamilyViewSet(viewsets.ModelViewSet):
 class MemberSkillViewSet(viewsets.ModelViewSet):
     queryset = MemberSkill.objects.all()
     serializer_class = MemberSkillSerializer
+    cursor_ordering = ('skill_name', 'id')
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_min_level(self, request):
+        """The `?level=` of the directory actions: a MemberSkill.Level, or None."""
+        level = request.query_params.get('level') or None
+        if level is not None and (not level.isdigit() or int(level) not in MemberSkill.Level.values):
+            raise ValidationError({'level': 'Niveau invalide.'})
+        return int(level) if level else None
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdmin | IsEventManager], pagination_class=None)
+    def facets(self, request):
+        """Members per skill, level and postal area, narrowed by `?skill=`, `?level=`, `?area=`."""
+        min_level = self.get_min_level(request)
+        term = request.query_params.get('skill', '').strip()
+        return Response(skills.facets(
+            skills.match_skills(term) if term else None, min_level, request.query_params.get('area', ''),
+        ))
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdmin | IsEventManager], pagination_class=None)
+    def volunteers(self, request):
+        """Find volunteers for `?skill=` near `?near=` (postal code), ranked, at most `?limit=`."""
+        min_level = self.get_min_level(request)
+        term = request.query_params.get('skill', '').strip()
+        if not term:
+            return Response({'detail': 'La compétence est requise.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit') or 50), 200)
+        except ValueError:
+            return Response({'detail': 'Limite invalide.'}, status=status.HTTP_400_BAD_REQUEST)
+        matched, members = skills.find_volunteers(
+            term, near=request.query_params.get('near', ''), min_level=min_level, limit=max(limit, 1),
+        )
+        return Response({
+            'skills': list(Skill.objects.filter(pk__in=matched).values_list('name', flat=True)),
+            'results': VolunteerSerializer(members, many=True).data,
+        })
+
 
 class MemberContributionViewSet(viewsets.ModelViewSet):
     queryset = MemberContribution.objects.all()
@@ -72,4 +250,61 @@ class MemberContributionViewSet(viewsets.ModelViewSet):
 class MemberCardViewSet(viewsets.ModelViewSet):
     queryset = MemberCard.objects.all()
     serializer_class = MemberCardSerializer
+    cursor_ordering = ('-issued_at', '-id')
     permission_classes = [permissions.IsAuthenticated]
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def issue(self, request):
+        try:
+            year = int(request.data.get('year') or timezone.localdate().year)
+        except (TypeError, ValueError):
+            return Response({'detail': 'Année invalide.'}, status=status.HTTP_400_BAD_REQUEST)
+        issue_member_cards.delay(year)
+        return Response({'year': year}, status=status.HTTP_202_ACCEPTED)
+
+
+class DuplicateCandidateViewSet(viewsets.ReadOnlyModelViewSet):
+    """Review queue of apps.members.dedup: merge or dismiss each pair."""
+    queryset = DuplicateCandidate.objects.select_related('member_a', 'member_b')
+    serializer_class = DuplicateCandidateSerializer
+    cursor_ordering = ('-score', '-id')
+    permission_classes = [permissions.IsAdminUser]
+    filterset_fields = ['status']
+
+    def get_pending(self):
+        candidate = self.get_object()
+        if candidate.status != DuplicateCandidate.Status.PENDING:
+            return None
+        return candidate
+
+    @action(detail=True, methods=['post'])
+    def merge(self, request, pk=None):
+        candidate = self.get_pending()
+        if candidate is None:
+            return Response({'detail': 'Ce doublon a déjà été traité.'}, status=status.HTTP_400_BAD_REQUEST)
+        if candidate.member_a_id is None or candidate.member_b_id is None:
+            return Response({'detail': "L'un des deux membres a été supprimé."}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = DuplicateMergeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        keep_id = serializer.validated_data.get('keep', candidate.member_a_id)
+        if keep_id == candidate.member_a_id:
+            keep, duplicate = candidate.member_a, candidate.member_b
+        elif keep_id == candidate.member_b_id:
+            keep, duplicate = candidate.member_b, candidate.member_a
+        else:
+            return Response({'detail': 'Le membre conservé doit faire partie de la paire.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        keep = dedup.merge(keep, duplicate, reviewed_by=request.user)
+        return Response(DuplicateMemberSerializer(keep).data)
+
+    @action(detail=True, methods=['post'])
+    def dismiss(self, request, pk=None):
+        candidate = self.get_pending()
+        if candidate is None:
+            return Response({'detail': 'Ce doublon a déjà été traité.'}, status=status.HTTP_400_BAD_REQUEST)
+        candidate.status = DuplicateCandidate.Status.DISMISSED
+        candidate.reviewed_at = timezone.now()
+        candidate.reviewed_by = request.user
+        candidate.save(update_fields=['status', 'reviewed_at', 'reviewed_by'])
+        return Response(self.get_serializer(candidate).data)
@@ -151,5 +151,5 @@ class ResourceAPITest(APITestCase):
         self.client.force_authenticate(user=self.member)
         response = self.client.get('/resources/reservations/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['member'], self.member.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['member'], self.member.id)
@@ -1,11 +1,13 @@
 from rest_framework import viewsets, permissions
+from core.cache import CachedResponseMixin
 from .models import Resource, Reservation
 from .serializers import ResourceSerializer, ReservationSerializer
 
 
-class ResourceViewSet(viewsets.ModelViewSet):
+class ResourceViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Resource.objects.all()
     serializer_class = ResourceSerializer
+    cursor_ordering = ('name', 'id')
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filterset_fields = ['type', 'is_available']
 
@@ -13,6 +15,7 @@ class ResourceViewSet(viewsets.ModelViewSet):
 class ReservationViewSet(viewsets.ModelViewSet):
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
+    cursor_ordering = ('-start_time', '-id')
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 import environ
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -11,6 +12,17 @@ env = environ.Env(
     ALLOWED_HOSTS=(list, ['*']),
     DATABASE_URL=(str, 'postgres://acml:acml_secret@db:5432/acml'),
     REDIS_URL=(str, 'redis://redis:6379/0'),
+    CACHE_URL=(str, 'rediscache://redis:6379/1'),
+    REQUEST_METRICS_ENABLED=(bool, False),
+    EMAIL_RATE_LIMIT=(int, 10),
+    SMS_BACKEND=(str, 'core.sms.TwilioBackend'),
+    SMS_RATE_LIMIT=(int, 1),
+    TWILIO_ACCOUNT_SID=(str, ''),
+    TWILIO_AUTH_TOKEN=(str, ''),
+    TWILIO_PHONE_NUMBER=(str, ''),
+    SITE_URL=(str, 'http://localhost:8000'),
+    COUNTERS_BACKEND=(str, 'core.counters.RedisBackend'),
+    COUNTERS_REDIS_URL=(str, 'redis://redis:6379/2'),
 )
 
 # Quick-start development settings - unsuitable for production
@@ -29,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party
     'rest_framework',
@@ -38,6 +51,7 @@ INSTALLED_APPS = [
     'drf_spectacular',
     
     # Local apps
+    'core',
     'apps.members',
     'apps.communications',
     'apps.events',
@@ -48,6 +62,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -85,6 +100,13 @@ DATABASES = {
     'default': env.db(),
 }
 
+# Cache
+# Redis database 1 keeps cached responses apart from the Celery broker.
+
+CACHES = {
+    'default': env.cache('CACHE_URL'),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -136,13 +158,19 @@ AUTHENTICATION_BACKENDS = [
 # DRF Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_FILTER_BACKENDS': (
+        'django_filters.rest_framework.DjangoFilterBackend',
+        'rest_framework.filters.SearchFilter',
+    ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
 # SPECTACULAR SETTINGS
@@ -166,3 +194,98 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'snapshot-member-statistics': {
+        'task': 'apps.members.tasks.snapshot_member_statistics',
+        'schedule': crontab(hour=23, minute=55),
+    },
+    'sweep-data-retention': {
+        'task': 'apps.members.tasks.sweep_data_retention',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'find-member-duplicates': {
+        'task': 'apps.members.tasks.find_member_duplicates',
+        'schedule': crontab(hour=4, minute=0, day_of_week='sunday'),
+    },
+    'dispatch-notifications': {
+        'task': 'apps.communications.tasks.dispatch_notifications',
+        'schedule': crontab(),
+    },
+    'resume-newsletter-deliveries': {
+        'task': 'apps.communications.tasks.resume_newsletter_deliveries',
+        'schedule': crontab(minute='*/15'),
+    },
+    'flush-newsletter-tracking': {
+        'task': 'apps.communications.tasks.flush_newsletter_tracking',
+        'schedule': crontab(),
+    },
+    'delete-old-exports': {
+        'task': 'core.tasks.delete_old_exports',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'refresh-segments': {
+        'task': 'apps.communications.tasks.refresh_segments',
+        'schedule': crontab(hour=2, minute=30),
+    },
+}
+
+# Seconds a Law 25 retention sweep task runs before re-queueing itself
+# (apps.members.retention).
+RETENTION_SWEEP_TIME_BUDGET = 120
+
+# Rows fetched per round trip by CSV/XLSX exports (core.exports).
+EXPORT_CHUNK_SIZE = 2000
+# Background exports (core.exports): private directory, never served as
+# media, and seconds their emailed links stay valid before the files are
+# deleted.
+EXPORT_ROOT = BASE_DIR / 'private' / 'exports'
+EXPORT_LINK_MAX_AGE = 24 * 3600
+
+# Newsletter delivery (apps.communications.delivery): recipients per
+# subtask, sent over one connection, and messages per second the email
+# provider accepts from all workers together (0: no limit).
+NEWSLETTER_CHUNK_SIZE = 200
+EMAIL_RATE_LIMIT = env('EMAIL_RATE_LIMIT')
+
+# Notification outbox (apps.communications.outbox): seconds a dispatcher
+# task runs before re-queueing itself, and the SMS provider (core.sms).
+NOTIFICATION_DISPATCH_TIME_BUDGET = 60
+SMS_BACKEND = env('SMS_BACKEND')
+SMS_RATE_LIMIT = env('SMS_RATE_LIMIT')
+TWILIO_ACCOUNT_SID = env('TWILIO_ACCOUNT_SID')
+TWILIO_AUTH_TOKEN = env('TWILIO_AUTH_TOKEN')
+TWILIO_PHONE_NUMBER = env('TWILIO_PHONE_NUMBER')
+
+# Absolute URL of this API, for the tracking links in emails
+# (apps.communications.tracking), and the buffered counters behind them
+# (core.counters).
+SITE_URL = env('SITE_URL')
+COUNTERS_BACKEND = env('COUNTERS_BACKEND')
+COUNTERS_REDIS_URL = env('COUNTERS_REDIS_URL')
+
+# Token -> member lookups kept in the cache (core.authentication).
+AUTH_CACHE_TIMEOUT = 60
+
+# Group-based roles cached across requests (core.roles); 0 disables.
+ROLES_CACHE_TIMEOUT = 300
+
+# Request instrumentation (Server-Timing headers + acml.metrics log lines).
+# Toggle at runtime with `manage.py request_metrics on|off`.
+REQUEST_METRICS_ENABLED = env('REQUEST_METRICS_ENABLED')
+REQUEST_METRICS_SWITCH_TTL = 10
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'acml': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
@@ -2,10 +2,12 @@ from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 from apps.members.auth_views import CustomAuthToken
+from core.exports import download_export
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/token-auth/', CustomAuthToken.as_view()),
+    path('api/exports/<str:token>/', download_export, name='export-download'),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
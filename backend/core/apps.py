@@ -0,0 +1,25 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import m2m_changed, post_save, post_delete
+        from rest_framework.authtoken.models import Token
+        from .authentication import invalidate_token_on_delete, invalidate_user_on_change
+        from .cache import invalidate_on_change
+        from .roles import invalidate_roles_on_membership_change
+
+        post_save.connect(invalidate_on_change, dispatch_uid='core.cache.post_save')
+        post_delete.connect(invalidate_on_change, dispatch_uid='core.cache.post_delete')
+
+        User = get_user_model()
+        post_save.connect(invalidate_user_on_change, sender=User, dispatch_uid='core.auth.user_save')
+        post_delete.connect(invalidate_user_on_change, sender=User, dispatch_uid='core.auth.user_delete')
+        post_delete.connect(invalidate_token_on_delete, sender=Token, dispatch_uid='core.auth.token_delete')
+        m2m_changed.connect(
+            invalidate_roles_on_membership_change, sender=User.groups.through,
+            dispatch_uid='core.roles.membership',
+        )
@@ -0,0 +1,88 @@
+"""
+Cached authentication for ACML Platform.
+
+Token -> user id and user id -> Member are kept in the cache for
+AUTH_CACHE_TIMEOUT seconds, so an authenticated request normally costs no
+query at all. Entries are dropped when a token is deleted and whenever a
+member is saved or deleted (password, is_active, status...), see
+CoreConfig.ready(). Call invalidate_users() after bulk `update()`s on
+members, which send no signals. Cached members leave out the password
+hash and carry the session auth hash derived from it instead, which
+django.contrib.auth checks on every session request; the password itself
+is loaded from the database if something reads it.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+TOKEN_KEY = 'auth:token:{digest}'
+USER_KEY = 'auth:user:{pk}'
+
+
+def _token_key(key: str) -> str:
+    # Never store raw tokens in cache key names.
+    return TOKEN_KEY.format(digest=hashlib.sha256(key.encode('utf-8')).hexdigest())
+
+
+def _cache_user(user) -> None:
+    # A fresh instance of the column values but the password: no related
+    # objects (the token...) or other state of `user` reach the cache.
+    fields = [field.attname for field in user._meta.concrete_fields if field.attname != 'password']
+    cached = type(user).from_db(user._state.db, fields, [getattr(user, name) for name in fields])
+    cached._session_auth_hash = user.get_session_auth_hash()
+    cache.set(USER_KEY.format(pk=user.pk), cached, settings.AUTH_CACHE_TIMEOUT)
+
+
+def get_cached_user(pk):
+    """Return the member with this primary key, from the cache when possible."""
+    user = cache.get(USER_KEY.format(pk=pk))
+    if user is None:
+        user = get_user_model()._default_manager.filter(pk=pk).first()
+        if user is not None:
+            _cache_user(user)
+    return user
+
+
+def invalidate_users(pks) -> None:
+    """Forget cached members, e.g. after a bulk status change."""
+    cache.delete_many([USER_KEY.format(pk=pk) for pk in pks])
+
+
+def invalidate_token(key: str) -> None:
+    cache.delete(_token_key(key))
+
+
+def invalidate_user_on_change(sender, instance, **kwargs):
+    """post_save / post_delete receiver for the user model."""
+    invalidate_users([instance.pk])
+
+
+def invalidate_token_on_delete(sender, instance, **kwargs):
+    """post_delete receiver for authtoken.Token."""
+    invalidate_token(instance.key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication backed by the cache instead of a token/user join."""
+
+    def authenticate_credentials(self, key):
+        user_pk = cache.get(_token_key(key))
+        if user_pk is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(_token_key(key), user.pk, settings.AUTH_CACHE_TIMEOUT)
+            _cache_user(user)
+            return user, token
+
+        user = get_cached_user(user_pk)
+        if user is None:
+            invalidate_token(key)
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        # Unsaved stand-in: request.auth only needs the key and the user.
+        return user, self.get_model()(key=key, user=user)
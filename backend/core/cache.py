@@ -0,0 +1,99 @@
+"""
+Response caching for read-heavy API endpoints.
+
+Cached responses are keyed on a per-model generation counter. Saving or
+deleting a row bumps the counter of its model, which orphans every cached
+response depending on it; orphaned entries simply expire.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from . import metrics
+
+GENERATION_KEY = 'respcache:gen:{label}'
+RESPONSE_KEY = 'respcache:{view}:{generations}:{auth}:{digest}'
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+def get_generation(model) -> int:
+    """Return the current cache generation of a model."""
+    return cache.get_or_set(GENERATION_KEY.format(label=model._meta.label_lower), 1, None)
+
+
+def invalidate_model_cache(model) -> None:
+    """
+    Drop every cached response depending on `model`.
+    Call this after bulk `update()`/`delete()`, which send no signals.
+    """
+    key = GENERATION_KEY.format(label=model._meta.label_lower)
+    cache.add(key, 1, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(): any new value invalidates.
+        cache.set(key, 2, None)
+
+
+def invalidate_on_change(sender, **kwargs):
+    """post_save / post_delete receiver, connected in CoreConfig.ready()."""
+    if kwargs.get('raw'):
+        return
+    invalidate_model_cache(sender)
+
+
+class CachedResponseMixin:
+    """
+    Cache `list` and `retrieve` responses of a ViewSet.
+
+    The key covers the view, the full path with query string, the
+    authentication class of the request and the generation of every model
+    in `cache_models` (defaults to the queryset model).
+    """
+    cache_models = ()
+    cache_timeout = 300
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_models(self):
+        return self.cache_models or (self.queryset.model,)
+
+    def get_response_cache_key(self, request):
+        generations = '.'.join(str(get_generation(model)) for model in self.get_cache_models())
+        authenticator = getattr(request, 'successful_authenticator', None)
+        auth = type(authenticator).__name__ if authenticator else 'anonymous'
+        digest = hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()
+        return RESPONSE_KEY.format(
+            view=type(self).__name__, generations=generations, auth=auth, digest=digest
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        metrics.record_cache(cached is not None)
+        if cached is not None:
+            data, headers = cached
+            # Validators set by ConditionalGetMixin are replayed, so a
+            # revalidating client gets its 304 without touching the database.
+            last_modified = headers.get('Last-Modified')
+            response = get_conditional_response(
+                request,
+                etag=headers.get('ETag'),
+                last_modified=parse_http_date_safe(last_modified) if last_modified else None,
+            ) or Response(data)
+            for header, value in headers.items():
+                response[header] = value
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {h: response[h] for h in VALIDATOR_HEADERS if response.has_header(h)}
+            cache.set(key, (response.data, headers), self.cache_timeout)
+        return response
@@ -0,0 +1,130 @@
+"""
+Buffered counters, for events too frequent to write a row each.
+
+Callers add() hits to named counters, along with who made them; a
+periodic task drain()s what accumulated and writes it to aggregate
+tables in a few statements. Each counter has a hit count, taken and
+reset by drain(), and a set of distinct members whose size is
+estimated (HyperLogLog on Redis, about 1% off) and never reset, so the
+aggregates store it as is.
+
+COUNTERS_BACKEND names the class used by get_backend():
+
+- RedisBackend keeps the counters in Redis (COUNTERS_REDIS_URL), shared
+  by every process; a hit is one round trip.
+- LocMemBackend keeps them in this process, for tests and local
+  development.
+"""
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Distinct members are forgotten this long after a counter's last hit.
+UNIQUES_TTL = 90 * 24 * 3600
+
+
+class Drained(NamedTuple):
+    hits: int
+    uniques: int
+
+
+class BaseBackend:
+    def add(self, names, member) -> None:
+        """Count one hit by `member` on each counter of `names`."""
+        raise NotImplementedError
+
+    def drain(self) -> dict:
+        """Take the hits counted since the last drain: {name: Drained}."""
+        raise NotImplementedError
+
+    def restore(self, drained) -> None:
+        """Put back hits drain() returned, when they could not be stored."""
+        raise NotImplementedError
+
+
+@lru_cache(maxsize=None)
+def _redis(url):
+    import redis
+
+    return redis.Redis.from_url(url)
+
+
+class RedisBackend(BaseBackend):
+    DIRTY = 'counters:dirty'
+    HITS = 'counters:hits:{name}'
+    UNIQUES = 'counters:uniques:{name}'
+
+    @property
+    def client(self):
+        return _redis(settings.COUNTERS_REDIS_URL)
+
+    def add(self, names, member):
+        pipe = self.client.pipeline(transaction=False)
+        for name in names:
+            pipe.incr(self.HITS.format(name=name))
+            pipe.pfadd(self.UNIQUES.format(name=name), member)
+            pipe.expire(self.UNIQUES.format(name=name), UNIQUES_TTL)
+        pipe.sadd(self.DIRTY, *names)
+        pipe.execute()
+
+    def drain(self):
+        from redis.exceptions import ResponseError
+
+        # Counters hit from now on go to a new dirty set, for the next drain.
+        # One left by an interrupted drain is taken first.
+        draining = f'{self.DIRTY}:draining'
+        if not self.client.exists(draining):
+            try:
+                self.client.rename(self.DIRTY, draining)
+            except ResponseError:
+                # No such key: nothing was hit since the last drain.
+                return {}
+        names = sorted(name.decode() for name in self.client.smembers(draining))
+        pipe = self.client.pipeline(transaction=True)
+        for name in names:
+            pipe.getdel(self.HITS.format(name=name))
+            pipe.pfcount(self.UNIQUES.format(name=name))
+        pipe.delete(draining)
+        values = pipe.execute()
+        return {
+            name: Drained(int(values[2 * i] or 0), values[2 * i + 1])
+            for i, name in enumerate(names)
+        }
+
+    def restore(self, drained):
+        pipe = self.client.pipeline(transaction=False)
+        for name, counts in drained.items():
+            pipe.incrby(self.HITS.format(name=name), counts.hits)
+        if drained:
+            pipe.sadd(self.DIRTY, *drained)
+        pipe.execute()
+
+
+# Counters of LocMemBackend: name -> [hits, set of members].
+_locmem = {}
+
+
+class LocMemBackend(BaseBackend):
+    def add(self, names, member):
+        for name in names:
+            counter = _locmem.setdefault(name, [0, set()])
+            counter[0] += 1
+            counter[1].add(str(member))
+
+    def drain(self):
+        drained = {}
+        for name, counter in _locmem.items():
+            if counter[0]:
+                drained[name] = Drained(counter[0], len(counter[1]))
+                counter[0] = 0
+        return drained
+
+    def restore(self, drained):
+        for name, counts in drained.items():
+            _locmem.setdefault(name, [0, set()])[0] += counts.hits
+
+
+def get_backend(path=None) -> BaseBackend:
+    return import_string(path or settings.COUNTERS_BACKEND)()
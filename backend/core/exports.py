@@ -0,0 +1,233 @@
+"""
+CSV / XLSX exports of ViewSet querysets.
+
+ExportMixin adds `GET <list>/export/csv/` and `GET <list>/export/xlsx/` to
+a ViewSet. The rows are the view's own filtered queryset (same filters
+and per-user scoping as the list) read as `values_list()` tuples through
+`.iterator(chunk_size=EXPORT_CHUNK_SIZE)`, i.e. a server-side cursor on
+PostgreSQL, so memory stays flat whatever the number of rows:
+
+- CSV is streamed to the client row by row (StreamingHttpResponse).
+- XLSX goes through openpyxl's write-only mode into a temporary file,
+  which is then streamed (an XLSX is a zip and cannot be sent before it
+  is complete).
+
+With `?background=1` the export runs as a Celery job instead: the file is
+written to private storage (EXPORT_ROOT, never served as media) and a
+signed link expiring after EXPORT_LINK_MAX_AGE is emailed to the
+requester (download_url(), served by download_export()). Expired files
+are deleted by delete_expired_exports().
+
+Text cells starting like a formula (=, +, -, @, tab, carriage return) are
+prefixed with a quote so spreadsheets show them instead of evaluating
+them (CSV/formula injection).
+"""
+import csv
+import os
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, Http404, HttpRequest, QueryDict, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .permissions import IsAdmin
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+EXPORT_PATH = '{date:%Y/%m}/{token}-{name}.{format}'
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+LINK_SALT = 'core.exports.download'
+
+
+def export_storage():
+    """Private storage of background exports, outside MEDIA_ROOT."""
+    return FileSystemStorage(location=settings.EXPORT_ROOT)
+
+
+class Echo:
+    """Pseudo-buffer handing csv.writer rows straight back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        # Local time, and naive: spreadsheets have no time zones.
+        return timezone.localtime(value).replace(tzinfo=None) if timezone.is_aware(value) else value
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def export_rows(queryset, fields):
+    """Yield the header, then one tuple per row. `fields` are (header, lookup) pairs."""
+    yield tuple(header for header, _ in fields)
+    rows = queryset.values_list(*(lookup for _, lookup in fields))
+    for row in rows.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        yield tuple(_cell(value) for value in row)
+
+
+def _neutralize(value):
+    """Keep spreadsheets from evaluating a text cell as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    # BOM, so Excel reads the file as UTF-8.
+    yield '\ufeff'
+    for row in rows:
+        yield writer.writerow(['' if value is None else _neutralize(value) for value in row])
+
+
+def write_xlsx(rows, fileobj, title='Export'):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])
+    for row in rows:
+        sheet.append([_neutralize(value) for value in row])
+    workbook.save(fileobj)
+
+
+def write_export(rows, file_format, fileobj, title='Export'):
+    """Write `rows` to a binary file object."""
+    if file_format == 'xlsx':
+        write_xlsx(rows, fileobj, title)
+    else:
+        for chunk in stream_csv(rows):
+            fileobj.write(chunk.encode('utf-8'))
+
+
+class ExportMixin:
+    """
+    Adds CSV / XLSX export actions to a ViewSet, see the module docstring.
+
+    `export_fields` lists the `(header, lookup)` columns, lookups being
+    anything `values_list()` accepts (`member__email`...). Rows follow
+    `export_ordering`, which defaults to `cursor_ordering`.
+    """
+    export_fields = ()
+    export_ordering = None
+    export_name = None
+    export_permission_classes = [IsAdmin]
+
+    def get_permissions(self):
+        if self.action == 'export':
+            return [permission() for permission in self.export_permission_classes]
+        return super().get_permissions()
+
+    def get_export_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = self.export_ordering or getattr(self, 'cursor_ordering', None)
+        return queryset.order_by(*ordering) if ordering else queryset
+
+    def get_export_name(self):
+        return self.export_name or self.get_queryset().model._meta.db_table
+
+    @action(detail=False, methods=['get'], url_path=r'export/(?P<file_format>csv|xlsx)',
+            pagination_class=None)
+    def export(self, request, file_format=None):
+        if request.query_params.get('background') in ('1', 'true'):
+            from .tasks import export_to_storage
+
+            query = request.query_params.copy()
+            query.pop('background')
+            export_to_storage.delay(
+                f'{type(self).__module__}.{type(self).__name__}',
+                str(request.user.pk), file_format, query.urlencode(),
+            )
+            return Response(
+                {'detail': 'Export en cours, le lien vous sera envoyé par courriel.'},
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        rows = export_rows(self.get_export_queryset(), self.export_fields)
+        filename = f'{self.get_export_name()}-{timezone.localdate():%Y-%m-%d}.{file_format}'
+        if file_format == 'csv':
+            response = StreamingHttpResponse(stream_csv(rows), content_type=EXPORT_FORMATS['csv'])
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+
+        spool = tempfile.TemporaryFile()
+        write_xlsx(rows, spool, self.get_export_name())
+        spool.seek(0)
+        return FileResponse(spool, as_attachment=True, filename=filename, content_type=EXPORT_FORMATS['xlsx'])
+
+
+def run_export(view_path, user, file_format, query_string=''):
+    """
+    Export what `user` would get from the view with this query string to
+    private storage. Returns the storage name of the file.
+    """
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    http_request.GET = QueryDict(query_string)
+    request = Request(http_request)
+    request.user = user
+
+    view = import_string(view_path)(request=request, action='export', format_kwarg=None, args=(), kwargs={})
+    rows = export_rows(view.get_export_queryset(), view.export_fields)
+    name = EXPORT_PATH.format(
+        date=timezone.localdate(), token=uuid.uuid4().hex, name=view.get_export_name(), format=file_format,
+    )
+    with tempfile.TemporaryFile() as spool:
+        write_export(rows, file_format, spool, view.get_export_name())
+        spool.seek(0)
+        return export_storage().save(name, File(spool))
+
+
+def download_url(name):
+    """Absolute, signed link to an export file, valid for EXPORT_LINK_MAX_AGE seconds."""
+    token = signing.TimestampSigner(salt=LINK_SALT).sign_object(name)
+    return settings.SITE_URL.rstrip('/') + reverse('export-download', args=[token])
+
+
+def download_export(request, token):
+    """Serve an export file to the holder of a valid, unexpired link."""
+    try:
+        name = signing.TimestampSigner(salt=LINK_SALT).unsign_object(token, max_age=settings.EXPORT_LINK_MAX_AGE)
+    except signing.BadSignature:
+        raise Http404
+    storage = export_storage()
+    if not storage.exists(name):
+        raise Http404
+    response = FileResponse(storage.open(name), as_attachment=True, filename=os.path.basename(name))
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+def delete_expired_exports(now=None):
+    """Delete the export files whose links have expired. Returns how many."""
+    storage = export_storage()
+    cutoff = (now or timezone.now()) - timedelta(seconds=settings.EXPORT_LINK_MAX_AGE)
+    deleted = 0
+    pending = ['']
+    while pending:
+        directory = pending.pop()
+        if not storage.exists(directory or '.'):
+            continue
+        subdirectories, files = storage.listdir(directory or '.')
+        pending += [os.path.join(directory, name) for name in subdirectories]
+        for name in files:
+            path = os.path.join(directory, name)
+            if storage.get_modified_time(path) < cutoff:
+                storage.delete(path)
+                deleted += 1
+    return deleted
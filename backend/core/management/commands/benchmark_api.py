@@ -0,0 +1,273 @@
+"""
+HTTP latency benchmark for every GET route of the API.
+
+    python manage.py seed_scale --scale 0.1
+    python manage.py runserver  # or gunicorn
+    python manage.py benchmark_api --requests 200 --concurrency 8 --output run.json
+    python manage.py benchmark_api --compare run.json --output run2.json
+
+Routes are discovered from the URLconf (config/urls.py and the app
+routers). Detail routes are filled in with a primary key sampled from
+the database the server is using. Query counts are read from the
+Server-Timing header, so run the server with request metrics on
+(`--enable-metrics` flips the runtime switch for the duration).
+"""
+import json
+import math
+import re
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.authtoken.models import Token
+
+from apps.members.models import Member
+from core.middleware import METRICS_SWITCH_KEY
+
+NAMED_GROUP = re.compile(r'\(\?P<(?P<name>\w+)>[^)]*\)|<(?:\w+:)?(?P<conv>\w+)>')
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks every API GET route with concurrent clients and saves the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument('--requests', type=int, default=100, help='Requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--token', help='API token to authenticate with.')
+        parser.add_argument('--as-user', help='Email of the member to authenticate as (default: first staff member).')
+        parser.add_argument('--include', help='Only benchmark routes matching this regex.')
+        parser.add_argument('--exclude', default=r'^api/(schema|docs|redoc)/',
+                            help='Skip routes matching this regex.')
+        parser.add_argument('--output', help='Write results to this JSON file.')
+        parser.add_argument('--compare', help='Previous results file to diff against.')
+        parser.add_argument('--fail-threshold', type=float, default=None,
+                            help='Fail when any p95 regresses by more than this many percent.')
+        parser.add_argument('--enable-metrics', action='store_true',
+                            help='Turn on request metrics on the server for the run.')
+
+    def handle(self, *args, **options):
+        endpoints = self.discover(options['include'], options['exclude'])
+        if not endpoints:
+            raise CommandError('No routes matched.')
+        token = self.get_token(options)
+
+        if options['enable_metrics']:
+            previous = cache.get(METRICS_SWITCH_KEY)
+            cache.set(METRICS_SWITCH_KEY, True, None)
+            self.stdout.write(f'Waiting {settings.REQUEST_METRICS_SWITCH_TTL}s for workers to enable metrics...')
+            time.sleep(settings.REQUEST_METRICS_SWITCH_TTL)
+
+        try:
+            results = {}
+            for route, path in endpoints:
+                url = options['base_url'].rstrip('/') + '/' + path
+                results[route] = self.run(url, token, options['requests'], options['concurrency'])
+                self.report(route, results[route])
+        finally:
+            if options['enable_metrics']:
+                if previous is None:
+                    cache.delete(METRICS_SWITCH_KEY)
+                else:
+                    cache.set(METRICS_SWITCH_KEY, previous, None)
+
+        document = {
+            'meta': {
+                'base_url': options['base_url'],
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'finished_at': datetime.now(dt_timezone.utc).isoformat(),
+            },
+            'endpoints': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(document, fh, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['compare']:
+            self.compare(options['compare'], results, options['fail_threshold'], partial=bool(options['include']))
+
+    # ------------------------------------------------------------------
+    # Route discovery
+    # ------------------------------------------------------------------
+
+    def discover(self, include, exclude):
+        """Return (route, concrete path) pairs for every GET endpoint."""
+        endpoints = []
+        for route, callback in _walk(get_resolver().url_patterns):
+            if not route.startswith('api/') or '(?P<format>' in route:
+                continue
+            if include and not re.search(include, route):
+                continue
+            if exclude and re.search(exclude, route):
+                continue
+            if not _handles_get(callback):
+                continue
+            path = self.fill(route, callback)
+            if path is None:
+                self.stdout.write(self.style.WARNING(f'Skipping {route}: no row to point at'))
+                continue
+            endpoints.append((route, path))
+        return endpoints
+
+    def fill(self, route, callback):
+        """Substitute URL parameters with a primary key sampled from the database."""
+        if not NAMED_GROUP.search(route):
+            return route
+        view_class = getattr(callback, 'cls', None)
+        queryset = getattr(view_class, 'queryset', None)
+        if queryset is None:
+            return None
+        pk = queryset.model._default_manager.order_by('pk').values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        return NAMED_GROUP.sub(str(pk), route)
+
+    def get_token(self, options):
+        if options['token']:
+            return options['token']
+        members = Member.objects.filter(is_active=True)
+        if options['as_user']:
+            member = members.filter(email=options['as_user']).first()
+        else:
+            member = members.filter(is_staff=True).order_by('date_joined').first()
+        if member is None:
+            self.stdout.write(self.style.WARNING('No member to authenticate as; running anonymously.'))
+            return None
+        token, _ = Token.objects.get_or_create(user=member)
+        return token.key
+
+    # ------------------------------------------------------------------
+    # Load generation
+    # ------------------------------------------------------------------
+
+    def run(self, url, token, total, concurrency):
+        headers = {'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Token {token}'
+        samples = []
+        lock = threading.Lock()
+
+        def hit(_):
+            request = urllib.request.Request(url, headers=headers)
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    body = response.read()
+                    status = response.status
+                    server_timing = response.headers.get('Server-Timing', '')
+            except urllib.error.HTTPError as exc:
+                body = exc.read()
+                status = exc.code
+                server_timing = exc.headers.get('Server-Timing', '')
+            except urllib.error.URLError as exc:
+                raise CommandError(f'{url}: {exc.reason}')
+            elapsed = time.perf_counter() - start
+            queries = SERVER_TIMING_QUERIES.search(server_timing)
+            with lock:
+                samples.append((elapsed, status, len(body), int(queries.group(1)) if queries else None))
+
+        # One warm-up request so connection setup and cold caches don't skew p99.
+        hit(None)
+        samples.clear()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(hit, range(total)))
+        wall = time.perf_counter() - started
+
+        latencies = sorted(s[0] * 1000 for s in samples)
+        queries = [s[3] for s in samples if s[3] is not None]
+        return {
+            'p50_ms': round(_percentile(latencies, 50), 2),
+            'p95_ms': round(_percentile(latencies, 95), 2),
+            'p99_ms': round(_percentile(latencies, 99), 2),
+            'throughput_rps': round(len(samples) / wall, 1),
+            'errors': sum(1 for s in samples if s[1] >= 400),
+            'status': statistics.mode(s[1] for s in samples),
+            'response_bytes': int(statistics.mean(s[2] for s in samples)),
+            'queries': statistics.median_high(queries) if queries else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def report(self, route, result):
+        self.stdout.write(
+            f"{route:<60} p50 {result['p50_ms']:>8.1f}ms  p95 {result['p95_ms']:>8.1f}ms  "
+            f"p99 {result['p99_ms']:>8.1f}ms  {result['throughput_rps']:>7.1f} rps  "
+            f"{result['response_bytes']:>8}B  q={result['queries'] if result['queries'] is not None else '?'}"
+            + (f"  errors={result['errors']}" if result['errors'] else '')
+        )
+
+    def compare(self, path, results, threshold, partial=False):
+        with open(path) as fh:
+            previous = json.load(fh)['endpoints']
+
+        self.stdout.write(f'\nComparison with {path}:')
+        regressions = []
+        for route, result in results.items():
+            before = previous.get(route)
+            if before is None:
+                self.stdout.write(f'{route:<60} new')
+                continue
+            delta = _percent(before['p95_ms'], result['p95_ms'])
+            queries = ''
+            if before.get('queries') is not None and result['queries'] is not None:
+                queries = f"  queries {before['queries']} -> {result['queries']}"
+            line = f"{route:<60} p95 {before['p95_ms']:>8.1f} -> {result['p95_ms']:>8.1f}ms ({delta:+.0f}%){queries}"
+            if threshold is not None and delta > threshold:
+                regressions.append(route)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+        if not partial:
+            for route in sorted(previous.keys() - results.keys()):
+                self.stdout.write(f'{route:<60} removed')
+
+        if regressions:
+            raise CommandError(f'{len(regressions)} endpoint(s) regressed by more than {threshold}% at p95.')
+
+
+def _walk(patterns, prefix=''):
+    for entry in patterns:
+        pattern = _clean(str(entry.pattern))
+        if isinstance(entry, URLResolver):
+            yield from _walk(entry.url_patterns, prefix + pattern)
+        elif isinstance(entry, URLPattern):
+            yield prefix + pattern, entry.callback
+
+
+def _clean(pattern):
+    return pattern.lstrip('^').rstrip('$')
+
+
+def _handles_get(callback):
+    actions = getattr(callback, 'actions', None)
+    if actions is not None:
+        return 'get' in actions
+    view_class = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+    return view_class is not None and hasattr(view_class, 'get')
+
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return 0.0
+    # percent * n / 100 rather than percent / 100 * n: 7 / 100 * 100 is 7.000000000000001.
+    index = max(0, min(len(values) - 1, math.ceil(percent * len(values) / 100) - 1))
+    return values[index]
+
+
+def _percent(before, after):
+    return (after - before) / before * 100 if before else 0.0
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from core.middleware import METRICS_SWITCH_KEY
+
+
+class Command(BaseCommand):
+    help = 'Turns per-request SQL / Server-Timing instrumentation on or off at runtime'
+
+    def add_arguments(self, parser):
+        parser.add_argument('state', choices=['on', 'off', 'reset', 'status'])
+
+    def handle(self, *args, **options):
+        state = options['state']
+        if state == 'on':
+            cache.set(METRICS_SWITCH_KEY, True, None)
+        elif state == 'off':
+            cache.set(METRICS_SWITCH_KEY, False, None)
+        elif state == 'reset':
+            cache.delete(METRICS_SWITCH_KEY)
+
+        value = cache.get(METRICS_SWITCH_KEY)
+        if value is None:
+            self.stdout.write(f"Request metrics: {'on' if settings.REQUEST_METRICS_ENABLED else 'off'} (from settings)")
+        else:
+            self.stdout.write(f"Request metrics: {'on' if value else 'off'} (runtime switch)")
+        self.stdout.write(
+            f"Running workers pick up changes within {settings.REQUEST_METRICS_SWITCH_TTL}s."
+        )
@@ -0,0 +1,370 @@
+"""
+Generate a deterministic, production-sized dataset.
+
+    python manage.py seed_scale --scale 1 --seed 42
+
+At --scale 1 this inserts 100k members, 1M donations, 500k attendance
+records, 200k event registrations and 2M notifications, plus the
+campaigns, events, courses, students, families and skills they hang off.
+Rows are streamed in batches: COPY on PostgreSQL, bulk_create elsewhere.
+"""
+import csv
+import io
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.communications.models import Notification
+from apps.education.models import Attendance, Course, CourseLevel, Student
+from apps.events.models import Event, EventRegistration
+from apps.finance.models import Campaign, Donation
+from apps.members import skills as member_skills, stats as member_stats
+from apps.members.models import Member, MemberFamily, MemberSkill
+from core.cache import invalidate_model_cache
+
+# Row counts at --scale 1.
+BASE_COUNTS = {
+    'members': 100_000,
+    'families': 30_000,
+    'skills': 50_000,
+    'campaigns': 20,
+    'donations': 1_000_000,
+    'events': 500,
+    'registrations': 200_000,
+    'courses': 40,
+    'students': 50_000,
+    'attendance': 500_000,
+    'notifications': 2_000_000,
+}
+
+FIRST_NAMES = [
+    'Mohamed', 'Ahmed', 'Youssef', 'Karim', 'Omar', 'Ali', 'Hamza', 'Ibrahim', 'Samir', 'Bilal',
+    'Fatima', 'Aicha', 'Khadija', 'Meriem', 'Salma', 'Nadia', 'Leila', 'Sara', 'Amina', 'Yasmine',
+]
+LAST_NAMES = [
+    'Benali', 'El Amrani', 'Haddad', 'Touati', 'Bouzid', 'Cherif', 'Mansour', 'Khalil', 'Saidi',
+    'Rahmani', 'Belkacem', 'Ouali', 'Zerrouki', 'Brahimi', 'Lamine', 'Kaci', 'Meziane', 'Diallo',
+]
+SKILLS = [
+    'Cuisine', 'Informatique', 'Comptabilité', 'Enseignement', 'Arabe', 'Traduction',
+    'Premiers soins', 'Électricité', 'Plomberie', 'Photographie', 'Animation jeunesse', 'Chauffeur',
+]
+PROFICIENCIES = ['Débutant', 'Intermédiaire', 'Avancé', 'Expert']
+FSAS = ['H7A', 'H7B', 'H7C', 'H7E', 'H7G', 'H7H', 'H7K', 'H7L', 'H7M', 'H7N', 'H7P', 'H7S', 'H7T', 'H7V', 'H7W', 'H7X', 'H7Y']
+
+
+class Command(BaseCommand):
+    help = 'Generates a deterministic, seeded dataset at a chosen scale for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Multiplier applied to every base row count.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        for name in BASE_COUNTS:
+            parser.add_argument(f'--{name}', type=int, default=None,
+                                help=f'Override the number of {name} (default {BASE_COUNTS[name]:,} x scale).')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        counts = {
+            name: options[name] if options[name] is not None else max(1, int(base * options['scale']))
+            for name, base in BASE_COUNTS.items()
+        }
+        if counts['registrations'] > counts['events'] * counts['members']:
+            raise CommandError('More registrations requested than (event, member) pairs.')
+
+        self.use_copy = connection.vendor == 'postgresql'
+        self.stdout.write(f"Seeding with seed={options['seed']} ({'COPY' if self.use_copy else 'bulk_create'})")
+
+        members = self.seed(Member, counts['members'], self.member_rows)
+        member_stats.rebuild()
+        self.seed(MemberFamily, counts['families'], lambda n: self.family_rows(n, members), keep=False)
+        self.seed(MemberSkill, counts['skills'], lambda n: self.skill_rows(n, members), keep=False)
+        member_skills.link_all()
+        campaigns = self.seed(Campaign, counts['campaigns'], self.campaign_rows)
+        self.seed(Donation, counts['donations'], lambda n: self.donation_rows(n, members, campaigns), keep=False)
+        events = self.seed(Event, counts['events'], self.event_rows)
+        self.seed(EventRegistration, counts['registrations'], lambda n: self.registration_rows(n, events, members), keep=False)
+        courses = self.seed(Course, counts['courses'], lambda n: self.course_rows(n, members))
+        levels = self.seed(CourseLevel, len(courses) * 3, lambda n: self.level_rows(courses))
+        students = self.seed(Student, counts['students'], lambda n: self.student_rows(n, members, courses, levels))
+        self.seed(Attendance, counts['attendance'], lambda n: self.attendance_rows(n, students), keep=False)
+        self.seed(Notification, counts['notifications'], lambda n: self.notification_rows(n, members), keep=False)
+
+        self.stdout.write(self.style.SUCCESS('Done.'))
+
+    # ------------------------------------------------------------------
+    # Insertion
+    # ------------------------------------------------------------------
+
+    def seed(self, model, count, row_factory, keep=True):
+        """
+        Insert the rows produced by `row_factory(count)`.
+
+        Rows are dicts keyed by field attname; missing fields take their
+        model default. With `keep`, returns what dependants need to point
+        at (the id, or a row's `_keep` value); otherwise only the count.
+        """
+        started = time.perf_counter()
+        fields = model._meta.concrete_fields
+        kept = []
+        inserted = 0
+        batch = []
+        with transaction.atomic():
+            for row in row_factory(count):
+                if keep:
+                    kept.append(row.pop('_keep', row['id']))
+                batch.append(row)
+                inserted += 1
+                if len(batch) >= self.batch_size:
+                    self.insert(model, fields, batch)
+                    batch = []
+            if batch:
+                self.insert(model, fields, batch)
+        invalidate_model_cache(model)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"  {model._meta.db_table:<22} {inserted:>10,} rows  {elapsed:6.1f}s")
+        return kept if keep else inserted
+
+    def insert(self, model, fields, rows):
+        values = [[self.value(field, row) for field in fields] for row in rows]
+        if self.use_copy:
+            self.copy(model, fields, values)
+        else:
+            model.objects.bulk_create(
+                [model(**dict(zip((f.attname for f in fields), vals))) for vals in values],
+                batch_size=self.batch_size,
+            )
+
+    def value(self, field, row):
+        if field.attname in row:
+            return row[field.attname]
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            return self.now
+        return field.get_default()
+
+    def copy(self, model, fields, values):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for vals in values:
+            writer.writerow([_copy_literal(v) for v in vals])
+        buffer.seek(0)
+        columns = ', '.join(connection.ops.quote_name(f.column) for f in fields)
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) "
+                f"FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+
+    # ------------------------------------------------------------------
+    # Row factories
+    # ------------------------------------------------------------------
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def moment(self, days_back=3 * 365):
+        return self.now - timedelta(seconds=self.rng.randrange(days_back * 86400))
+
+    def member_rows(self, count):
+        for i in range(count):
+            created = self.moment()
+            sex = self.rng.choice(['M', 'F'])
+            first = self.rng.choice(FIRST_NAMES[:10] if sex == 'M' else FIRST_NAMES[10:])
+            yield {
+                'id': self.uuid(),
+                'username': uuid.UUID(int=self.rng.getrandbits(128), version=4).hex,
+                'password': UNUSABLE_PASSWORD_PREFIX + 'seed',
+                'first_name': first,
+                'last_name': self.rng.choice(LAST_NAMES),
+                # A third of the members register by phone only, the rest by email (half also give a phone).
+                'email': f'membre{i}@seed.acml.local' if i % 3 != 1 else None,
+                'phone': f'450{i:07d}' if i % 2 == 1 or i % 3 == 1 else None,
+                'sex': sex,
+                'status': self.rng.choices(['ACTIVE', 'INACTIVE', 'PENDING'], weights=[80, 12, 8])[0],
+                'postal_code': f'{self.rng.choice(FSAS)} {self.rng.randint(1, 9)}{chr(65 + self.rng.randrange(26))}{self.rng.randint(1, 9)}',
+                'must_change_password': False,
+                'date_joined': created,
+                'consent_timestamp': created,
+                'consent_version': '1.0',
+                'data_retention_date': (created + timedelta(days=3 * 365)).date(),
+                'created_at': created,
+                'updated_at': created,
+            }
+
+    def family_rows(self, count, members):
+        for _ in range(count):
+            yield {
+                'id': self.uuid(),
+                'member_id': self.rng.choice(members),
+                'related_member_id': self.rng.choice(members),
+                'relationship': self.rng.choice(['SPOUSE', 'CHILD', 'PARENT']),
+                'first_name': self.rng.choice(FIRST_NAMES),
+                'last_name': self.rng.choice(LAST_NAMES),
+                'created_at': self.moment(),
+            }
+
+    def skill_rows(self, count, members):
+        # unique (member, skill_name): walk members, giving each a run of distinct skills.
+        for i in range(count):
+            member = members[i % len(members)]
+            skill = SKILLS[(i // len(members) + hash(member) % len(SKILLS)) % len(SKILLS)]
+            yield {
+                'id': self.uuid(),
+                'member_id': member,
+                'skill_name': skill,
+                'proficiency': self.rng.choice(PROFICIENCIES),
+            }
+
+    def campaign_rows(self, count):
+        for i in range(count):
+            start = self.moment().date()
+            yield {
+                'id': self.uuid(),
+                'name': f'Campagne {i + 1}',
+                'goal_amount': Decimal(self.rng.randrange(5_000, 500_000)),
+                'start_date': start,
+                'end_date': start + timedelta(days=self.rng.randint(30, 365)),
+                'is_active': i % 4 != 0,
+                'created_at': self.moment(),
+            }
+
+    def donation_rows(self, count, members, campaigns):
+        for _ in range(count):
+            yield {
+                'id': self.uuid(),
+                'member_id': self.rng.choice(members) if self.rng.random() < 0.95 else None,
+                'campaign_id': self.rng.choice(campaigns) if self.rng.random() < 0.6 else None,
+                'amount': Decimal(self.rng.randrange(500, 50_000)) / 100,
+                'type': self.rng.choice(['COTISATION', 'ONE_TIME', 'RECURRING']),
+                'payment_method': self.rng.choice(['STRIPE', 'INTERAC', 'PAYPAL', 'CASH', 'OTHER']),
+                'payment_id': uuid.UUID(int=self.rng.getrandbits(128), version=4).hex,
+                'status': self.rng.choices(['COMPLETED', 'PENDING', 'FAILED', 'REFUNDED'], weights=[90, 5, 4, 1])[0],
+                'donated_at': self.moment(),
+            }
+
+    def event_rows(self, count):
+        for i in range(count):
+            start = self.moment(days_back=2 * 365) + timedelta(days=365)
+            yield {
+                'id': self.uuid(),
+                'title': f'Événement {i + 1}',
+                'start_date': start,
+                'end_date': start + timedelta(hours=self.rng.randint(1, 6)),
+                'location': 'Centre communautaire',
+                'max_capacity': self.rng.choice([None, 100, 500, 2000]),
+                'status': self.rng.choice(['OPEN', 'CLOSED', 'COMPLETED']),
+                'barcode_prefix': f'EV{i:04d}',
+                'created_at': start - timedelta(days=30),
+                'updated_at': start - timedelta(days=30),
+            }
+
+    def registration_rows(self, count, events, members):
+        # unique (event, member): each event walks the member list from its own offset.
+        offsets = [self.rng.randrange(len(members)) for _ in events]
+        for i in range(count):
+            event_index = i % len(events)
+            member = members[(offsets[event_index] + i // len(events)) % len(members)]
+            yield {
+                'id': self.uuid(),
+                'event_id': events[event_index],
+                'member_id': member,
+                'status': self.rng.choices(['REGISTERED', 'CHECKED_IN', 'CANCELLED'], weights=[60, 35, 5])[0],
+                'barcode': f'EV{event_index:04d}-{i:08d}',
+                'image_consent': self.rng.random() < 0.5,
+                'registered_at': self.moment(),
+            }
+
+    def course_rows(self, count, members):
+        for i in range(count):
+            yield {
+                'id': self.uuid(),
+                'name': f'Cours {i + 1}',
+                'teacher_id': self.rng.choice(members),
+                'schedule': 'Samedi 10h-12h',
+                'current_session': '2025-2026',
+                'status': 'ACTIVE',
+                'created_at': self.moment(),
+            }
+
+    def level_rows(self, courses):
+        for course in courses:
+            for order in range(3):
+                level_id = self.uuid()
+                yield {
+                    'id': level_id,
+                    'course_id': course,
+                    'name': f'Niveau {order + 1}',
+                    'order_num': order,
+                    '_keep': (course, level_id),
+                }
+
+    def student_rows(self, count, members, courses, levels):
+        levels_by_course = {}
+        for course, level in levels:
+            levels_by_course.setdefault(course, []).append(level)
+        for _ in range(count):
+            course = self.rng.choice(courses)
+            student_id = self.uuid()
+            yield {
+                'id': student_id,
+                'parent_member_id': self.rng.choice(members),
+                'course_id': course,
+                'level_id': self.rng.choice(levels_by_course[course]),
+                'first_name': self.rng.choice(FIRST_NAMES),
+                'last_name': self.rng.choice(LAST_NAMES),
+                'birth_date': date(2010, 1, 1) + timedelta(days=self.rng.randrange(10 * 365)),
+                'payment_status': self.rng.choice(['PAID', 'PARTIAL', 'UNPAID', 'EXEMPT']),
+                'enrolled_at': self.moment(),
+                '_keep': (student_id, course),
+            }
+
+    def attendance_rows(self, count, students):
+        # unique (student, course, date): each pass over the students is one more weekly class.
+        first_class = date(2023, 9, 2)
+        for i in range(count):
+            student, course = students[i % len(students)]
+            yield {
+                'id': self.uuid(),
+                'student_id': student,
+                'course_id': course,
+                'date': first_class + timedelta(weeks=i // len(students)),
+                'status': self.rng.choices(['PRESENT', 'ABSENT', 'EXCUSED', 'LATE'], weights=[80, 10, 5, 5])[0],
+            }
+
+    def notification_rows(self, count, members):
+        for _ in range(count):
+            created = self.moment()
+            sent = self.rng.random() < 0.9
+            yield {
+                'id': self.uuid(),
+                'member_id': self.rng.choice(members),
+                'channel': self.rng.choices(['EMAIL', 'SMS', 'PUSH'], weights=[70, 20, 10])[0],
+                'subject': 'Rappel',
+                'content': 'Rappel : la prière du vendredi commence à 13h15.',
+                'status': 'SENT' if sent else 'PENDING',
+                'sent_at': created + timedelta(minutes=1) if sent else None,
+                'created_at': created,
+                'updated_at': created,
+            }
+
+
+def _copy_literal(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
@@ -0,0 +1,80 @@
+"""
+Per-request performance metrics.
+
+RequestMetricsMiddleware opens a RequestMetrics for each request; code
+running inside the request records into it through the helpers below,
+which are no-ops when instrumentation is off.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Counters collected while serving one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.timings = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper, see `connection.execute_wrapper`."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+    def add_timing(self, name: str, seconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    @property
+    def total_time(self) -> float:
+        return time.perf_counter() - self.started
+
+
+def current() -> RequestMetrics | None:
+    """Return the metrics of the request being served, if instrumented."""
+    return _current.get()
+
+
+def activate(metrics: RequestMetrics):
+    return _current.set(metrics)
+
+
+def deactivate(token) -> None:
+    _current.reset(token)
+
+
+def record_cache(hit: bool) -> None:
+    """Count a cache lookup against the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def record_timing(name: str, seconds: float) -> None:
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add_timing(name, seconds)
+
+
+@contextmanager
+def timer(name: str):
+    """Time a block of code against the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - start)
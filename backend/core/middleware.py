@@ -0,0 +1,95 @@
+"""
+Middleware for ACML Platform.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger('acml.metrics')
+
+METRICS_SWITCH_KEY = 'metrics:enabled'
+
+_switch = {'value': False, 'expires': 0.0}
+
+
+def metrics_enabled() -> bool:
+    """
+    Whether request instrumentation is on.
+
+    The runtime switch in the cache (see the `request_metrics` command)
+    wins over settings.REQUEST_METRICS_ENABLED. It is re-read at most every
+    REQUEST_METRICS_SWITCH_TTL seconds per process.
+    """
+    now = time.monotonic()
+    if now >= _switch['expires']:
+        value = cache.get(METRICS_SWITCH_KEY)
+        _switch['value'] = settings.REQUEST_METRICS_ENABLED if value is None else value
+        _switch['expires'] = now + settings.REQUEST_METRICS_SWITCH_TTL
+    return _switch['value']
+
+
+def reset_metrics_switch() -> None:
+    """Forget the memoised switch so the next request re-reads it."""
+    _switch['expires'] = 0.0
+
+
+class RequestMetricsMiddleware:
+    """
+    Count queries, SQL time, serialization time and cache hits per request.
+
+    Results are sent as a Server-Timing header (visible in the browser
+    devtools) and logged as one JSON line on the `acml.metrics` logger.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not metrics_enabled():
+            return self.get_response(request)
+
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.activate(request_metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(request_metrics))
+                response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+
+        response['Server-Timing'] = self.server_timing(request_metrics)
+        logger.info(json.dumps(self.log_record(request, response, request_metrics)))
+        return response
+
+    def server_timing(self, request_metrics):
+        entries = [
+            'db;dur=%.1f;desc="%d queries"' % (request_metrics.db_time * 1000, request_metrics.queries),
+        ]
+        for name, seconds in request_metrics.timings.items():
+            entries.append('%s;dur=%.1f' % (name, seconds * 1000))
+        entries.append('cache;desc="%d hit, %d miss"' % (request_metrics.cache_hits, request_metrics.cache_misses))
+        entries.append('total;dur=%.1f' % (request_metrics.total_time * 1000))
+        return ', '.join(entries)
+
+    def log_record(self, request, response, request_metrics):
+        match = getattr(request, 'resolver_match', None)
+        return {
+            'method': request.method,
+            'path': request.path,
+            'route': match.route if match else None,
+            'status': response.status_code,
+            'queries': request_metrics.queries,
+            'db_ms': round(request_metrics.db_time * 1000, 1),
+            'timings_ms': {name: round(s * 1000, 1) for name, s in request_metrics.timings.items()},
+            'cache_hits': request_metrics.cache_hits,
+            'cache_misses': request_metrics.cache_misses,
+            'total_ms': round(request_metrics.total_time * 1000, 1),
+        }
@@ -0,0 +1,151 @@
+"""
+Pagination classes for ACML Platform.
+"""
+import json
+import time
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+from . import metrics
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Keyset (seek) pagination over a composite, unique ordering.
+
+    DRF's CursorPagination only seeks on the first ordering field and falls
+    back to OFFSET for ties. Here the cursor position carries every ordering
+    field, so with a unique tail (usually the primary key) each page is a
+    single indexed range scan, whatever its depth.
+
+    Views choose their key with a `cursor_ordering` attribute, e.g.
+    `cursor_ordering = ('-donated_at', '-id')`, or a `get_cursor_ordering()`
+    method when it depends on the request.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        if hasattr(view, 'get_cursor_ordering'):
+            ordering = view.get_cursor_ordering()
+        else:
+            ordering = getattr(view, 'cursor_ordering', None)
+        ordering = ordering or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        assert not any('__' in field for field in ordering), (
+            'Keyset pagination does not support double underscore lookups.'
+        )
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            seek = self._get_seek_filter(self._decode_position(current_position), reverse)
+            try:
+                queryset = queryset.filter(seek)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # Fetch one extra row to know whether a following page exists.
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        # The view serializes the page between here and get_paginated_response().
+        self.page_fetched_at = time.perf_counter()
+        return self.page
+
+    def get_paginated_response(self, data):
+        metrics.record_timing('serialize', time.perf_counter() - self.page_fetched_at)
+        return super().get_paginated_response(data)
+
+    def _get_seek_filter(self, values, reverse):
+        """
+        Build `(a, b) < (x, y)` as `a < x OR (a = x AND b < y)`, honouring
+        the direction of each ordering field.
+        """
+        seek = Q()
+        equal = {}
+        for order, value in zip(self.ordering, values):
+            attr = order.lstrip('-')
+            descending = order.startswith('-') != reverse
+            lookup = '__lt' if descending else '__gt'
+            seek |= Q(**equal, **{attr + lookup: value})
+            equal[attr] = value
+        return seek
+
+    def _decode_position(self, position):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field_name = order.lstrip('-')
+            if isinstance(instance, dict):
+                attr = instance[field_name]
+            else:
+                attr = getattr(instance, field_name)
+            values.append(None if attr is None else str(attr))
+        return json.dumps(values, separators=(',', ':'))
+
+
+def _reverse_ordering(ordering_tuple):
+    def invert(x):
+        return x[1:] if x.startswith('-') else '-' + x
+
+    return tuple([invert(item) for item in ordering_tuple])
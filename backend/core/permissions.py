@@ -1,8 +1,12 @@
 """
 Role-Based Access Control (RBAC) permissions for ACML Platform.
+
+Group-based roles are resolved through core.roles, once per request.
 """
 from rest_framework.permissions import BasePermission
 
+from .roles import EVENT_MANAGER, TEACHER, TREASURER, has_role
+
 
 class IsAdmin(BasePermission):
     """Only authenticated admin users can access."""
@@ -22,7 +26,7 @@ class IsTreasurer(BasePermission):
         return (
             request.user and
             request.user.is_authenticated and
-            request.user.groups.filter(name='Treasurer').exists()
+            has_role(request, TREASURER)
         )
 
 
@@ -32,7 +36,7 @@ class IsTeacher(BasePermission):
         return (
             request.user and
             request.user.is_authenticated and
-            request.user.groups.filter(name='Teacher').exists()
+            has_role(request, TEACHER)
         )
 
 
@@ -42,7 +46,7 @@ class IsEventManager(BasePermission):
         return (
             request.user and
             request.user.is_authenticated and
-            request.user.groups.filter(name='EventManager').exists()
+            has_role(request, EVENT_MANAGER)
         )
 
 
@@ -53,16 +57,7 @@ class IsOwnerOrAdmin(BasePermission):
         if request.user.is_staff:
             return True
 
-        # Check if object has a member/user field
-        if hasattr(obj, 'member'):
-            return obj.member == request.user
-        if hasattr(obj, 'user'):
-            return obj.user == request.user
-        if hasattr(obj, 'created_by'):
-            return obj.created_by == request.user
-
-        # Direct object comparison
-        return obj == request.user
+        return _is_owner(request, obj, ('member', 'user', 'created_by'))
 
 
 class IsOwnerOrAdminOrTreasurer(BasePermission):
@@ -76,16 +71,10 @@ class IsOwnerOrAdminOrTreasurer(BasePermission):
             return True
 
         # Treasurers have access
-        if request.user.groups.filter(name='Treasurer').exists():
+        if has_role(request, TREASURER):
             return True
 
-        # Check ownership
-        if hasattr(obj, 'member'):
-            return obj.member == request.user
-        if hasattr(obj, 'user'):
-            return obj.user == request.user
-
-        return obj == request.user
+        return _is_owner(request, obj, ('member', 'user'))
 
 
 class IsReadOnly(BasePermission):
@@ -103,3 +92,16 @@ class IsActiveMember(BasePermission):
             hasattr(request.user, 'status') and
             request.user.status == 'ACTIVE'
         )
+
+
+def _is_owner(request, obj, fields):
+    """
+    Whether `obj` belongs to the requesting member, through the first of
+    `fields` it has. Foreign keys are compared by id so checking a page of
+    objects does not load each owner.
+    """
+    for field in fields:
+        if hasattr(obj, f'{field}_id'):
+            return getattr(obj, f'{field}_id') == request.user.pk
+    # Direct object comparison
+    return obj == request.user
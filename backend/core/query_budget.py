@@ -0,0 +1,95 @@
+"""
+Query budgets: a fixed ceiling on the SQL queries an endpoint may issue.
+
+Budgets are declared in query_budgets.toml at the backend root and
+checked by core.tests.QueryBudgetTest against a dataset larger than a
+page, so an N+1 introduced by a nested serializer field blows the budget
+instead of slipping through.
+"""
+import os
+import time
+import tomllib
+import traceback
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+BUDGET_FILE = Path(settings.BASE_DIR) / 'query_budgets.toml'
+
+
+def load_budgets(path=BUDGET_FILE) -> dict[str, int]:
+    """Return the budgets keyed by URL name (e.g. 'member-list')."""
+    with open(path, 'rb') as fh:
+        return tomllib.load(fh)['budgets']
+
+
+class QueryRecorder:
+    """
+    Record every query run on any connection, with the project frame that
+    issued it.
+
+        with QueryRecorder() as recorder:
+            client.get(url)
+        recorder.count, recorder.report()
+    """
+
+    def __init__(self):
+        self.queries = []
+        self._stack = ExitStack()
+
+    def __enter__(self):
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'duration': time.perf_counter() - start,
+                'origin': _origin(),
+            })
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    def report(self) -> str:
+        """Readable listing of the recorded queries and where they came from."""
+        lines = []
+        for number, query in enumerate(self.queries, 1):
+            lines.append(f"{number:>3}. {query['sql']}")
+            for frame in query['origin']:
+                lines.append(f"       at {frame}")
+        return '\n'.join(lines)
+
+
+def _origin(depth=4):
+    """
+    The innermost frames that issued a query, skipping ORM internals so the
+    serializer field or view line that triggered it comes first.
+    """
+    base = str(settings.BASE_DIR)
+    frames = []
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if filename == __file__ or f'{os.sep}django{os.sep}db{os.sep}' in filename:
+            continue
+        if 'site-packages' in filename:
+            filename = filename.split('site-packages' + os.sep, 1)[1]
+        elif filename.startswith(base):
+            filename = os.path.relpath(filename, base)
+        else:
+            continue
+        frames.append(f'{filename}:{frame.lineno} in {frame.name}')
+        if len(frames) == depth:
+            break
+    return frames
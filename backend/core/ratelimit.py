@@ -0,0 +1,36 @@
+"""
+Rate limits shared by every process, through the cache.
+
+Providers (SMTP relays, SMS gateways...) cap how many messages they take
+per second across all of our workers, so the budget cannot live in one
+process: each second gets a counter in the cache, and callers over the
+budget sleep until the next second.
+"""
+import time
+
+from django.core.cache import cache
+
+WINDOW_KEY = 'ratelimit:{name}:{window}'
+
+
+def wait(name: str, rate: int, amount: int = 1) -> None:
+    """
+    Block until `amount` more units of `name` fit in `rate` per second.
+    A falsy `rate` means no limit.
+    """
+    if not rate:
+        return
+    while True:
+        now = time.time()
+        window = int(now)
+        key = WINDOW_KEY.format(name=name, window=window)
+        cache.add(key, 0, 5)
+        try:
+            used = cache.incr(key, amount)
+        except ValueError:
+            # Expired between add() and incr().
+            continue
+        # A request larger than the whole budget goes alone in its second.
+        if used <= rate or used == amount:
+            return
+        time.sleep(window + 1 - now)
@@ -0,0 +1,56 @@
+"""
+Role resolution for core.permissions.
+
+A member's roles are the names of their auth groups. They are loaded once
+per request and, when ROLES_CACHE_TIMEOUT is set, cached across requests
+under a key stamped with the auth.Group cache generation: any group save,
+delete or membership change bumps the generation (see CoreConfig.ready())
+and every cached role set goes stale at once.
+"""
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+
+from .cache import get_generation, invalidate_model_cache
+
+ROLES_KEY = 'roles:{pk}:{version}'
+
+TREASURER = 'Treasurer'
+TEACHER = 'Teacher'
+EVENT_MANAGER = 'EventManager'
+
+
+def get_roles(request) -> frozenset[str]:
+    """Return the group names of the requesting member."""
+    roles = getattr(request, '_roles', None)
+    if roles is not None:
+        return roles
+
+    user = request.user
+    if not user or not user.is_authenticated:
+        roles = frozenset()
+    elif settings.ROLES_CACHE_TIMEOUT:
+        key = ROLES_KEY.format(pk=user.pk, version=get_generation(Group))
+        roles = cache.get(key)
+        if roles is None:
+            roles = _load_roles(user)
+            cache.set(key, roles, settings.ROLES_CACHE_TIMEOUT)
+    else:
+        roles = _load_roles(user)
+
+    request._roles = roles
+    return roles
+
+
+def has_role(request, role: str) -> bool:
+    return role in get_roles(request)
+
+
+def _load_roles(user) -> frozenset[str]:
+    return frozenset(user.groups.values_list('name', flat=True))
+
+
+def invalidate_roles_on_membership_change(sender, action, **kwargs):
+    """m2m_changed receiver for the user model's groups relation."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_model_cache(Group)
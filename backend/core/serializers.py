@@ -0,0 +1,48 @@
+"""
+Shared serializer base classes for ACML Platform.
+"""
+from rest_framework import serializers
+
+
+def get_query_list(request, param: str) -> set[str] | None:
+    """
+    Parse a comma-separated query parameter (e.g. `?fields=id,email`).
+    Returns None when the parameter is absent.
+    """
+    if request is None:
+        return None
+    raw = request.query_params.get(param)
+    if raw is None:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer supporting sparse fieldsets and opt-in expansion.
+
+    - `?fields=a,b` keeps only the listed fields.
+    - Nested relations named in `Meta.expandable_fields` are left out
+      unless requested with `?expand=rel1,rel2`.
+
+    Only the top-level serializer of a request reads the query string;
+    nested serializers are declared without a context and are unaffected.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            expand = set()
+            requested = None
+        else:
+            expand = get_query_list(request, 'expand') or set()
+            requested = get_query_list(request, 'fields')
+
+        for name in getattr(self.Meta, 'expandable_fields', ()):
+            if name not in expand:
+                self.fields.pop(name, None)
+
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
@@ -0,0 +1,57 @@
+"""
+SMS backends, after django.core.mail's email backends.
+
+SMS_BACKEND names the class used by get_backend():
+
+- TwilioBackend sends through Twilio with one client per process, so its
+  HTTP connection pool is reused instead of rebuilt for every message.
+- LocMemBackend keeps the messages in `outbox`, for tests and local
+  development.
+"""
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Messages "sent" by LocMemBackend.
+outbox = []
+
+
+class SmsMessage(NamedTuple):
+    to: str
+    body: str
+
+
+def to_e164(phone: str) -> str:
+    """International form of a member's phone number ('5145550123' -> '+15145550123')."""
+    digits = ''.join(filter(str.isdigit, phone or ''))
+    return f'+1{digits}' if len(digits) == 10 else f'+{digits}'
+
+
+class BaseBackend:
+    def send(self, to: str, body: str) -> None:
+        """Send one message; raises on failure."""
+        raise NotImplementedError
+
+
+@lru_cache(maxsize=None)
+def _twilio_client(account_sid, auth_token):
+    from twilio.rest import Client
+
+    return Client(account_sid, auth_token)
+
+
+class TwilioBackend(BaseBackend):
+    def send(self, to, body):
+        client = _twilio_client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        client.messages.create(body=body, from_=settings.TWILIO_PHONE_NUMBER, to=to_e164(to))
+
+
+class LocMemBackend(BaseBackend):
+    def send(self, to, body):
+        outbox.append(SmsMessage(to_e164(to), body))
+
+
+def get_backend(path=None) -> BaseBackend:
+    return import_string(path or settings.SMS_BACKEND)()
@@ -0,0 +1,26 @@
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .exports import delete_expired_exports, download_url, run_export
+from .utils import send_notification_email
+
+EXPORT_SUBJECT = 'Votre export est prêt'
+EXPORT_MESSAGE = 'Bonjour,\n\nVotre export est disponible ici pendant {hours} heures : {url}\n'
+
+
+@shared_task
+def export_to_storage(view_path, user_id, file_format, query_string=''):
+    """Background export, see core.exports. Emails the link to the requester."""
+    user = get_user_model().objects.get(pk=user_id)
+    name = run_export(view_path, user, file_format, query_string)
+    if user.email:
+        message = EXPORT_MESSAGE.format(url=download_url(name), hours=settings.EXPORT_LINK_MAX_AGE // 3600)
+        send_notification_email(user.email, EXPORT_SUBJECT, message)
+    return name
+
+
+@shared_task
+def delete_old_exports():
+    """Daily: delete the background exports whose links have expired."""
+    return delete_expired_exports()
@@ -0,0 +1,375 @@
+import pickle
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from apps.communications.models import Announcement, CalendarEvent, Newsletter, Notification
+from apps.events.models import Event, EventFeedback, EventPhoto
+from apps.finance.models import Donation, TaxReceipt
+from apps.members.models import DuplicateCandidate, Member, MemberCard, MemberContribution
+from apps.resources.models import Reservation, Resource
+from core import ratelimit
+from core.exports import delete_expired_exports, download_url, export_storage, run_export, stream_csv
+from core.permissions import IsOwnerOrAdminOrTreasurer, IsTreasurer
+from core.query_budget import QueryRecorder, load_budgets
+
+# Larger than the default page size so a per-row query shows up as dozens
+# of extra queries rather than one or two.
+ROWS = 60
+
+
+class QueryBudgetTest(APITestCase):
+    """Every list and detail endpoint stays within query_budgets.toml."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_scale', stdout=StringIO(),
+            members=ROWS * 2, families=ROWS, skills=ROWS, campaigns=3, donations=ROWS,
+            events=3, registrations=ROWS, courses=2, students=ROWS, attendance=ROWS,
+            notifications=ROWS,
+        )
+        cls.admin = Member.objects.create_superuser(
+            email='budget@example.com', password='password123', postal_code='H1A1A1',
+        )
+        cls.token = Token.objects.create(user=cls.admin)
+
+        # Tables seed_scale does not fill.
+        now = timezone.now()
+        members = list(Member.objects.exclude(pk=cls.admin.pk)[:ROWS])
+        events = list(Event.objects.all())
+        Announcement.objects.bulk_create(
+            Announcement(title=f'Annonce {i}', content='...', status=Announcement.Status.PUBLISHED,
+                         published_at=now, created_by=cls.admin)
+            for i in range(ROWS)
+        )
+        CalendarEvent.objects.bulk_create(
+            CalendarEvent(title=f'Activité {i}', start_time=now + timedelta(days=i),
+                          end_time=now + timedelta(days=i, hours=1))
+            for i in range(ROWS)
+        )
+        Newsletter.objects.bulk_create(
+            Newsletter(subject=f'Infolettre {i}', content='...') for i in range(ROWS)
+        )
+        Notification.objects.bulk_create(
+            Notification(member=cls.admin, channel='EMAIL', content=f'Message {i}') for i in range(ROWS)
+        )
+        EventPhoto.objects.bulk_create(
+            EventPhoto(event=events[i % len(events)], image=f'events/photo{i}.jpg') for i in range(ROWS)
+        )
+        EventFeedback.objects.bulk_create(
+            EventFeedback(event=events[i % len(events)], member=member, rating=4)
+            for i, member in enumerate(members)
+        )
+        TaxReceipt.objects.bulk_create(
+            TaxReceipt(member=member, receipt_number=f'R-{i}', year=2025, total_amount=Decimal('100'),
+                       organization_number='123', pdf_path=f'receipts/{i}.pdf')
+            for i, member in enumerate(members)
+        )
+        MemberContribution.objects.bulk_create(
+            MemberContribution(member=member, type='DON', amount=Decimal('10'), contributed_at=date.today())
+            for member in members
+        )
+        MemberCard.objects.bulk_create(
+            MemberCard(member=member, card_number=f'C-{i}', year=2025) for i, member in enumerate(members)
+        )
+        DuplicateCandidate.objects.bulk_create(
+            DuplicateCandidate(member_a=a, member_b=b, score=0.8, reasons=['name'])
+            for a, b in zip(members, members[1:])
+        )
+        resources = Resource.objects.bulk_create(
+            Resource(name=f'Salle {i}', type=Resource.Type.ROOM) for i in range(ROWS)
+        )
+        Reservation.objects.bulk_create(
+            Reservation(resource=resource, member=members[i], start_time=now + timedelta(days=i),
+                        end_time=now + timedelta(days=i, hours=2))
+            for i, resource in enumerate(resources)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.budgets = load_budgets()
+
+    def measure(self, url):
+        cache.clear()
+        with QueryRecorder() as recorder:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, f'{url}: {response.status_code}')
+        return response, recorder
+
+    def assertWithinBudget(self, name, url, recorder):
+        budget = self.budgets[name]
+        if recorder.count > budget:
+            self.fail(
+                f'{name} ({url}) ran {recorder.count} queries, budget is {budget}:\n'
+                f'{recorder.report()}'
+            )
+
+    def test_every_route_has_a_budget(self):
+        routes = {
+            name for name in get_resolver().reverse_dict
+            if isinstance(name, str) and name.endswith(('-list', '-detail'))
+        }
+        self.assertEqual(sorted(routes - self.budgets.keys()), [])
+        self.assertEqual(sorted(self.budgets.keys() - routes), [])
+
+    def test_list_and_detail_within_budget(self):
+        for name in sorted(self.budgets):
+            if not name.endswith('-list'):
+                continue
+            with self.subTest(name):
+                url = reverse(name)
+                response, recorder = self.measure(url)
+                self.assertWithinBudget(name, url, recorder)
+
+                results = response.data['results']
+                self.assertTrue(results, f'{name}: no rows to measure against')
+                detail = name.replace('-list', '-detail')
+                url = reverse(detail, kwargs={'pk': results[0]['id']})
+                _, recorder = self.measure(url)
+                self.assertWithinBudget(detail, url, recorder)
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        for name in sorted(self.budgets):
+            if not name.endswith('-list'):
+                continue
+            with self.subTest(name):
+                url = reverse(name)
+                _, small = self.measure(f'{url}?page_size=5')
+                _, large = self.measure(f'{url}?page_size={ROWS}')
+                self.assertEqual(small.count, large.count, f'{name}:\n{large.report()}')
+
+
+class BenchmarkPercentileTest(SimpleTestCase):
+    """benchmark_api reports nearest-rank percentiles."""
+
+    def test_nearest_rank(self):
+        from core.management.commands.benchmark_api import _percentile
+
+        values = list(range(1, 101))
+        self.assertEqual([_percentile(values, p) for p in (1, 7, 50, 95, 99, 100)], [1, 7, 50, 95, 99, 100])
+        self.assertEqual(_percentile(values, 0), 1)
+        self.assertEqual(_percentile([5], 99), 5)
+        self.assertEqual(_percentile([], 50), 0.0)
+
+
+class CachedTokenAuthenticationTest(APITestCase):
+    """Token lookups are served from the cache and dropped on change."""
+
+    def setUp(self):
+        cache.clear()
+        self.member = Member.objects.create_user(
+            email='auth@example.com', password='password123', postal_code='H1A1A1',
+        )
+        self.token = Token.objects.create(user=self.member)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('notification-list')
+
+    def test_second_request_skips_token_query(self):
+        self.client.get(self.url)
+        with QueryRecorder() as recorder:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            [q for q in recorder.queries if 'authtoken_token' in q['sql']], recorder.report()
+        )
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(self.url)
+        self.token.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deactivated_member_is_rejected(self):
+        self.client.get(self.url)
+        self.member.is_active = False
+        self.member.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_password_change_refreshes_cached_member(self):
+        self.client.get(self.url)
+        response = self.client.post(reverse('member-change-password'), {'password': 'nouveau-mdp-42'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(f'auth:user:{self.member.pk}'))
+        self.client.get(self.url)
+        self.assertTrue(cache.get(f'auth:user:{self.member.pk}').check_password('nouveau-mdp-42'))
+
+    def test_password_hash_is_not_cached(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+            cached = cache.get(f'auth:user:{self.member.pk}')
+            self.assertNotIn('password', cached.__dict__)
+            self.assertNotIn(self.member.password.encode(), pickle.dumps(cached))
+
+    def test_session_request_skips_members_query(self):
+        self.client.credentials()
+        self.assertTrue(self.client.login(username='auth@example.com', password='password123'))
+        self.client.get(self.url)
+        with QueryRecorder() as recorder:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in recorder.queries if '"members"' in q['sql']], recorder.report())
+
+        # A password change still ends the other sessions.
+        self.member.set_password('nouveau-mdp-42')
+        self.member.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class RoleResolutionTest(APITestCase):
+    """Group roles are loaded once per request and cached across requests."""
+
+    def setUp(self):
+        cache.clear()
+        self.treasurer = Member.objects.create_user(
+            email='tresorier@example.com', password='password123', postal_code='H1A1A1',
+        )
+        self.treasurer.groups.add(Group.objects.create(name='Treasurer'))
+        self.donor = Member.objects.create_user(
+            email='donateur@example.com', password='password123', postal_code='H1A1A1',
+        )
+        Donation.objects.bulk_create(
+            Donation(member=self.donor, amount=Decimal('20'), type='ONE_TIME', payment_method='CASH')
+            for _ in range(5)
+        )
+        self.client.force_authenticate(self.treasurer)
+
+    def group_queries(self, recorder):
+        return [q for q in recorder.queries if 'auth_group' in q['sql']]
+
+    def request(self):
+        request = Request(APIRequestFactory().get('/'))
+        request.user = self.treasurer
+        return request
+
+    def test_roles_loaded_once_per_request_and_cached(self):
+        request = self.request()
+        with QueryRecorder() as recorder:
+            self.assertTrue(all(
+                IsOwnerOrAdminOrTreasurer().has_object_permission(request, None, donation)
+                for donation in Donation.objects.all()
+            ))
+        self.assertEqual(len(self.group_queries(recorder)), 1, recorder.report())
+
+        with QueryRecorder() as recorder:
+            self.assertTrue(IsTreasurer().has_permission(self.request(), None))
+        self.assertEqual(self.group_queries(recorder), [], recorder.report())
+
+    def test_membership_change_invalidates_cached_roles(self):
+        self.assertTrue(IsTreasurer().has_permission(self.request(), None))
+        self.treasurer.groups.clear()
+        self.assertFalse(IsTreasurer().has_permission(self.request(), None))
+
+    def test_donations_stay_scoped_to_owner(self):
+        """Only staff list the donations of other members; the Treasurer group does not."""
+        self.assertEqual(self.client.get(reverse('donation-list')).data['results'], [])
+        donation = Donation.objects.first()
+        url = reverse('donation-detail', kwargs={'pk': donation.pk})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.patch(url, {'amount': '1'}).status_code, 404)
+
+
+class ExportTest(APITestCase):
+    """CSV / XLSX exports honour the list filters and permissions."""
+
+    def setUp(self):
+        cache.clear()
+        self.treasurer = Member.objects.create_user(
+            email='tresorier@example.com', password='password123', postal_code='H1A1A1', first_name='Trésorier',
+        )
+        self.treasurer.groups.add(Group.objects.create(name='Treasurer'))
+        Donation.objects.bulk_create(
+            Donation(member=self.treasurer, amount=Decimal(amount), type='ONE_TIME', payment_method='CASH',
+                     status=status)
+            for amount, status in [('20', 'COMPLETED'), ('35.50', 'COMPLETED'), ('10', 'PENDING')]
+        )
+        self.client.force_authenticate(self.treasurer)
+
+    def test_csv_is_streamed_and_filtered(self):
+        response = self.client.get(reverse('donation-export', kwargs={'file_format': 'csv'}), {'status': 'COMPLETED'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['Date', 'Montant'])
+        self.assertEqual(sorted(line.split(',')[1] for line in lines[1:]), ['20.00', '35.50'])
+        self.assertIn('Trésorier', lines[1])
+
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+
+        response = self.client.get(reverse('donation-export', kwargs={'file_format': 'xlsx'}))
+        self.assertEqual(response.status_code, 200)
+        sheet = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual(sheet.max_row, 4)
+
+    def test_requires_export_permission(self):
+        member = Member.objects.create_user(email='membre@example.com', password='password123', postal_code='H1A1A1')
+        self.client.force_authenticate(member)
+        self.assertEqual(self.client.get(reverse('donation-export', kwargs={'file_format': 'csv'})).status_code, 403)
+        self.assertEqual(self.client.get(reverse('member-export', kwargs={'file_format': 'csv'})).status_code, 403)
+
+    def test_background_export(self):
+        with patch('core.tasks.export_to_storage.delay') as delay:
+            response = self.client.get(
+                reverse('donation-export', kwargs={'file_format': 'csv'}), {'status': 'PENDING', 'background': '1'},
+            )
+        self.assertEqual(response.status_code, 202)
+        view_path, user_id, file_format, query = delay.call_args.args
+        self.assertEqual((view_path, query), ('apps.finance.views.DonationViewSet', 'status=PENDING'))
+
+        with tempfile.TemporaryDirectory() as export_root, \
+                override_settings(EXPORT_ROOT=export_root, SITE_URL='https://acml.example'):
+            name = run_export(view_path, self.treasurer, file_format, query)
+            with export_storage().open(name) as fh:
+                self.assertEqual(len(fh.read().decode('utf-8-sig').splitlines()), 2)
+
+            # Only through a signed link, until it expires.
+            url = download_url(name)
+            self.assertTrue(url.startswith('https://acml.example/api/exports/'))
+            self.client.logout()
+            response = self.client.get(url.removeprefix('https://acml.example'))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(b''.join(response.streaming_content).decode('utf-8-sig').splitlines()), 2)
+            self.assertEqual(self.client.get(url.removeprefix('https://acml.example')[:-3] + 'xx/').status_code, 404)
+
+            later = timezone.now() + timedelta(days=2)
+            with patch('django.core.signing.time.time', return_value=later.timestamp()):
+                self.assertEqual(self.client.get(url.removeprefix('https://acml.example')).status_code, 404)
+            self.assertEqual(delete_expired_exports(now=later), 1)
+            self.assertFalse(export_storage().exists(name))
+
+    def test_formula_cells_neutralized(self):
+        rows = [('=HYPERLINK("http://evil")', '+1', '-2', '@SUM(A1)', '\tx', 'ok', -3)]
+        line = ''.join(stream_csv(iter(rows))).lstrip('\ufeff').strip()
+        self.assertEqual(line, '"\'=HYPERLINK(""http://evil"")",\'+1,\'-2,\'@SUM(A1),\'\tx,ok,-3')
+
+
+class RateLimitTest(APITestCase):
+    """Test the shared per-second rate limit."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_waits_for_next_second_over_budget(self):
+        """Test callers over the budget sleep until the next second."""
+        clock = [1000.25]
+        with patch('core.ratelimit.time.time', side_effect=lambda: clock[0]), \
+                patch('core.ratelimit.time.sleep', side_effect=lambda seconds: clock.__setitem__(0, clock[0] + seconds)) as sleep:
+            for _ in range(3):
+                ratelimit.wait('email:test', 2)
+            ratelimit.wait('email:test', 0)
+        sleep.assert_called_once_with(0.75)
+        self.assertEqual(clock[0], 1001.0)
+
@@ -25,19 +25,12 @@ def generate_barcode(code: str, prefix: str = 'ACML') -> str:
     return f"{prefix}-{timestamp}-{random_str}"
 
 
-def generate_barcode_image(code: str, output_path: str) -> None:
-    """
-    Generate a Code128 barcode image.
-    """
+def _code128(code: str):
     code128_class = barcode.get_barcode_class('code128')
-    code128 = code128_class(code, writer=barcode.writer.ImageWriter())
-    code128.save(output_path)
+    return code128_class(code, writer=barcode.writer.ImageWriter())
 
 
-def generate_qr_code(data: str, output_path: str) -> None:
-    """
-    Generate a QR code image.
-    """
+def _qr_image(data: str):
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -46,9 +39,39 @@ def generate_qr_code(data: str, output_path: str) -> None:
     )
     qr.add_data(data)
     qr.make(fit=True)
+    return qr.make_image(fill_color="black", back_color="white")
+
+
+def generate_barcode_image(code: str, output_path: str) -> None:
+    """
+    Generate a Code128 barcode image.
+    """
+    _code128(code).save(output_path)
+
 
-    img = qr.make_image(fill_color="black", back_color="white")
-    img.save(output_path)
+def generate_qr_code(data: str, output_path: str) -> None:
+    """
+    Generate a QR code image.
+    """
+    _qr_image(data).save(output_path)
+
+
+def render_barcode_image(code: str) -> bytes:
+    """
+    Render a Code128 barcode as PNG bytes.
+    """
+    buffer = BytesIO()
+    _code128(code).write(buffer)
+    return buffer.getvalue()
+
+
+def render_qr_code(data: str) -> bytes:
+    """
+    Render a QR code as PNG bytes.
+    """
+    buffer = BytesIO()
+    _qr_image(data).save(buffer)
+    return buffer.getvalue()
 
 
 def calculate_tax_receipt_amount(donations: list) -> tuple[Decimal, bool]:
@@ -118,18 +141,12 @@ def send_notification_email(member_email: str, subject: str, message: str) -> bo
 
 def send_notification_sms(phone_number: str, message: str) -> bool:
     """
-    Send SMS notification via Twilio.
+    Send SMS notification through SMS_BACKEND (Twilio, one client per process).
     """
+    from .sms import get_backend
+
     try:
-        from django.conf import settings
-        from twilio.rest import Client
-
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-        client.messages.create(
-            body=message,
-            from_=settings.TWILIO_PHONE_NUMBER,
-            to=phone_number
-        )
+        get_backend().send(phone_number, message)
         return True
     except Exception:
         return False
@@ -150,14 +167,9 @@ def check_law25_retention(member) -> bool:
 def anonymize_member_data(member) -> None:
     """
     Anonymize member data for privacy compliance.
+    Same treatment as the retention sweep, see apps.members.retention.
     """
-    import uuid
-    from django.utils import timezone
+    from apps.members.retention import anonymize
 
-    member.email = f"deleted_{uuid.uuid4().hex[:8]}@anonymous.local"
-    member.first_name = "Deleted"
-    member.last_name = "Member"
-    member.phone = ""
-    member.is_deleted = True
-    member.deleted_at = timezone.now()
-    member.save()
+    anonymize([member.pk])
+    member.refresh_from_db()
@@ -0,0 +1,99 @@
+"""
+Shared ViewSet mixins for ACML Platform.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from . import metrics
+from .serializers import get_query_list
+
+
+class ExpandablePrefetchMixin:
+    """
+    Prefetch nested relations only when the client expands them.
+
+    `expandable_prefetches` maps an `?expand=` name to the lookup passed to
+    `prefetch_related`. Applied in `filter_queryset` so it also covers
+    views that override `get_queryset`.
+    """
+    expandable_prefetches = {}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        expand = get_query_list(self.request, 'expand') or set()
+        requested = get_query_list(self.request, 'fields')
+        lookups = [
+            lookup for name, lookup in self.expandable_prefetches.items()
+            if name in expand and (requested is None or name in requested)
+        ]
+        if lookups:
+            queryset = queryset.prefetch_related(*lookups)
+        return queryset
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for `list` and `retrieve`.
+
+    Detail validators come from the instance's `conditional_field`; list
+    validators from a MAX/COUNT fingerprint of the filtered queryset. A
+    matching If-None-Match / If-Modified-Since is answered with 304
+    before any serialization. Expanded responses also depend on related
+    rows, so they are served without validators.
+    """
+    conditional_field = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        if 'expand' in request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        fingerprint = queryset.aggregate(
+            last_modified=Max(self.conditional_field), count=Count('pk')
+        )
+        last_modified = fingerprint['last_modified']
+        etag = self.make_etag(request, fingerprint['count'], last_modified)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=_timestamp(last_modified)
+        )
+        if not_modified is not None:
+            return self.set_validators(not_modified, etag, last_modified)
+        response = super().list(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'expand' in request.query_params:
+            return super().retrieve(request, *args, **kwargs)
+
+        instance = self.get_object()
+        last_modified = getattr(instance, self.conditional_field)
+        etag = self.make_etag(request, instance.pk, last_modified)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=_timestamp(last_modified)
+        )
+        if not_modified is not None:
+            return self.set_validators(not_modified, etag, last_modified)
+        with metrics.timer('serialize'):
+            data = self.get_serializer(instance).data
+        return self.set_validators(Response(data), etag, last_modified)
+
+    def make_etag(self, request, *parts):
+        # The path covers ?fields= and the cursor; the user covers
+        # querysets filtered on request.user.
+        user = getattr(request.user, 'pk', None)
+        raw = ':'.join(str(part) for part in (type(self).__name__, request.get_full_path(), user, *parts))
+        return '"%s"' % hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(_timestamp(last_modified))
+        return response
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value is not None else None
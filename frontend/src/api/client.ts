@@ -15,4 +15,19 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// A page of a list endpoint (keyset pagination, `next`/`previous` are cursors).
+export interface Page<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+// Follow a `next`/`previous` link. It is an absolute URL built by the
+// backend; keep only its path so the request stays on this origin.
+export const getPage = async <T>(link: string): Promise<Page<T>> => {
+  const url = new URL(link, window.location.origin);
+  const res = await api.get<Page<T>>(url.pathname.replace(/^\/api/, '') + url.search);
+  return res.data;
+};
+
 export default api;
@@ -0,0 +1,34 @@
+import React, { useState } from 'react';
+
+interface LoadMoreProps {
+  next: string | null;
+  onLoad: () => Promise<void>;
+}
+
+// "Charger plus" under a paginated list; hidden once there is no next page.
+const LoadMore: React.FC<LoadMoreProps> = ({ next, onLoad }) => {
+  const [loading, setLoading] = useState(false);
+
+  if (!next) return null;
+
+  const handleClick = async () => {
+    setLoading(true);
+    try {
+      await onLoad();
+    } catch (err) {
+      console.error('Error loading more:', err);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  return (
+    <div className="flex justify-center mt-6">
+      <button className="btn btn-secondary" onClick={handleClick} disabled={loading}>
+        {loading ? 'Chargement...' : 'Charger plus'}
+      </button>
+    </div>
+  );
+};
+
+export default LoadMore;
@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
-import api from '../api/client';
+import api, { getPage } from '../api/client';
 import { Megaphone, Edit, Trash2 } from 'lucide-react';
+import LoadMore from '../components/LoadMore';
 import Modal from '../components/Modal';
 
 interface Announcement {
@@ -25,6 +26,7 @@ interface AnnouncementFormData {
 
 const AnnouncementsPage = () => {
   const [announcements, setAnnouncements] = useState<Announcement[]>([]);
+  const [next, setNext] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [showModal, setShowModal] = useState(false);
   const [editingAnnouncement, setEditingAnnouncement] = useState<Announcement | null>(null);
@@ -45,7 +47,8 @@ const AnnouncementsPage = () => {
   const fetchAnnouncements = async () => {
     try {
       const res = await api.get('/communications/announcements/');
-      setAnnouncements(res.data);
+      setAnnouncements(res.data.results);
+      setNext(res.data.next);
     } catch (err) {
       console.error('Error fetching announcements:', err);
     } finally {
@@ -53,6 +56,13 @@ const AnnouncementsPage = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!next) return;
+    const page = await getPage<Announcement>(next);
+    setAnnouncements(prev => [...prev, ...page.results]);
+    setNext(page.next);
+  };
+
   const handleCreate = () => {
     setEditingAnnouncement(null);
     setFormData({
@@ -211,6 +221,7 @@ const AnnouncementsPage = () => {
           ))
         )}
       </div>
+      <LoadMore next={next} onLoad={loadMore} />
 
       <Modal
         isOpen={showModal}
@@ -1,5 +1,6 @@
 import { useEffect, useState } from 'react';
-import api from '../api/client';
+import api, { getPage } from '../api/client';
+import LoadMore from '../components/LoadMore';
 import { Check, X, Shield, Clock } from 'lucide-react';
 
 interface Member {
@@ -15,6 +16,7 @@ interface Member {
 
 const ApprovalsPage = () => {
   const [pendingMembers, setPendingMembers] = useState<Member[]>([]);
+  const [next, setNext] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -24,7 +26,8 @@ const ApprovalsPage = () => {
   const fetchPending = async () => {
     try {
       const res = await api.get('/members/members/', { params: { status: 'PENDING' } });
-      setPendingMembers(res.data);
+      setPendingMembers(res.data.results);
+      setNext(res.data.next);
     } catch (err) {
       console.error('Error fetching pending members:', err);
     } finally {
@@ -32,6 +35,13 @@ const ApprovalsPage = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!next) return;
+    const page = await getPage<Member>(next);
+    setPendingMembers(prev => [...prev, ...page.results]);
+    setNext(page.next);
+  };
+
   const handleApprove = async (id: string) => {
     try {
       await api.post(`/members/members/${id}/approve/`);
@@ -125,6 +135,7 @@ const ApprovalsPage = () => {
             ))}
           </div>
         )}
+        <LoadMore next={next} onLoad={loadMore} />
       </div>
     </div>
   );
@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
-import api from '../api/client';
+import api, { getPage } from '../api/client';
 import { BookOpen, MapPin, Plus, Edit, Trash2, Users, GraduationCap } from 'lucide-react';
+import LoadMore from '../components/LoadMore';
 import Modal from '../components/Modal';
 
 interface Course {
@@ -42,6 +43,8 @@ interface StudentFormData {
 const EducationPage = () => {
   const [courses, setCourses] = useState<Course[]>([]);
   const [students, setStudents] = useState<Student[]>([]);
+  const [coursesNext, setCoursesNext] = useState<string | null>(null);
+  const [studentsNext, setStudentsNext] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [activeTab, setActiveTab] = useState<'courses' | 'students'>('courses');
   const [showCourseModal, setShowCourseModal] = useState(false);
@@ -74,8 +77,10 @@ const EducationPage = () => {
         api.get('/education/courses/'),
         api.get('/education/students/')
       ]);
-      setCourses(coursesRes.data);
-      setStudents(studentsRes.data);
+      setCourses(coursesRes.data.results);
+      setCoursesNext(coursesRes.data.next);
+      setStudents(studentsRes.data.results);
+      setStudentsNext(studentsRes.data.next);
     } catch (err) {
       console.error('Error fetching education data:', err);
     } finally {
@@ -83,6 +88,20 @@ const EducationPage = () => {
     }
   };
 
+  const loadMoreCourses = async () => {
+    if (!coursesNext) return;
+    const page = await getPage<Course>(coursesNext);
+    setCourses(prev => [...prev, ...page.results]);
+    setCoursesNext(page.next);
+  };
+
+  const loadMoreStudents = async () => {
+    if (!studentsNext) return;
+    const page = await getPage<Student>(studentsNext);
+    setStudents(prev => [...prev, ...page.results]);
+    setStudentsNext(page.next);
+  };
+
   const handleCreateCourse = () => {
     setEditingCourse(null);
     setCourseForm({
@@ -270,6 +289,7 @@ const EducationPage = () => {
               ))
             )}
           </div>
+          <LoadMore next={coursesNext} onLoad={loadMoreCourses} />
         </div>
       )}
 
@@ -322,6 +342,7 @@ const EducationPage = () => {
               </tbody>
             </table>
           </div>
+          <LoadMore next={studentsNext} onLoad={loadMoreStudents} />
         </div>
       )}
 
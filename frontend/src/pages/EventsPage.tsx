@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
-import api from '../api/client';
+import api, { getPage } from '../api/client';
 import { Calendar as CalendarIcon, MapPin, Users, Clock, Edit, Trash2 } from 'lucide-react';
+import LoadMore from '../components/LoadMore';
 import Modal from '../components/Modal';
 
 interface Event {
@@ -29,6 +30,7 @@ interface EventFormData {
 
 const EventsPage = () => {
   const [events, setEvents] = useState<Event[]>([]);
+  const [next, setNext] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [showModal, setShowModal] = useState(false);
   const [editingEvent, setEditingEvent] = useState<Event | null>(null);
@@ -51,7 +53,8 @@ const EventsPage = () => {
   const fetchEvents = async () => {
     try {
       const res = await api.get('/events/events/');
-      setEvents(res.data);
+      setEvents(res.data.results);
+      setNext(res.data.next);
     } catch (err) {
       console.error('Error fetching events:', err);
     } finally {
@@ -59,6 +62,13 @@ const EventsPage = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!next) return;
+    const page = await getPage<Event>(next);
+    setEvents(prev => [...prev, ...page.results]);
+    setNext(page.next);
+  };
+
   const handleCreate = () => {
     setEditingEvent(null);
     setFormData({
@@ -257,6 +267,7 @@ const EventsPage = () => {
           </table>
         </div>
       )}
+      <LoadMore next={next} onLoad={loadMore} />
 
       <Modal
         isOpen={showModal}
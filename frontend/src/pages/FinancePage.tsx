@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
-import api from '../api/client';
+import api, { getPage } from '../api/client';
 import { TrendingUp, Heart, FileText, Plus, Edit, Trash2, Download } from 'lucide-react';
+import LoadMore from '../components/LoadMore';
 import Modal from '../components/Modal';
 
 interface Campaign {
@@ -44,6 +45,8 @@ interface DonationFormData {
 const FinancePage = () => {
   const [campaigns, setCampaigns] = useState<Campaign[]>([]);
   const [donations, setDonations] = useState<Donation[]>([]);
+  const [campaignsNext, setCampaignsNext] = useState<string | null>(null);
+  const [donationsNext, setDonationsNext] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [activeTab, setActiveTab] = useState<'overview' | 'campaigns' | 'donations'>('overview');
   const [showCampaignModal, setShowCampaignModal] = useState(false);
@@ -76,8 +79,10 @@ const FinancePage = () => {
         api.get('/finance/campaigns/'),
         api.get('/finance/donations/')
       ]);
-      setCampaigns(campaignsRes.data);
-      setDonations(donationsRes.data);
+      setCampaigns(campaignsRes.data.results);
+      setCampaignsNext(campaignsRes.data.next);
+      setDonations(donationsRes.data.results);
+      setDonationsNext(donationsRes.data.next);
     } catch (err) {
       console.error('Error fetching finance data:', err);
     } finally {
@@ -85,6 +90,20 @@ const FinancePage = () => {
     }
   };
 
+  const loadMoreCampaigns = async () => {
+    if (!campaignsNext) return;
+    const page = await getPage<Campaign>(campaignsNext);
+    setCampaigns(prev => [...prev, ...page.results]);
+    setCampaignsNext(page.next);
+  };
+
+  const loadMoreDonations = async () => {
+    if (!donationsNext) return;
+    const page = await getPage<Donation>(donationsNext);
+    setDonations(prev => [...prev, ...page.results]);
+    setDonationsNext(page.next);
+  };
+
   const handleCreateCampaign = () => {
     setEditingCampaign(null);
     setCampaignForm({
@@ -401,6 +420,7 @@ const FinancePage = () => {
               ))
             )}
           </div>
+          <LoadMore next={campaignsNext} onLoad={loadMoreCampaigns} />
         </div>
       )}
 
@@ -463,6 +483,7 @@ const FinancePage = () => {
               </tbody>
             </table>
           </div>
+          <LoadMore next={donationsNext} onLoad={loadMoreDonations} />
         </div>
       )}
 
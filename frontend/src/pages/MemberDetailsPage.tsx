@@ -50,7 +50,9 @@ const MemberDetailsPage = () => {
 
   const fetchMemberDetails = async () => {
     try {
-      const res = await api.get(`/members/members/${id}/`);
+      const res = await api.get(`/members/members/${id}/`, {
+        params: { expand: 'families,skills,contributions,cards' },
+      });
       setMember(res.data);
     } catch (err) {
       console.error('Error fetching member details:', err);
@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
-import api from '../api/client';
+import api, { getPage } from '../api/client';
+import LoadMore from '../components/LoadMore';
 import Modal from '../components/Modal';
 import { useAuthStore } from '../stores/auth';
 import { Shield } from 'lucide-react';
@@ -37,6 +38,7 @@ const MembersPage = () => {
   const isAdmin = user?.is_staff;
 
   const [members, setMembers] = useState<Member[]>([]);
+  const [next, setNext] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [showModal, setShowModal] = useState(false);
   const [editingMember, setEditingMember] = useState<Member | null>(null);
@@ -55,13 +57,16 @@ const MembersPage = () => {
   });
 
   useEffect(() => {
-    fetchMembers();
-  }, []);
+    // Search runs server-side; wait for the volunteer to stop typing.
+    const timer = setTimeout(() => fetchMembers(searchTerm), 250);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
 
-  const fetchMembers = async () => {
+  const fetchMembers = async (search: string = searchTerm) => {
     try {
-      const res = await api.get('/members/members/');
-      setMembers(res.data);
+      const res = await api.get('/members/members/', { params: search.trim() ? { search } : {} });
+      setMembers(res.data.results);
+      setNext(res.data.next);
     } catch (err) {
       console.error('Error fetching members:', err);
     } finally {
@@ -69,6 +74,13 @@ const MembersPage = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!next) return;
+    const page = await getPage<Member>(next);
+    setMembers(prev => [...prev, ...page.results]);
+    setNext(page.next);
+  };
+
   const handleCreate = () => {
     setEditingMember(null);
     setFormData({
@@ -159,10 +171,6 @@ const MembersPage = () => {
     }
   };
 
-  const filteredMembers = members.filter(m =>
-    `${m.first_name} ${m.last_name} ${m.email} ${m.phone}`.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   const getStatusColor = (status: string) => {
     switch (status) {
       case 'ACTIVE': return '#10b981';
@@ -221,12 +229,12 @@ const MembersPage = () => {
             </tr>
           </thead>
           <tbody>
-            {filteredMembers.length === 0 ? (
+            {members.length === 0 ? (
               <tr>
                 <td colSpan={5} className="text-center">Aucun membre trouvé.</td>
               </tr>
             ) : (
-              filteredMembers.map(member => (
+              members.map(member => (
                 <tr key={member.id} onClick={(e) => {
                     if ((e.target as HTMLElement).closest('.action-buttons')) return;
                     navigate(`/members/${member.id}`);
@@ -270,6 +278,7 @@ const MembersPage = () => {
           </tbody>
         </table>
       </div>
+      <LoadMore next={next} onLoad={loadMore} />
 
       <Modal
         isOpen={showModal}
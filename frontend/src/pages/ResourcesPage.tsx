@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react';
-import api from '../api/client';
+import api, { getPage } from '../api/client';
+import LoadMore from '../components/LoadMore';
 import Modal from '../components/Modal';
 import { useAuthStore } from '../stores/auth';
 import { 
@@ -42,6 +43,8 @@ const ResourcesPage = () => {
 
   const [resources, setResources] = useState<Resource[]>([]);
   const [reservations, setReservations] = useState<Reservation[]>([]);
+  const [resourcesNext, setResourcesNext] = useState<string | null>(null);
+  const [reservationsNext, setReservationsNext] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   
@@ -73,7 +76,8 @@ const ResourcesPage = () => {
   const fetchResources = async () => {
     try {
       const response = await api.get('/resources/resources/');
-      setResources(response.data);
+      setResources(response.data.results);
+      setResourcesNext(response.data.next);
     } catch (error: any) {
       console.error('Error fetching resources:', error);
       setError('Erreur de chargement des ressources: ' + (error.response?.status === 401 ? 'Session expirée' : error.message));
@@ -85,12 +89,27 @@ const ResourcesPage = () => {
   const fetchMyReservations = async () => {
     try {
       const response = await api.get('/resources/reservations/');
-      setReservations(response.data);
+      setReservations(response.data.results);
+      setReservationsNext(response.data.next);
     } catch (error) {
       console.error('Error fetching reservations:', error);
     }
   };
 
+  const loadMoreResources = async () => {
+    if (!resourcesNext) return;
+    const page = await getPage<Resource>(resourcesNext);
+    setResources(prev => [...prev, ...page.results]);
+    setResourcesNext(page.next);
+  };
+
+  const loadMoreReservations = async () => {
+    if (!reservationsNext) return;
+    const page = await getPage<Reservation>(reservationsNext);
+    setReservations(prev => [...prev, ...page.results]);
+    setReservationsNext(page.next);
+  };
+
   // --- Reservation Logic ---
 
   const handleReserve = (resource: Resource) => {
@@ -342,6 +361,7 @@ const ResourcesPage = () => {
             </div>
           ))}
         </div>
+        <LoadMore next={resourcesNext} onLoad={loadMoreResources} />
       </div>
 
       {reservations.length > 0 && (
@@ -397,6 +417,7 @@ const ResourcesPage = () => {
               </table>
             </div>
           </div>
+          <LoadMore next={reservationsNext} onLoad={loadMoreReservations} />
         </div>
       )}
 